@@ -0,0 +1,160 @@
+import os
+import uuid
+from abc import ABC, abstractmethod
+
+from app.core.config import settings
+
+CHUNK_SIZE = 256 * 1024
+
+
+class ArtifactWriter(ABC):
+    """
+    One upload in progress. The key (content hash) is only known at the
+    end, so backends stage the bytes and `commit(key)` publishes them.
+    """
+
+    @abstractmethod
+    def write(self, data: bytes): ...
+
+    @abstractmethod
+    def commit(self, key: str) -> bool:
+        """Publishes under `key`; False if it already existed (deduplicated)."""
+
+    @abstractmethod
+    def abort(self): ...
+
+
+class ArtifactBackend(ABC):
+    """
+    Blob storage for artifacts, keyed by content hash.
+
+    Shaped after an object store (put / head / ranged get / delete / list)
+    so an S3-compatible service or a local stand-in for one can implement
+    it; `local_path` lets the download route hand a file straight to the
+    server (sendfile / pathsend) when the blob is on local disk.
+    """
+    name = "base"
+
+    @abstractmethod
+    def writer(self) -> ArtifactWriter: ...
+
+    @abstractmethod
+    def head(self, key: str) -> int | None:
+        """Size in bytes, or None if missing."""
+
+    @abstractmethod
+    def read(self, key: str, start: int = 0, end: int | None = None,
+             chunk_size: int = CHUNK_SIZE):
+        """Yields bytes [start, end) of the blob."""
+
+    @abstractmethod
+    def delete(self, key: str): ...
+
+    @abstractmethod
+    def list(self) -> list[tuple[str, int, float]]:
+        """(key, size, last access time) for every stored blob."""
+
+    def touch(self, key: str):
+        pass
+
+    def local_path(self, key: str) -> str | None:
+        return None
+
+
+class _LocalWriter(ArtifactWriter):
+    def __init__(self, backend: "LocalFSBackend"):
+        self.backend = backend
+        self.staging = os.path.join(backend.staging_dir, uuid.uuid4().hex)
+        self.file = open(self.staging, "wb")
+
+    def write(self, data: bytes):
+        self.file.write(data)
+
+    def commit(self, key: str) -> bool:
+        self.file.close()
+        path = self.backend.path(key)
+        if os.path.exists(path):
+            os.unlink(self.staging)
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(self.staging, path)  # atomic: readers never see a partial blob
+        return True
+
+    def abort(self):
+        self.file.close()
+        if os.path.exists(self.staging):
+            os.unlink(self.staging)
+
+
+class LocalFSBackend(ArtifactBackend):
+    """
+    Blobs as files under `root/<first two hex chars>/<key>`; uploads are
+    staged in `root/.staging` on the same filesystem and renamed in.
+    """
+    name = "local"
+
+    def __init__(self, root: str | None = None):
+        self.root = root or settings.ARTIFACT_DIR
+        self.staging_dir = os.path.join(self.root, ".staging")
+        os.makedirs(self.staging_dir, exist_ok=True)
+        # Uploads interrupted by a crash or restart
+        for name in os.listdir(self.staging_dir):
+            os.unlink(os.path.join(self.staging_dir, name))
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    def writer(self) -> ArtifactWriter:
+        return _LocalWriter(self)
+
+    def head(self, key):
+        try:
+            return os.path.getsize(self.path(key))
+        except FileNotFoundError:
+            return None
+
+    def read(self, key, start=0, end=None, chunk_size=CHUNK_SIZE):
+        with open(self.path(key), "rb") as f:
+            f.seek(start)
+            remaining = None if end is None else end - start
+            while remaining is None or remaining > 0:
+                data = f.read(chunk_size if remaining is None else min(chunk_size, remaining))
+                if not data:
+                    return
+                if remaining is not None:
+                    remaining -= len(data)
+                yield data
+
+    def delete(self, key):
+        try:
+            os.unlink(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def list(self):
+        blobs = []
+        for prefix in os.listdir(self.root):
+            folder = os.path.join(self.root, prefix)
+            if prefix == ".staging" or not os.path.isdir(folder):
+                continue
+            for key in os.listdir(folder):
+                stat = os.stat(os.path.join(folder, key))
+                blobs.append((key, stat.st_size, stat.st_mtime))
+        return blobs
+
+    def touch(self, key):
+        # mtime doubles as the last-access time (atime is often disabled)
+        try:
+            os.utime(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def local_path(self, key):
+        return self.path(key)
+
+
+def build_artifact_backend(name: str | None = None) -> ArtifactBackend:
+    name = name or settings.ARTIFACT_BACKEND
+    if name == "local":
+        return LocalFSBackend()
+    raise ValueError(f"Unknown artifact backend: {name}")
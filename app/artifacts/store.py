@@ -0,0 +1,134 @@
+import asyncio
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+from app.artifacts.backends import ArtifactBackend, build_artifact_backend
+from app.core.config import settings
+
+_KEY = re.compile(r"^[0-9a-f]{64}$")
+
+
+def is_artifact_key(key: str) -> bool:
+    return bool(_KEY.match(key))
+
+
+class ArtifactStore:
+    """
+    Content-addressed artifacts: the key is the SHA-256 of the bytes, so
+    identical outputs are stored once. Total size is capped at
+    `quota_bytes`; least recently downloaded/stored blobs go first.
+    """
+
+    def __init__(self, backend: ArtifactBackend | None = None, quota_bytes: int | None = None):
+        self.backend = backend or build_artifact_backend()
+        self.quota_bytes = quota_bytes or settings.ARTIFACT_QUOTA_MB * 2**20
+        self.lock = threading.Lock()  # puts run in worker threads
+
+        # Rebuild the LRU from what is on the backend, oldest first
+        self.lru: OrderedDict[str, int] = OrderedDict(
+            (key, size) for key, size, _ in sorted(self.backend.list(), key=lambda b: b[2])
+        )
+        self.total_bytes = sum(self.lru.values())
+        self.counters = {
+            "stored": 0,
+            "deduplicated": 0,
+            "evicted": 0,
+            "evicted_bytes": 0,
+            "hits": 0,
+            "misses": 0,
+        }
+
+    def put_chunks(self, chunks) -> str:
+        """
+        Streams `chunks` into the backend while hashing; returns the key.
+        """
+        digest = hashlib.sha256()
+        size = 0
+        writer = self.backend.writer()
+        try:
+            for chunk in chunks:
+                digest.update(chunk)
+                writer.write(chunk)
+                size += len(chunk)
+            key = digest.hexdigest()
+            created = writer.commit(key)
+        except BaseException:
+            writer.abort()
+            raise
+
+        with self.lock:
+            if created:
+                self.counters["stored"] += 1
+                self.lru[key] = size
+                self.total_bytes += size
+            else:
+                self.counters["deduplicated"] += 1
+                if key not in self.lru:
+                    self.lru[key] = size
+                    self.total_bytes += size
+            self.lru.move_to_end(key)
+            evicted = self._over_quota(keep=key)
+        for old in evicted:
+            self.backend.delete(old)
+        if not created:
+            self.backend.touch(key)
+        return key
+
+    async def put(self, chunks) -> str:
+        """
+        `put_chunks` off the event loop (zip compression is CPU-bound).
+        """
+        return await asyncio.to_thread(self.put_chunks, chunks)
+
+    def _over_quota(self, keep: str) -> list[str]:
+        evicted = []
+        while self.total_bytes > self.quota_bytes and len(self.lru) > 1:
+            key, size = next(iter(self.lru.items()))
+            if key == keep:
+                break
+            del self.lru[key]
+            self.total_bytes -= size
+            self.counters["evicted"] += 1
+            self.counters["evicted_bytes"] += size
+            evicted.append(key)
+        return evicted
+
+    def get(self, key: str) -> int | None:
+        """
+        Size of the artifact (and marks it recently used), None if absent.
+        """
+        size = self.backend.head(key) if is_artifact_key(key) else None
+        with self.lock:
+            if size is None:
+                self.counters["misses"] += 1
+                # Gone from the backend behind our back (e.g. deleted by hand)
+                self.total_bytes -= self.lru.pop(key, 0)
+                return None
+            self.counters["hits"] += 1
+            if key not in self.lru:
+                self.lru[key] = size
+                self.total_bytes += size
+            self.lru.move_to_end(key)
+        self.backend.touch(key)
+        return size
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend.name,
+            "artifacts": len(self.lru),
+            "bytes": self.total_bytes,
+            "quota_bytes": self.quota_bytes,
+            **self.counters,
+        }
+
+
+_store: ArtifactStore | None = None
+
+
+def get_artifact_store() -> ArtifactStore:
+    global _store
+    if _store is None:
+        _store = ArtifactStore()
+    return _store
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional
+from typing import Any, Dict, Optional
 
 
 class Settings(BaseSettings):
@@ -15,6 +15,120 @@ class Settings(BaseSettings):
     LLM_PROVIDER: str = "groq"  # groq | gemini
     LLM_MODEL: str = "llama-3.1-8b-instant"
 
+    # ⚡ LLM response cache
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MAX_ENTRIES: int = 1024
+    LLM_CACHE_TTL_SECONDS: int = 3600
+    LLM_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    LLM_CACHE_DIR: Optional[str] = None  # enables the on-disk tier
+
+    # 🔌 LLM HTTP connection pools
+    LLM_POOL_MAX_CONNECTIONS: int = 20
+    LLM_POOL_MAX_KEEPALIVE: int = 10
+    LLM_POOL_KEEPALIVE_EXPIRY: float = 60.0
+    LLM_HTTP_TIMEOUT: float = 60.0
+    LLM_WARMUP: bool = True
+
+    # 🏁 Hedged requests (Gemini ⇄ Groq)
+    LLM_HEDGE_ENABLED: bool = False
+    LLM_HEDGE_POLICIES: Dict[str, Dict[str, Any]] = {
+        "system_design": {"quantile": 0.9},
+        "component_tree": {"quantile": 0.9},
+        "expand_prompt_to_spec": {"quantile": 0.9},
+    }
+
+    # 🔁 Retry / failover / circuit breakers (see core/llm_retry.py)
+    LLM_RETRY_BASE_DELAY_MS: int = 250
+    LLM_RETRY_MAX_DELAY_MS: int = 4000
+    LLM_BREAKER_FAILURE_THRESHOLD: int = 5
+    LLM_BREAKER_RECOVERY_SECONDS: float = 30
+    LLM_BREAKER_LATENCY_SPIKE_SECONDS: float = 45
+
+    # 🚦 Provider rate limits (token buckets)
+    LLM_RATE_LIMITS: Dict[str, Dict[str, int]] = {
+        "gemini": {"rpm": 1000, "tpm": 1_000_000},
+        "groq": {"rpm": 30, "tpm": 6000},
+    }
+    LLM_RATE_LIMIT_BACKEND: str = "memory"  # memory | redis
+    LLM_RATE_LIMIT_REDIS_URL: str = "redis://localhost:6379/0"
+    LLM_ADMISSION_QUEUE_SIZE: int = 100
+    LLM_ADMISSION_MAX_WAIT_SECONDS: float = 20
+
+    # 📡 Server-Sent Events
+    SSE_COALESCE_WINDOW_MS: int = 50   # 0 disables token batching
+    SSE_COALESCE_MAX_BYTES: int = 4096
+    SSE_EVENT_IDS: bool = True
+
+    # ✂️ Client disconnects on streaming routes
+    DISCONNECT_POLICY: str = "cancel"  # cancel upstream LLM work | finish it into the cache / replay buffer
+    DISCONNECT_POLL_SECONDS: float = 0.5  # request.is_disconnected() polling interval
+    DISCONNECT_RECONNECT_SECONDS: float = 10  # resumable streams: wait this long for a reconnect
+
+    # 🔁 Resumable SSE (/generate/stream, /chat): Last-Event-ID replay. Opt-in: the
+    #    generation then outlives its connection by DISCONNECT_RECONNECT_SECONDS
+    SSE_RESUMABLE: bool = False
+    SSE_REPLAY_BACKEND: str = "memory"  # memory | redis (reconnect to any process)
+    SSE_REPLAY_REDIS_URL: str = "redis://localhost:6379/0"
+    SSE_REPLAY_TTL_SECONDS: int = 300  # kept this long after the stream ends
+    SSE_REPLAY_MAX_EVENTS: int = 5000  # per stream; older frames are dropped
+    SSE_REPLAY_MAX_BYTES: int = 256 * 1024 * 1024  # memory backend, all streams
+
+    # 💬 Chat generate flow
+    CHAT_FUSED_ANALYSIS: bool = False  # one LLM call for analysis + spec
+    CHAT_SPECULATIVE_GENERATION: bool = False  # start the design during analysis
+
+    # 🪭 Fan-out system design (sections generated in parallel)
+    DESIGN_FANOUT: bool = False
+    DESIGN_FANOUT_OUTLINE: str = "llm"  # llm | static
+    DESIGN_FANOUT_MAX_SECTIONS: int = 8
+    DESIGN_FANOUT_CONCURRENCY: Dict[str, int] = {  # sections in flight per provider
+        "gemini": 4,
+        "groq": 2,
+    }
+
+    # 🗂 Stored generations (incremental regeneration by previous id).
+    # Process-local memory: an id is unknown (404) after a restart or on
+    # another worker, so multi-worker deployments need sticky sessions.
+    DESIGN_STORE_MAX_ENTRIES: int = 1000
+
+    # 📦 Generated artifacts (content-addressed zip store)
+    ARTIFACT_BACKEND: str = "local"  # local
+    ARTIFACT_DIR: str = "data/artifacts"
+    ARTIFACT_QUOTA_MB: int = 1024  # least recently used artifacts are evicted beyond this
+
+    # 🧵 Background generation jobs (POST /jobs/generate)
+    JOBS_BACKEND: str = "memory"  # memory | redis (shared queue across processes)
+    JOBS_REDIS_URL: str = "redis://localhost:6379/0"
+    JOBS_WORKERS: int = 4  # concurrent generations per app process
+    JOBS_QUEUE_SIZE: int = 100  # submits are rejected (503) beyond this
+    JOBS_TTL_SECONDS: int = 3600  # finished jobs and their results are kept this long
+
+    # 🌳 Component tree generation
+    GENERATION_PIPELINED_TREE: bool = False  # start the tree while the design streams
+    GENERATION_PIPELINE_MIN_CHARS: int = 1200  # design head needed before it may start
+
+    # 🧭 Intent routing (local classifier, LLM only when unsure)
+    INTENT_CONFIDENCE_THRESHOLD: float = 0.65
+    INTENT_LLM_FALLBACK: bool = True
+
+    # 🧠 Semantic reuse of past generations (embedding store), opt-in.
+    # "reuse" also needs a semantic embedder (Gemini) and the same
+    # normalized tech stack and requirements; otherwise a match only seeds.
+    EMBEDDING_ENABLED: bool = False
+    EMBEDDING_BACKEND: str = "memory"  # memory | mmap | pgvector
+    EMBEDDING_MODEL: str = "models/gemini-embedding-001"
+    EMBEDDING_DIM: int = 768
+    EMBEDDING_MAX_ENTRIES: int = 50_000  # memory backend only
+    EMBEDDING_INDEX_DIR: str = "data/embeddings"  # mmap backend
+    EMBEDDING_IVF_LISTS: int = 0  # mmap backend; 0 = exact flat scan
+    EMBEDDING_IVF_PROBES: int = 8
+    EMBEDDING_REUSE_THRESHOLD: float = 0.97  # answer from the stored design
+    EMBEDDING_SEED_THRESHOLD: float = 0.85   # use it as a reference design
+    EMBEDDING_BATCH_SIZE: int = 32
+    EMBEDDING_BATCH_WINDOW_MS: int = 200
+    EMBEDDING_BATCH_CONCURRENCY: int = 4
+    EMBEDDING_QUEUE_SIZE: int = 1000  # new generations are shed beyond this
+
     # 🗄 Database
     DATABASE_URL: Optional[str] = None
     DB_PASSWORD: Optional[str] = None
@@ -0,0 +1,30 @@
+# app/dependencies/llm.py
+
+from fastapi import Request
+
+from app.jobs.manager import JobManager
+from app.services.chat_service import ChatService
+from app.services.generation_service import GenerationService
+from app.services.llm.registry import ProviderRegistry
+from app.streams.resumable import ResumableStreams
+
+
+def get_provider_registry(request: Request) -> ProviderRegistry:
+    return request.app.state.llm_registry
+
+
+def get_generation_service(request: Request) -> GenerationService:
+    return request.app.state.generation_service
+
+
+def get_chat_service(request: Request) -> ChatService:
+    return request.app.state.chat_service
+
+
+def get_job_manager(request: Request) -> JobManager:
+    return request.app.state.job_manager
+
+
+def get_resumable_streams(request: Request) -> ResumableStreams | None:
+    # None when SSE_RESUMABLE is off
+    return request.app.state.streams
@@ -0,0 +1,233 @@
+import asyncio
+import os
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from app.core.config import settings
+from app.embedding.embedder import normalize_rows
+from app.embedding.mmap_index import MmapVectorIndex
+
+
+class VectorMatch:
+    def __init__(self, id: str, similarity: float, text: str, record: dict):
+        self.id = id
+        self.similarity = similarity
+        self.text = text
+        self.record = record
+
+
+class VectorBackend(ABC):
+    """
+    Stores unit-length vectors and answers cosine top-k queries.
+    """
+    name = "base"
+
+    @abstractmethod
+    async def add(self, ids: list[str], vectors: np.ndarray, texts: list[str],
+                  records: list[dict], embedder: str): ...
+
+    @abstractmethod
+    async def search(self, vector: np.ndarray, k: int, embedder: str) -> list[VectorMatch]: ...
+
+    @abstractmethod
+    async def count(self) -> int: ...
+
+    async def close(self):
+        pass
+
+
+class NumpyVectorBackend(VectorBackend):
+    """
+    In-process index: one float32 matrix, brute-force dot products.
+
+    Fine up to tens of thousands of generations on a single node; oldest
+    entries are evicted beyond `max_entries`.
+    """
+    name = "memory"
+
+    def __init__(self, dim: int | None = None, max_entries: int | None = None):
+        self.dim = dim or settings.EMBEDDING_DIM
+        self.max_entries = max_entries or settings.EMBEDDING_MAX_ENTRIES
+        self.vectors = np.empty((0, self.dim), dtype=np.float32)
+        self.spaces = np.empty(0, dtype=object)  # embedder name per row
+        self.entries: list[tuple[str, str, dict]] = []
+
+    async def add(self, ids, vectors, texts, records, embedder):
+        vectors = normalize_rows(vectors)
+        self.vectors = np.vstack([self.vectors, vectors])
+        self.spaces = np.concatenate([self.spaces, np.full(len(ids), embedder, dtype=object)])
+        self.entries.extend(zip(ids, texts, records))
+
+        overflow = len(self.entries) - self.max_entries
+        if overflow > 0:
+            self.vectors = self.vectors[overflow:]
+            self.spaces = self.spaces[overflow:]
+            del self.entries[:overflow]
+
+    async def search(self, vector, k, embedder):
+        if not self.entries:
+            return []
+
+        scores = self.vectors @ normalize_rows(vector)[0]
+        # Vectors from another embedder live in a different space
+        mask = self.spaces != embedder
+        if mask.any():
+            scores = np.where(mask, -np.inf, scores)
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        return [
+            VectorMatch(self.entries[i][0], float(scores[i]), *self.entries[i][1:])
+            for i in top
+            if np.isfinite(scores[i])
+        ]
+
+    async def count(self):
+        return len(self.entries)
+
+
+class MmapVectorBackend(VectorBackend):
+    """
+    Persistent single-node backend: one MmapVectorIndex per embedder space
+    under `path`. With `ivf_lists` set, the coarse quantizer is (re)trained
+    once enough rows accumulated outside it.
+    """
+    name = "mmap"
+
+    def __init__(self, path: str | None = None, dim: int | None = None,
+                 ivf_lists: int | None = None, ivf_probes: int | None = None):
+        self.path = path or settings.EMBEDDING_INDEX_DIR
+        self.dim = dim or settings.EMBEDDING_DIM
+        self.ivf_lists = settings.EMBEDDING_IVF_LISTS if ivf_lists is None else ivf_lists
+        self.ivf_probes = ivf_probes or settings.EMBEDDING_IVF_PROBES
+        self.indexes: dict[str, MmapVectorIndex] = {}
+        self.lock = asyncio.Lock()
+
+    def _index(self, embedder: str) -> MmapVectorIndex:
+        if embedder not in self.indexes:
+            self.indexes[embedder] = MmapVectorIndex(os.path.join(self.path, embedder), self.dim)
+        return self.indexes[embedder]
+
+    def _needs_training(self, index: MmapVectorIndex) -> bool:
+        if not self.ivf_lists:
+            return False
+        # ~40 rows per list before k-means is meaningful; retrain at 20% drift
+        if index.count < self.ivf_lists * 40:
+            return False
+        return index.untrained_rows > max(index.trained_count // 5, 1) or not index.trained_count
+
+    async def add(self, ids, vectors, texts, records, embedder):
+        async with self.lock:
+            index = self._index(embedder)
+            payloads = [
+                {"id": id, "text": text, "record": record}
+                for id, text, record in zip(ids, texts, records)
+            ]
+            index.append(vectors, payloads)
+            if self._needs_training(index):
+                await asyncio.to_thread(index.train_ivf, self.ivf_lists)
+
+    async def search(self, vector, k, embedder):
+        # Same lock as add: appends remap the vectors, training swaps the lists
+        async with self.lock:
+            index = self._index(embedder)
+            scores, rows = await asyncio.to_thread(index.search, vector, k, self.ivf_probes)
+        matches = []
+        for score, row in zip(scores[0], rows[0]):
+            if row < 0:
+                continue
+            payload = index.payload(int(row))
+            matches.append(
+                VectorMatch(payload["id"], float(score), payload["text"], payload["record"])
+            )
+        return matches
+
+    async def count(self):
+        return sum(index.count for index in self.indexes.values())
+
+    async def close(self):
+        for index in self.indexes.values():
+            index.flush()
+
+
+class PgVectorBackend(VectorBackend):
+    """
+    Production backend: `generation_embeddings` table with a pgvector column.
+
+    SQLModel sessions are synchronous, so queries run in a worker thread.
+    """
+    name = "pgvector"
+
+    def __init__(self, engine=None):
+        from sqlalchemy import text
+        from app.db.database import engine as default_engine
+        from app.models.generation_embedding import GenerationEmbedding
+
+        self.engine = engine or default_engine
+        # Created here rather than in init_db: the table needs the extension
+        with self.engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+        GenerationEmbedding.__table__.create(self.engine, checkfirst=True)
+
+    def _add(self, ids, vectors, texts, records, embedder):
+        from sqlmodel import Session
+        from app.models.generation_embedding import GenerationEmbedding
+
+        with Session(self.engine) as session:
+            for id, vector, text, record in zip(ids, vectors, texts, records):
+                session.merge(GenerationEmbedding(
+                    id=id,
+                    text=text,
+                    embedder=embedder,
+                    embedding=vector.tolist(),
+                    record=record,
+                ))
+            session.commit()
+
+    def _search(self, vector, k, embedder):
+        from sqlmodel import Session, select
+        from app.models.generation_embedding import GenerationEmbedding
+
+        distance = GenerationEmbedding.embedding.cosine_distance(vector.tolist())
+        query = (
+            select(GenerationEmbedding, distance.label("distance"))
+            .where(GenerationEmbedding.embedder == embedder)
+            .order_by(distance)
+            .limit(k)
+        )
+        with Session(self.engine) as session:
+            return [
+                VectorMatch(row.id, 1.0 - float(d), row.text, row.record)
+                for row, d in session.exec(query).all()
+            ]
+
+    def _count(self):
+        from sqlalchemy import func
+        from sqlmodel import Session, select
+        from app.models.generation_embedding import GenerationEmbedding
+
+        with Session(self.engine) as session:
+            return session.exec(select(func.count()).select_from(GenerationEmbedding)).one()
+
+    async def add(self, ids, vectors, texts, records, embedder):
+        await asyncio.to_thread(self._add, ids, normalize_rows(vectors), texts, records, embedder)
+
+    async def search(self, vector, k, embedder):
+        return await asyncio.to_thread(self._search, normalize_rows(vector)[0], k, embedder)
+
+    async def count(self):
+        return await asyncio.to_thread(self._count)
+
+
+def build_vector_backend(name: str | None = None) -> VectorBackend:
+    name = name or settings.EMBEDDING_BACKEND
+    if name == "pgvector":
+        return PgVectorBackend()
+    if name == "mmap":
+        return MmapVectorBackend()
+    if name == "memory":
+        return NumpyVectorBackend()
+    raise ValueError(f"Unknown embedding backend: {name}")
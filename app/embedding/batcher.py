@@ -0,0 +1,155 @@
+import asyncio
+import time
+
+from app.core.config import settings
+
+
+class EmbeddingBatcher:
+    """
+    Collects texts from many requests and embeds them in batches.
+
+    `submit` never waits: items go on a bounded queue and a background
+    worker flushes a batch when it reaches `max_batch` items or when
+    `window_ms` has passed since its first item — one embedding call and
+    one bulk write per batch. When the queue is full new items are shed
+    (counted as `dropped`), so a slow embedder can't grow memory or add
+    latency to the request path. Up to `max_in_flight` batches are
+    written concurrently.
+    """
+
+    def __init__(self, store, max_batch: int | None = None,
+                 window_ms: int | None = None, max_queue: int | None = None,
+                 max_in_flight: int | None = None):
+        self.store = store
+        self.max_batch = max_batch or settings.EMBEDDING_BATCH_SIZE
+        self.window = (
+            settings.EMBEDDING_BATCH_WINDOW_MS if window_ms is None else window_ms
+        ) / 1000
+        self.max_queue = max_queue or settings.EMBEDDING_QUEUE_SIZE
+        self.max_in_flight = max_in_flight or settings.EMBEDDING_BATCH_CONCURRENCY
+
+        self.queue: asyncio.Queue | None = None
+        self.worker: asyncio.Task | None = None
+        self.writes: set[asyncio.Task] = set()
+        self.counters = {
+            "submitted": 0,
+            "dropped": 0,
+            "embedded": 0,
+            "failed": 0,
+            "batches": 0,
+            "max_queue_depth": 0,
+            "embed_seconds": 0.0,
+        }
+
+    def _ensure_worker(self):
+        if self.queue is None:
+            self.queue = asyncio.Queue(maxsize=self.max_queue)
+        if self.worker is None or self.worker.done():
+            self.worker = asyncio.create_task(self._run())
+
+    def submit(self, text: str, record: dict | None = None) -> bool:
+        """
+        Enqueues a text for embedding. Returns False when it was shed.
+        """
+        self._ensure_worker()
+        try:
+            self.queue.put_nowait((text, record or {}))
+        except asyncio.QueueFull:
+            self.counters["dropped"] += 1
+            return False
+
+        self.counters["submitted"] += 1
+        self.counters["max_queue_depth"] = max(
+            self.counters["max_queue_depth"], self.queue.qsize()
+        )
+        return True
+
+    async def _next_batch(self) -> list[tuple[str, dict]]:
+        batch = [await self.queue.get()]
+        deadline = time.monotonic() + self.window
+
+        while len(batch) < self.max_batch:
+            # Drain what is already queued before waiting on the window
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            # Not wait_for(get()): on a timeout racing the get, the item is
+            # dequeued and then dropped. A cancelled get leaves it queued.
+            getter = asyncio.ensure_future(self.queue.get())
+            try:
+                done, _ = await asyncio.wait({getter}, timeout=remaining)
+            except asyncio.CancelledError:
+                getter.cancel()
+                raise
+            if getter not in done:
+                getter.cancel()
+                break
+            batch.append(getter.result())
+        return batch
+
+    async def _write(self, batch: list[tuple[str, dict]]):
+        started = time.perf_counter()
+        try:
+            await self.store.index_many([t for t, _ in batch], [r for _, r in batch])
+            self.counters["embedded"] += len(batch)
+        except Exception as e:
+            self.counters["failed"] += len(batch)
+            print(f"⚠️ Embedding batch of {len(batch)} failed: {e}")
+        finally:
+            self.counters["batches"] += 1
+            self.counters["embed_seconds"] += time.perf_counter() - started
+            for _ in batch:
+                self.queue.task_done()
+
+    async def _run(self):
+        slots = asyncio.Semaphore(self.max_in_flight)
+        while True:
+            batch = await self._next_batch()
+            await slots.acquire()
+            task = asyncio.create_task(self._write(batch))
+            self.writes.add(task)
+            task.add_done_callback(self.writes.discard)
+            task.add_done_callback(lambda _: slots.release())
+
+    async def flush(self):
+        """
+        Waits until everything submitted so far has been written.
+        """
+        if self.queue is not None:
+            await self.queue.join()
+
+    async def close(self):
+        await self.flush()
+        if self.worker is not None:
+            self.worker.cancel()
+            try:
+                await self.worker
+            except asyncio.CancelledError:
+                pass
+            self.worker = None
+
+    def stats(self) -> dict:
+        batches = self.counters["batches"]
+        return {
+            "max_batch": self.max_batch,
+            "window_ms": round(self.window * 1000),
+            "queue_depth": self.queue.qsize() if self.queue is not None else 0,
+            "queue_capacity": self.max_queue,
+            "writes_in_flight": len(self.writes),
+            "submitted": self.counters["submitted"],
+            "dropped": self.counters["dropped"],
+            "embedded": self.counters["embedded"],
+            "failed": self.counters["failed"],
+            "batches": batches,
+            "avg_batch_size": (
+                round((self.counters["embedded"] + self.counters["failed"]) / batches, 2)
+                if batches else 0.0
+            ),
+            "max_queue_depth": self.counters["max_queue_depth"],
+            "avg_batch_ms": (
+                round(self.counters["embed_seconds"] * 1000 / batches, 3) if batches else 0.0
+            ),
+        }
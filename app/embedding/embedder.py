@@ -0,0 +1,78 @@
+import re
+import zlib
+
+import numpy as np
+
+from app.core.config import settings
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9.+#-]*")
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """
+    L2-normalizes each row so cosine similarity becomes a dot product.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class HashingEmbedder:
+    """
+    Deterministic local embedder: hashed word uni/bigrams with sign hashing.
+
+    Purely lexical, so it only finds near-duplicate prompts — used in tests
+    and when no Gemini key is configured.
+    """
+    name = "hashing"
+    lexical = True  # scores word overlap, not meaning: never trusted for "reuse"
+
+    def __init__(self, dim: int | None = None):
+        self.dim = dim or settings.EMBEDDING_DIM
+
+    def _embed_one(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        words = _TOKEN_RE.findall(text.lower())
+        grams = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        for g in grams:
+            h = zlib.crc32(g.encode("utf-8"))
+            vector[h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        return vector
+
+    async def embed(self, texts: list[str]) -> np.ndarray:
+        return normalize_rows(np.stack([self._embed_one(t) for t in texts]))
+
+
+class GeminiEmbedder:
+    """
+    Gemini embeddings, truncated to EMBEDDING_DIM dimensions.
+    """
+    name = "gemini"
+    lexical = False
+
+    def __init__(self, dim: int | None = None, model: str | None = None):
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+        self.dim = dim or settings.EMBEDDING_DIM
+        self.model_name = model or settings.EMBEDDING_MODEL
+        self.model = GoogleGenerativeAIEmbeddings(
+            model=self.model_name,
+            google_api_key=settings.GEMINI_API_KEY,
+        )
+
+    async def embed(self, texts: list[str]) -> np.ndarray:
+        vectors = await self.model.aembed_documents(
+            texts,
+            task_type="SEMANTIC_SIMILARITY",
+            output_dimensionality=self.dim,
+        )
+        return normalize_rows(np.array(vectors, dtype=np.float32))
+
+
+def build_embedder():
+    if settings.GEMINI_API_KEY:
+        return GeminiEmbedder()
+    return HashingEmbedder()
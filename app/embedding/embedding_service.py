@@ -1,9 +1,167 @@
-# Minimal stub — extend later when DB and pgvector are ready
+import time
+import uuid
 
-async def store_generation_embedding(text: str):
+import numpy as np
+
+from app.core.config import settings
+from app.embedding.backends import VectorBackend, VectorMatch, build_vector_backend
+from app.embedding.batcher import EmbeddingBatcher
+from app.embedding.embedder import build_embedder
+
+SIMILARITY_BUCKETS = (0.5, 0.7, 0.85, 0.95)
+
+
+class Recall:
+    """
+    A stored generation close enough to the new prompt to use.
+
+    mode = "reuse": answer with the stored design as-is
+    mode = "seed":  generate fresh, with the stored design as a reference
+
+    Reuse needs a semantic embedder and the same spec fingerprint (tech
+    stack and requirements); a close match without them only seeds.
+    """
+    def __init__(self, mode: str, match: VectorMatch):
+        self.mode = mode
+        self.match = match
+
+    @property
+    def similarity(self) -> float:
+        return self.match.similarity
+
+    @property
+    def record(self) -> dict:
+        return self.match.record
+
+
+class EmbeddingStore:
+    """
+    Embeds completed generations and finds the nearest one for new prompts.
+    """
+
+    def __init__(self, embedder=None, backend: VectorBackend | None = None,
+                 reuse_threshold: float | None = None,
+                 seed_threshold: float | None = None):
+        self.embedder = embedder or build_embedder()
+        self.backend = backend or build_vector_backend()
+        self.reuse_threshold = (
+            settings.EMBEDDING_REUSE_THRESHOLD if reuse_threshold is None else reuse_threshold
+        )
+        self.seed_threshold = (
+            settings.EMBEDDING_SEED_THRESHOLD if seed_threshold is None else seed_threshold
+        )
+
+        self.counters = {
+            "lookups": 0,
+            "reused": 0,
+            "seeded": 0,
+            "misses": 0,
+            "indexed": 0,
+            "errors": 0,
+            "lookup_seconds": 0.0,
+            "similarity_sum": 0.0,
+        }
+        self.histogram = [0] * (len(SIMILARITY_BUCKETS) + 1)
+        self.batcher = EmbeddingBatcher(self)
+
+    async def index_many(self, texts: list[str], records: list[dict] | None = None) -> list[str]:
+        """
+        One embedding call and one bulk write for the whole batch.
+        """
+        records = records or [{} for _ in texts]
+        vectors = await self.embedder.embed(texts)
+        ids = [str(uuid.uuid4()) for _ in texts]
+        await self.backend.add(ids, vectors, texts, records, self.embedder.name)
+        self.counters["indexed"] += len(texts)
+        return ids
+
+    async def index(self, text: str, record: dict | None = None) -> str:
+        return (await self.index_many([text], [record or {}]))[0]
+
+    async def lookup(self, text: str, fingerprint: dict | None = None) -> Recall | None:
+        started = time.perf_counter()
+        self.counters["lookups"] += 1
+
+        vectors = await self.embedder.embed([text])
+        matches = await self.backend.search(vectors[0], 1, self.embedder.name)
+        self.counters["lookup_seconds"] += time.perf_counter() - started
+
+        if not matches:
+            self.counters["misses"] += 1
+            return None
+
+        best = matches[0]
+        self.counters["similarity_sum"] += best.similarity
+        self.histogram[int(np.searchsorted(SIMILARITY_BUCKETS, best.similarity, side="right"))] += 1
+
+        if best.similarity >= self.reuse_threshold and self._reusable(best, fingerprint):
+            self.counters["reused"] += 1
+            return Recall("reuse", best)
+        if best.similarity >= self.seed_threshold:
+            self.counters["seeded"] += 1
+            return Recall("seed", best)
+
+        self.counters["misses"] += 1
+        return None
+
+    def _reusable(self, match: VectorMatch, fingerprint: dict | None) -> bool:
+        # A lexical score can't tell PostgreSQL from MongoDB in an otherwise
+        # identical prompt; the stored design must be for the same stack
+        if getattr(self.embedder, "lexical", False) or fingerprint is None:
+            return False
+        return match.record.get("fingerprint") == fingerprint
+
+    async def close(self):
+        await self.batcher.close()
+        await self.backend.close()
+
+    def stats(self) -> dict:
+        lookups = self.counters["lookups"]
+        scored = sum(self.histogram)
+        edges = ("0",) + tuple(str(b) for b in SIMILARITY_BUCKETS)
+        return {
+            "embedder": self.embedder.name,
+            "backend": self.backend.name,
+            "reuse_threshold": self.reuse_threshold,
+            "seed_threshold": self.seed_threshold,
+            "lookups": lookups,
+            "reused": self.counters["reused"],
+            "seeded": self.counters["seeded"],
+            "misses": self.counters["misses"],
+            "indexed": self.counters["indexed"],
+            "errors": self.counters["errors"],
+            "hit_rate": (
+                round((self.counters["reused"] + self.counters["seeded"]) / lookups, 4)
+                if lookups else 0.0
+            ),
+            "avg_top_similarity": (
+                round(self.counters["similarity_sum"] / scored, 4) if scored else None
+            ),
+            "avg_lookup_ms": (
+                round(self.counters["lookup_seconds"] * 1000 / lookups, 3) if lookups else 0.0
+            ),
+            "top_similarity_histogram": {
+                f">={edge}": count for edge, count in zip(edges, self.histogram)
+            },
+            "batcher": self.batcher.stats(),
+        }
+
+
+_store: EmbeddingStore | None = None
+
+
+def get_embedding_store() -> EmbeddingStore:
+    global _store
+    if _store is None:
+        _store = EmbeddingStore()
+    return _store
+
+
+async def store_generation_embedding(text: str, record: dict | None = None,
+                                     store: EmbeddingStore | None = None):
     """
-    Placeholder for saving embeddings into PostgreSQL (pgvector).
-    Currently does nothing.
+    Queues a completed generation for batched embedding and indexing.
+    Returns immediately; False means the queue was full and it was shed.
     """
-    print("Embedding storage skipped (stub).")
-    return True
+    store = store or get_embedding_store()
+    return store.batcher.submit(text, record)
@@ -0,0 +1,296 @@
+import json
+import mmap
+import os
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+
+from app.embedding.embedder import normalize_rows
+
+# Rows scored per matrix multiply in a flat scan (bounds temporary memory)
+SCAN_CHUNK_ROWS = 65536
+GROWTH_ROWS = 4096
+
+
+def _top_k(scores: np.ndarray, ids: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Row-wise top-k of a (q, n) score matrix, sorted by descending score.
+    """
+    if scores.shape[1] > k:
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        scores = np.take_along_axis(scores, part, axis=1)
+        ids = np.take_along_axis(ids, part, axis=1)
+    order = np.argsort(-scores, axis=1)
+    return np.take_along_axis(scores, order, axis=1), np.take_along_axis(ids, order, axis=1)
+
+
+class IVFLists(NamedTuple):
+    """
+    One trained coarse quantizer, swapped in as a whole so a concurrent
+    search never pairs one training's lists with another's row count.
+    """
+    centroids: np.ndarray
+    order: np.ndarray       # row numbers grouped by list (memory-mapped)
+    bounds: np.ndarray      # list i is order[bounds[i]:bounds[i + 1]]
+    trained_count: int
+
+
+class MmapVectorIndex:
+    """
+    Append-only cosine index persisted as memory-mapped files in `path`:
+
+    - vectors.f32   unit-length float32 rows (capacity grows by doubling)
+    - offsets.i64   byte offset of each row's payload in records.jsonl
+    - records.jsonl one JSON payload per row
+    - header.json   dim / row count, rewritten atomically after each append
+    - ivf_*.<n>.npy  lists of IVF training <n>, named in the header
+
+    Opening maps the files instead of reading them, so startup cost and
+    resident memory don't grow with the corpus; pages are faulted in by
+    searches. `train_ivf` adds an optional inverted-file (coarse k-means)
+    layer: searches then score only the rows in the `nprobe` closest
+    lists, plus rows appended since training.
+    """
+
+    def __init__(self, path: str | Path, dim: int):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.dim = dim
+
+        self.count = 0
+        self.ivf: IVFLists | None = None
+        self.ivf_generation = 0
+        meta = {}
+        header = self.path / "header.json"
+        if header.exists():
+            meta = json.loads(header.read_text())
+            if meta["dim"] != dim:
+                raise ValueError(
+                    f"Index at {self.path} has dim {meta['dim']}, expected {dim}"
+                )
+            self.count = meta["count"]
+
+        self.vectors = self._map("vectors.f32", np.float32, (dim,))
+        self.offsets = self._map("offsets.i64", np.int64, ())
+        if meta.get("ivf_generation"):
+            self.ivf_generation = meta["ivf_generation"]
+            self.ivf = self._load_ivf(self.ivf_generation, meta["trained_count"])
+            self._advise()
+
+    # ---------- storage ----------
+
+    def _map(self, name, dtype, row_shape):
+        file = self.path / name
+        row_bytes = np.dtype(dtype).itemsize * int(np.prod(row_shape, dtype=np.int64))
+        rows = file.stat().st_size // row_bytes if file.exists() else 0
+        if rows == 0:
+            return None
+        return np.memmap(file, dtype=dtype, mode="r+", shape=(rows, *row_shape))
+
+    def _grow(self, name, current, dtype, row_shape, rows):
+        file = self.path / name
+        row_bytes = np.dtype(dtype).itemsize * int(np.prod(row_shape, dtype=np.int64))
+        if current is not None:
+            current.flush()
+        with open(file, "ab") as f:
+            f.truncate(rows * row_bytes)
+        return np.memmap(file, dtype=dtype, mode="r+", shape=(rows, *row_shape))
+
+    def _advise(self):
+        # IVF probes touch scattered rows: readahead would fault in most of
+        # the file and inflate resident memory, so turn it off once trained
+        if self.vectors is None or self.ivf is None:
+            return
+        raw = getattr(self.vectors, "_mmap", None)
+        if raw is not None and hasattr(mmap, "MADV_RANDOM"):
+            raw.madvise(mmap.MADV_RANDOM)
+
+    def _reserve(self, n):
+        capacity = 0 if self.vectors is None else len(self.vectors)
+        if self.count + n <= capacity:
+            return
+        rows = max(capacity * 2, self.count + n, GROWTH_ROWS)
+        self.vectors = self._grow("vectors.f32", self.vectors, np.float32, (self.dim,), rows)
+        self.offsets = self._grow("offsets.i64", self.offsets, np.int64, (), rows)
+        self._advise()
+
+    def _write_header(self, ivf_generation: int | None = None, trained_count: int | None = None):
+        header = self.path / "header.json"
+        tmp = header.with_suffix(".tmp")
+        tmp.write_text(json.dumps({
+            "dim": self.dim,
+            "count": self.count,
+            "ivf_generation": self.ivf_generation if ivf_generation is None else ivf_generation,
+            "trained_count": self.trained_count if trained_count is None else trained_count,
+        }))
+        os.replace(tmp, header)
+
+    def append(self, vectors: np.ndarray, payloads: list[dict]) -> range:
+        """
+        Adds rows and returns their row numbers.
+        """
+        vectors = normalize_rows(vectors)
+        n = len(vectors)
+        if n != len(payloads):
+            raise ValueError("vectors and payloads must have the same length")
+        if n == 0:
+            return range(self.count, self.count)
+
+        self._reserve(n)
+        start = self.count
+        self.vectors[start:start + n] = vectors
+
+        with open(self.path / "records.jsonl", "ab") as f:
+            pos = f.tell()
+            for i, payload in enumerate(payloads):
+                line = (json.dumps(payload) + "\n").encode("utf-8")
+                self.offsets[start + i] = pos
+                f.write(line)
+                pos += len(line)
+
+        # The header is the commit point: rows past `count` are ignored on open
+        self.count += n
+        self._write_header()
+        return range(start, self.count)
+
+    def payload(self, row: int) -> dict:
+        with open(self.path / "records.jsonl", "rb") as f:
+            f.seek(int(self.offsets[row]))
+            return json.loads(f.readline())
+
+    def flush(self):
+        for m in (self.vectors, self.offsets):
+            if m is not None:
+                m.flush()
+
+    # ---------- search ----------
+
+    def search(self, queries: np.ndarray, k: int,
+               nprobe: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Batched top-k cosine search for a (q, dim) array of queries.
+
+        Returns (scores, rows), both (q, k), best first; slots beyond the
+        number of rows hold -inf / -1.
+        """
+        queries = normalize_rows(queries)
+        q = len(queries)
+        best_scores = np.full((q, k), -np.inf, dtype=np.float32)
+        best_rows = np.full((q, k), -1, dtype=np.int64)
+        count, ivf = self.count, self.ivf
+        if count == 0:
+            return best_scores, best_rows
+
+        if ivf is not None and nprobe:
+            return self._search_ivf(ivf, count, queries, k, nprobe, best_scores, best_rows)
+
+        for start in range(0, count, SCAN_CHUNK_ROWS):
+            stop = min(start + SCAN_CHUNK_ROWS, count)
+            scores = queries @ self.vectors[start:stop].T
+            rows = np.broadcast_to(np.arange(start, stop, dtype=np.int64), scores.shape)
+            best_scores, best_rows = _top_k(
+                np.hstack([best_scores, scores]), np.hstack([best_rows, rows]), k
+            )
+        return best_scores, best_rows
+
+    def _search_ivf(self, ivf: IVFLists, count, queries, k, nprobe, best_scores, best_rows):
+        nprobe = min(nprobe, len(ivf.centroids))
+        probes = np.argpartition(-(queries @ ivf.centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+        tail = np.arange(ivf.trained_count, count, dtype=np.int64)
+
+        for i, lists in enumerate(probes):
+            rows = np.concatenate(
+                [ivf.order[ivf.bounds[list_id]:ivf.bounds[list_id + 1]] for list_id in lists]
+                + [tail]
+            )
+            if len(rows) == 0:
+                continue
+            rows.sort()  # sequential page access on the memmap
+            scores = (self.vectors[rows] @ queries[i])[None, :]
+            s, r = _top_k(
+                np.hstack([best_scores[i:i + 1], scores]),
+                np.hstack([best_rows[i:i + 1], rows[None, :]]),
+                k,
+            )
+            best_scores[i], best_rows[i] = s[0], r[0]
+        return best_scores, best_rows
+
+    # ---------- IVF ----------
+
+    def _ivf_file(self, kind: str, generation: int) -> Path:
+        return self.path / f"ivf_{kind}.{generation}.npy"
+
+    def _save(self, file: Path, array: np.ndarray):
+        tmp = file.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp, file)
+
+    def _load_ivf(self, generation: int, trained_count: int) -> IVFLists:
+        return IVFLists(
+            centroids=np.load(self._ivf_file("centroids", generation)),
+            order=np.load(self._ivf_file("order", generation), mmap_mode="r"),
+            bounds=np.load(self._ivf_file("bounds", generation)),
+            trained_count=trained_count,
+        )
+
+    @property
+    def trained_count(self) -> int:
+        return self.ivf.trained_count if self.ivf is not None else 0
+
+    @property
+    def untrained_rows(self) -> int:
+        return self.count - self.trained_count
+
+    def train_ivf(self, nlist: int, iterations: int = 10,
+                  sample_size: int = 100_000, seed: int = 0):
+        """
+        Spherical k-means on a sample, then assigns every row to its
+        nearest centroid and stores the rows grouped by list.
+
+        The lists go to new files; the header switches to them and only
+        then are the previous ones removed, so searches on the old
+        mapping keep working and a crash leaves one complete training.
+        """
+        count = self.count
+        if count < nlist:
+            raise ValueError(f"Need at least {nlist} rows to train {nlist} lists")
+
+        rng = np.random.default_rng(seed)
+        sample_rows = np.sort(rng.choice(count, min(sample_size, count), replace=False))
+        sample = np.asarray(self.vectors[sample_rows])
+
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[labels == c]
+                if len(members):
+                    centroids[c] = members.sum(axis=0)
+                else:
+                    # Re-seed empty lists from a random sample point
+                    centroids[c] = sample[rng.integers(len(sample))]
+            centroids = normalize_rows(centroids)
+
+        labels = np.empty(count, dtype=np.int32)
+        for start in range(0, count, SCAN_CHUNK_ROWS):
+            stop = min(start + SCAN_CHUNK_ROWS, count)
+            labels[start:stop] = np.argmax(self.vectors[start:stop] @ centroids.T, axis=1)
+
+        order = np.argsort(labels, kind="stable").astype(np.int64)
+        bounds = np.searchsorted(labels[order], np.arange(nlist + 1))
+
+        previous, generation = self.ivf_generation, self.ivf_generation + 1
+        for kind, array in (("centroids", centroids), ("order", order), ("bounds", bounds)):
+            self._save(self._ivf_file(kind, generation), array)
+        # The header is the commit point for the new lists too
+        self._write_header(ivf_generation=generation, trained_count=count)
+
+        self.ivf = self._load_ivf(generation, count)
+        self.ivf_generation = generation
+        self._advise()
+        if previous:
+            # An open mapping of the old order file stays valid after unlink
+            for kind in ("centroids", "order", "bounds"):
+                self._ivf_file(kind, previous).unlink(missing_ok=True)
@@ -0,0 +1,226 @@
+import asyncio
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from app.core.config import settings
+
+TERMINAL = ("succeeded", "failed", "cancelled")
+
+
+class JobBackend(ABC):
+    """
+    Job queue + job state + per-job progress events.
+
+    A job is a flat JSON-able dict (id, status, stage, progress, result,
+    error, timestamps…). Events are numbered from 1 per job, so a client
+    can resume a progress subscription after the last number it saw.
+    """
+    name = "base"
+
+    @abstractmethod
+    async def enqueue(self, job: dict, payload: dict) -> bool:
+        """Stores `job` and queues it; False if the queue is full."""
+
+    @abstractmethod
+    async def dequeue(self, timeout: float) -> tuple[str, dict] | None:
+        """Next (job id, payload), or None after `timeout` seconds."""
+
+    @abstractmethod
+    async def get(self, job_id: str) -> dict | None: ...
+
+    @abstractmethod
+    async def update(self, job_id: str, **fields): ...
+
+    @abstractmethod
+    async def append_event(self, job_id: str, event: dict) -> int:
+        """Adds a progress event; returns its number."""
+
+    @abstractmethod
+    async def events(self, job_id: str, after: int, timeout: float) -> list[tuple[int, dict]]:
+        """Events numbered above `after`; waits up to `timeout` for one."""
+
+    @abstractmethod
+    async def queue_depth(self) -> int: ...
+
+    async def close(self):
+        pass
+
+
+class InMemoryJobBackend(JobBackend):
+    """
+    Single-process queue: jobs only run in the worker that accepted them.
+    Finished jobs are dropped `ttl` seconds after they end.
+    """
+    name = "memory"
+
+    def __init__(self, max_queue: int | None = None, ttl: float | None = None):
+        self.queue: asyncio.Queue = asyncio.Queue(max_queue or settings.JOBS_QUEUE_SIZE)
+        self.ttl = ttl or settings.JOBS_TTL_SECONDS
+        self.jobs: OrderedDict[str, dict] = OrderedDict()
+        self.history: dict[str, list[dict]] = {}
+        self.changed = asyncio.Condition()
+
+    def _prune(self):
+        now = time.time()
+        for job_id in [
+            job_id for job_id, job in self.jobs.items()
+            if job["status"] in TERMINAL and now - job["finished_at"] > self.ttl
+        ]:
+            del self.jobs[job_id]
+            self.history.pop(job_id, None)
+
+    async def enqueue(self, job, payload):
+        self._prune()
+        try:
+            self.queue.put_nowait((job["id"], payload))
+        except asyncio.QueueFull:
+            return False
+        self.jobs[job["id"]] = dict(job)
+        self.history[job["id"]] = []
+        return True
+
+    async def dequeue(self, timeout):
+        # wait_for(get()) can drop a job dequeued as the timeout fires;
+        # a cancelled get leaves it on the queue for the next call
+        getter = asyncio.ensure_future(self.queue.get())
+        try:
+            done, _ = await asyncio.wait({getter}, timeout=timeout)
+        except asyncio.CancelledError:
+            getter.cancel()
+            raise
+        if getter not in done:
+            getter.cancel()
+            return None
+        return getter.result()
+
+    async def get(self, job_id):
+        job = self.jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+    async def update(self, job_id, **fields):
+        if job_id in self.jobs:
+            self.jobs[job_id].update(fields)
+
+    async def append_event(self, job_id, event):
+        history = self.history.setdefault(job_id, [])
+        history.append(event)
+        async with self.changed:
+            self.changed.notify_all()
+        return len(history)
+
+    async def events(self, job_id, after, timeout):
+        def ready():
+            return len(self.history.get(job_id, ())) > after
+
+        if not ready():
+            async with self.changed:
+                try:
+                    await asyncio.wait_for(self.changed.wait_for(ready), timeout)
+                except asyncio.TimeoutError:
+                    return []
+        history = self.history.get(job_id, [])
+        return list(enumerate(history[after:], after + 1))
+
+    async def queue_depth(self):
+        return self.queue.qsize()
+
+
+class RedisJobBackend(JobBackend):
+    """
+    Queue and state in Redis (or anything speaking its protocol), so every
+    app process runs workers against one shared queue and any of them can
+    answer a poll or an event subscription.
+
+    - queue: a list (LPUSH / BRPOP)
+    - job:   a hash, one JSON-encoded value per field (atomic field updates)
+    - events: a stream with ids 0-<n>, read with blocking XREAD
+    """
+    name = "redis"
+
+    def __init__(self, url: str, prefix: str = "kafei:jobs:",
+                 max_queue: int | None = None, ttl: float | None = None):
+        import redis.asyncio as redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.max_queue = max_queue or settings.JOBS_QUEUE_SIZE
+        self.ttl = int(ttl or settings.JOBS_TTL_SECONDS)
+
+    def _job(self, job_id):
+        return f"{self.prefix}job:{job_id}"
+
+    def _events(self, job_id):
+        return f"{self.prefix}events:{job_id}"
+
+    async def enqueue(self, job, payload):
+        queue = self.prefix + "queue"
+        # Soft bound: concurrent submits can overshoot it by a few
+        if await self.client.llen(queue) >= self.max_queue:
+            return False
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(self._job(job["id"]), mapping={k: json.dumps(v) for k, v in job.items()})
+            pipe.hset(self._job(job["id"]), "events", 0)
+            pipe.expire(self._job(job["id"]), self.ttl)
+            pipe.lpush(queue, json.dumps([job["id"], payload]))
+            await pipe.execute()
+        return True
+
+    async def dequeue(self, timeout):
+        item = await self.client.brpop([self.prefix + "queue"], timeout=max(1, int(timeout)))
+        if item is None:
+            return None
+        job_id, payload = json.loads(item[1])
+        return job_id, payload
+
+    async def get(self, job_id):
+        data = await self.client.hgetall(self._job(job_id))
+        if not data:
+            return None
+        return {
+            key.decode(): json.loads(value)
+            for key, value in data.items() if key != b"events"
+        }
+
+    async def update(self, job_id, **fields):
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(self._job(job_id), mapping={k: json.dumps(v) for k, v in fields.items()})
+            pipe.expire(self._job(job_id), self.ttl)
+            await pipe.execute()
+
+    async def append_event(self, job_id, event):
+        # Only the worker running a job appends to it, so ids stay ordered
+        n = await self.client.hincrby(self._job(job_id), "events", 1)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.xadd(self._events(job_id), {"data": json.dumps(event)}, id=f"0-{n}")
+            pipe.expire(self._events(job_id), self.ttl)
+            await pipe.execute()
+        return n
+
+    async def events(self, job_id, after, timeout):
+        reply = await self.client.xread(
+            {self._events(job_id): f"0-{after}"}, block=int(timeout * 1000)
+        )
+        if not reply:
+            return []
+        _, entries = reply[0]
+        return [
+            (int(entry_id.split(b"-")[1]), json.loads(fields[b"data"]))
+            for entry_id, fields in entries
+        ]
+
+    async def queue_depth(self):
+        return await self.client.llen(self.prefix + "queue")
+
+    async def close(self):
+        await self.client.aclose()
+
+
+def build_job_backend(name: str | None = None) -> JobBackend:
+    name = name or settings.JOBS_BACKEND
+    if name == "memory":
+        return InMemoryJobBackend()
+    if name == "redis":
+        return RedisJobBackend(settings.JOBS_REDIS_URL)
+    raise ValueError(f"Unknown job backend: {name}")
@@ -0,0 +1,231 @@
+import asyncio
+import time
+import uuid
+
+from app.core.config import settings
+from app.jobs.backends import TERMINAL, JobBackend, build_job_backend
+from app.schemas.generate import GenerateRequest
+from app.services.design_store import GenerationNotFound
+from app.services.llm.rate_limit import RateLimitExceeded
+
+# Stages reported by GenerationService.generate_architecture, in order
+STAGES = ("normalize", "system_design", "component_tree", "package")
+
+
+class JobQueueFull(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__("Generation queue is full, retry later")
+        self.retry_after = retry_after
+
+
+class JobNotFound(LookupError):
+    pass
+
+
+class JobCancelled(Exception):
+    """
+    Raised at a stage boundary when the job was cancelled from another
+    process; unlike CancelledError the task itself was never cancelled.
+    """
+
+
+class JobManager:
+    """
+    Runs `generate_architecture` as background jobs on a bounded pool of
+    asyncio workers, instead of holding an HTTP request open for it.
+
+    Submit returns a job id at once; the job's state (status, stage,
+    progress, result or error) can be polled, and its progress events
+    followed over SSE. Every app process runs `workers` workers against
+    the backend's queue (shared across processes with the Redis backend).
+    """
+
+    def __init__(self, service, backend: JobBackend | None = None, workers: int | None = None):
+        self.service = service
+        self.backend = backend or build_job_backend()
+        self.workers = workers or settings.JOBS_WORKERS
+        self._workers: list[asyncio.Task] = []
+        self.running: dict[str, asyncio.Task] = {}
+        self.counters = {
+            "submitted": 0,
+            "rejected": 0,
+            "started": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "queue_seconds": 0.0,
+            "run_seconds": 0.0,
+        }
+
+    async def start(self):
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"job-worker-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def stop(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        # Jobs cut short by the shutdown are marked as such, not left "running"
+        running = dict(self.running)
+        await asyncio.gather(*running.values(), return_exceptions=True)
+        for job_id, task in running.items():
+            if task.cancelled():
+                await self._cancelled(job_id)
+        await self.backend.close()
+
+    async def submit(self, payload: GenerateRequest) -> dict:
+        now = time.time()
+        job = {
+            "id": uuid.uuid4().hex,
+            "status": "queued",
+            "stage": None,
+            "progress": 0.0,
+            "created_at": now,
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+            "cancel_requested": False,
+        }
+        if not await self.backend.enqueue(job, payload.dict()):
+            self.counters["rejected"] += 1
+            raise JobQueueFull(retry_after=self._retry_after(await self.backend.queue_depth()))
+        self.counters["submitted"] += 1
+        return job
+
+    async def get(self, job_id: str) -> dict:
+        job = await self.backend.get(job_id)
+        if job is None:
+            raise JobNotFound(job_id)
+        return job
+
+    async def cancel(self, job_id: str) -> dict:
+        """
+        A queued job is skipped when dequeued; a running one is cancelled
+        here, or at its next stage if another process is running it.
+        """
+        job = await self.get(job_id)
+        if job["status"] in TERMINAL:
+            return job
+        await self.backend.update(job_id, cancel_requested=True)
+        task = self.running.get(job_id)
+        if task is not None:
+            task.cancel()
+        elif job["status"] == "queued":
+            await self._finish(job_id, "cancelled", event={"type": "cancelled"})
+        return await self.get(job_id)
+
+    async def _worker(self):
+        while True:
+            item = await self.backend.dequeue(timeout=5)
+            if item is None:
+                continue
+            job_id, payload = item
+            task = asyncio.create_task(self._run(job_id, payload))
+            self.running[job_id] = task
+            try:
+                await asyncio.wait({task})
+            except asyncio.CancelledError:
+                task.cancel()
+                raise
+            finally:
+                if task.done():
+                    self.running.pop(job_id, None)
+            if task.cancelled():
+                # Cancelled before its first step: _run's handler never ran
+                await self._cancelled(job_id)
+
+    async def _run(self, job_id: str, payload: dict):
+        started = None
+
+        async def progress(stage):
+            # Cancellation requested from another process lands here
+            current = await self.backend.get(job_id)
+            if current is not None and current.get("cancel_requested"):
+                raise JobCancelled(job_id)
+            fraction = round(STAGES.index(stage) / len(STAGES), 2) if stage in STAGES else None
+            await self.backend.update(job_id, stage=stage, progress=fraction)
+            await self.backend.append_event(
+                job_id, {"type": "progress", "stage": stage, "progress": fraction}
+            )
+
+        # Everything after dequeue is inside the try: a cancel landing on
+        # any await must still leave the job in a terminal state
+        try:
+            job = await self.backend.get(job_id)
+            if job is None or job["status"] != "queued" or job["cancel_requested"]:
+                return  # expired, or cancelled while queued
+
+            started = time.time()
+            self.counters["started"] += 1
+            self.counters["queue_seconds"] += started - job["created_at"]
+            await self.backend.update(job_id, status="running", started_at=started)
+            await self.backend.append_event(job_id, {"type": "status", "status": "running"})
+
+            result = await self.service.generate_architecture(
+                GenerateRequest(**payload), progress=progress
+            )
+        except (asyncio.CancelledError, JobCancelled):
+            await self._cancelled(job_id, started)
+        except Exception as e:
+            error = {"exception": type(e).__name__, "detail": str(e), "status_code": 500}
+            if isinstance(e, GenerationNotFound):
+                error["status_code"] = 404
+            elif isinstance(e, RateLimitExceeded):
+                error["status_code"] = 429
+                error["retry_after"] = max(1, int(e.retry_after))
+            print(f"⚠️ Generation job {job_id} failed: {e}")
+            await self._finish(job_id, "failed", started, error=error,
+                               event={"type": "error", **error})
+        else:
+            await self._finish(job_id, "succeeded", started, result=result, progress=1.0,
+                               event={"type": "done", "result": result})
+
+    async def _cancelled(self, job_id: str, started: float | None = None):
+        """
+        Marks a cancelled job as such, unless it already reached a terminal
+        state; with no cancel request, the server shutdown cut it short.
+        """
+        current = await self.backend.get(job_id)
+        if current is None or current["status"] in TERMINAL:
+            return
+        if current.get("cancel_requested"):
+            await self._finish(job_id, "cancelled", started, event={"type": "cancelled"})
+        else:
+            error = {"detail": "Interrupted by server shutdown"}
+            await self._finish(job_id, "cancelled", started, error=error,
+                               event={"type": "cancelled", **error})
+
+    async def _finish(self, job_id: str, status: str, started: float | None = None,
+                      event: dict | None = None, **fields):
+        now = time.time()
+        self.counters[status] += 1
+        if started is not None:
+            self.counters["run_seconds"] += now - started
+        await self.backend.update(job_id, status=status, finished_at=now, **fields)
+        if event is not None:
+            await self.backend.append_event(job_id, event)
+
+    def _average_run(self) -> float | None:
+        ran = self.counters["started"] - len(self.running)
+        return self.counters["run_seconds"] / ran if ran > 0 else None
+
+    def _retry_after(self, depth: int) -> float:
+        # Roughly how long the queued jobs take to drain across the pool
+        average = self._average_run() or 30.0
+        return max(1.0, average * depth / self.workers)
+
+    async def stats(self) -> dict:
+        c = self.counters
+        average_run = self._average_run()
+        return {
+            "backend": self.backend.name,
+            "workers": self.workers,
+            "queued": await self.backend.queue_depth(),
+            "running": len(self.running),
+            **{k: v for k, v in c.items() if not k.endswith("_seconds")},
+            "avg_queue_seconds": round(c["queue_seconds"] / c["started"], 3) if c["started"] else None,
+            "avg_run_seconds": round(average_run, 3) if average_run is not None else None,
+        }
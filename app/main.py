@@ -1,35 +1,62 @@
 # main.py
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 from app.db.database import init_db
 from app.routes.generate import router as generate_router
-from app.services.generation_service import GenerationService 
+from app.services.generation_service import GenerationService
+from app.services.chat_service import ChatService
+from app.services.intent_classifier import get_intent_classifier
+from app.services.llm.orchestrator import LLMOrchestrator
+from app.services.llm.registry import ProviderRegistry
+from app.services.llm.rate_limit import RateLimitExceeded
 from app.routes.auth import router as auth_router
 from app.routes.users import router as users_router
 from app.core.docs import scalar_docs
 from app.routes.chat import router as chat_router
 from app.routes.oauth import router as oauth_router
+from app.routes.stats import router as stats_router
+from app.routes.artifacts import router as artifacts_router
+from app.routes.jobs import router as jobs_router
+from app.routes.streams import router as streams_router
+from app.streams.resumable import ResumableStreams
+from app.jobs.manager import JobManager
 from starlette.middleware.sessions import SessionMiddleware
 from app.core.config import settings
-# Assuming GenerationService is still imported and contains the LLMProvider
-
-# Global variable to hold the initialized service instance
-global_generation_service: GenerationService | None = None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global global_generation_service
-
     print("Starting up resources...")
     init_db()
 
-    global_generation_service = GenerationService()
+    # One provider registry per worker → shared clients & connection pools
+    registry = ProviderRegistry()
+    await registry.warmup()
+    # Train the intent classifier now rather than on the first chat message
+    get_intent_classifier()
+
+    generation_service = GenerationService(LLMOrchestrator(registry))
+
+    app.state.llm_registry = registry
+    app.state.generation_service = generation_service
+    app.state.chat_service = ChatService(generation_service)
+
+    # Background generation workers (POST /jobs/generate)
+    job_manager = JobManager(generation_service)
+    await job_manager.start()
+    app.state.job_manager = job_manager
+
+    # Replay buffers for reconnecting SSE clients
+    streams = ResumableStreams() if settings.SSE_RESUMABLE else None
+    app.state.streams = streams
 
     yield
 
     print("Initiating graceful shutdown...")
-    if global_generation_service:
-        await global_generation_service.shutdown()
+    if streams is not None:
+        await streams.shutdown()
+    await job_manager.stop()
+    await generation_service.shutdown()
     print("Shutdown complete.")
 
 #  hello world
@@ -40,7 +67,16 @@ app.add_middleware(
     SessionMiddleware,
     secret_key=settings.SECRET_KEY or "dev-secret-key",
 )
-# ... (include router logic, potentially updating it to use the global_generation_service)
+
+@app.exception_handler(RateLimitExceeded)
+async def rate_limit_exceeded(request: Request, exc: RateLimitExceeded):
+    # Provider quota exhausted → tell the client to back off instead of a 500
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(1, int(exc.retry_after)))},
+    )
+
 @app.get("/docs", include_in_schema=False)
 def docs():
     return scalar_docs()
@@ -49,4 +85,8 @@ app.include_router(generate_router, prefix="/generate")
 app.include_router(auth_router)
 app.include_router(users_router)
 app.include_router(chat_router)
-app.include_router(oauth_router)
\ No newline at end of file
+app.include_router(oauth_router)
+app.include_router(stats_router)
+app.include_router(artifacts_router)
+app.include_router(jobs_router)
+app.include_router(streams_router)
@@ -0,0 +1,20 @@
+from typing import Any, Dict, List
+from datetime import datetime
+
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import Column, JSON
+from sqlmodel import Field, SQLModel
+
+from app.core.config import settings
+
+class GenerationEmbedding(SQLModel, table=True):
+    __tablename__ = "generation_embeddings"
+
+    id: str = Field(primary_key=True)
+
+    text: str
+    embedder: str                      # gemini | hashing — never mix spaces
+    embedding: List[float] = Field(sa_column=Column(Vector(settings.EMBEDDING_DIM)))
+    record: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON))
+
+    created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -0,0 +1,90 @@
+import re
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+from app.dependencies.llm import get_generation_service
+from app.services.generation_service import GenerationService
+
+router = APIRouter(prefix="/artifacts", tags=["Artifacts"])
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """
+    [start, end) for a single-range `Range` header; None means "send it
+    all" (no header, or several ranges). Raises 416 if unsatisfiable.
+    """
+    if not header:
+        return None
+    match = _RANGE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last) + 1, size) if last else size
+    elif last:
+        start, end = max(size - int(last), 0), size
+    else:
+        return None
+    if start >= size or start >= end:
+        raise HTTPException(
+            status_code=416, headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, end
+
+
+@router.get("/download/{key}")
+def download_artifact(
+    key: str,
+    request: Request,
+    name: str | None = None,
+    service: GenerationService = Depends(get_generation_service),
+):
+    """
+    A stored artifact by content hash, with Range and ETag support.
+    """
+    store = service.artifacts
+    size = store.get(key)
+    if size is None:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+
+    filename = re.sub(r"[^A-Za-z0-9._-]+", "-", name or f"{key[:12]}.zip")
+    etag = f'"{key}"'  # content-addressed → a strong validator for free
+    headers = {
+        "ETag": etag,
+        # The same URL can never change content
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "Accept-Ranges": "bytes",
+    }
+
+    match = request.headers.get("if-none-match")
+    if match and (match.strip() == "*" or etag in [m.strip() for m in match.split(",")]):
+        return Response(status_code=304, headers=headers)
+
+    # 🚀 Local blob → FileResponse (Range handling + sendfile/pathsend)
+    path = store.backend.local_path(key)
+    if path is not None:
+        return FileResponse(
+            path, media_type="application/zip", filename=filename, headers=headers
+        )
+
+    # Remote backend → stream the (ranged) object through
+    headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    byte_range = parse_range(request.headers.get("range"), size)
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(
+            store.backend.read(key), media_type="application/zip", headers=headers
+        )
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end - 1}/{size}"
+    headers["Content-Length"] = str(end - start)
+    return StreamingResponse(
+        store.backend.read(key, start, end),
+        status_code=206,
+        media_type="application/zip",
+        headers=headers,
+    )
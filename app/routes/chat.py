@@ -1,17 +1,34 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Header, Request
+from app.dependencies.llm import get_chat_service, get_resumable_streams
 from app.services.chat_service import ChatService
 from app.schemas.generate import GenerateRequest
-from app.services.generation_service import GenerationService
-from fastapi.responses import StreamingResponse
-import json
+from app.routes.streams import resume_stream, start_stream
+from app.streams.resumable import ResumableStreams
+from app.utils.sse import SSEEncoder
+import time
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
-chat_service = ChatService()
-generation_service = GenerationService()
 
 @router.post("/")
-async def chat(payload: dict):
-    result = await chat_service.chat(payload["message"])
+async def chat(
+    payload: dict,
+    request: Request,
+    chat_service: ChatService = Depends(get_chat_service),
+    streams: ResumableStreams | None = Depends(get_resumable_streams),
+    last_event_id: str | None = Header(None, alias="Last-Event-ID"),
+):
+    # 🔁 Reconnect to a generate stream → only the missed frames
+    resumed = await resume_stream(request, streams, last_event_id)
+    if resumed is not None:
+        return resumed
+
+    generation_service = chat_service.generator
+    started = time.monotonic()
+    result = await chat_service.chat(
+        payload["message"],
+        fused=payload.get("fused"),
+        speculative=payload.get("speculative"),
+    )
 
     # 🟢 Normal chat
     if result["mode"] == "chat":
@@ -30,48 +47,120 @@ async def chat(payload: dict):
 
     # 🔵 Generate → STREAM
     async def event_generator():
-        # 1️⃣ Handoff message (human)
-        yield f"data: {json.dumps({
-            'type': 'handoff',
-            'message': result.get(
-                'handoff',
-                "Alright — I will put together a system design for this."
+        # Resumable frames are numbered by the replay buffer
+        sse = SSEEncoder(event_ids=False) if streams is not None else SSEEncoder()
+
+        try:
+            # 1️⃣ Handoff message (human)
+            yield sse.event({
+                'type': 'handoff',
+                'message': result.get(
+                    'handoff',
+                    "Alright — I will put together a system design for this."
+                )
+            })
+
+            # 2️⃣ Normalize input (already done when analysis was fused
+            #    or when a speculative expansion is running)
+            speculation = result.get("speculation")
+            spec = result.get("spec")
+            if speculation is not None:
+                try:
+                    spec = await speculation.spec()
+                except Exception:
+                    speculation = None
+            if spec is None:
+                spec = await generation_service.normalizer.normalize(
+                    GenerateRequest(prompt=result["payload"]["prompt"])
+                )
+
+            yield sse.event({
+                'type': 'input_spec',
+                'chunk': spec.dict()
+            })
+
+            # 3️⃣ Similar past generation? (a speculation looked it up already)
+            if speculation is not None:
+                recall = speculation.recall
+            else:
+                recall = await generation_service.recall(generation_service.describe(spec), spec)
+            if recall is not None:
+                yield sse.event({
+                    'type': 'similar_generation',
+                    'mode': recall.mode,
+                    'similarity': round(recall.similarity, 4)
+                })
+
+            # 4️⃣ Stream system design (coalesced frames); in pipelined mode
+            #    the tree starts once the components part of the design is in
+            full_design = []
+            pipeline = None
+            if recall is None or recall.mode != "reuse":
+                pipeline = generation_service.tree_pipeline()
+
+            async def design_tokens():
+                if speculation is not None:
+                    stream = speculation.stream()
+                else:
+                    stream = generation_service.design_stream(spec.description, recall)
+
+                async for token in stream:
+                    if not full_design:
+                        chat_service.record_first_design_token(
+                            result["analysis_mode"], time.monotonic() - started
+                        )
+                    full_design.append(token)
+                    if pipeline is not None:
+                        pipeline.feed(token)
+                    yield token
+
+            # An early tree call must not outlive the client (design or tree phase)
+            try:
+                async for frame in sse.tokens('system_design', design_tokens()):
+                    yield frame
+
+                # 5️⃣ Component tree (streamed node by node, then the full tree)
+                system_design = "".join(full_design)
+                if recall is not None and recall.mode == "reuse":
+                    component_tree = recall.record.get("component_tree")
+                else:
+                    component_tree = None
+                    async for kind, value in generation_service.component_tree_events(
+                        system_design, pipeline
+                    ):
+                        if kind == "node":
+                            yield sse.event({
+                                'type': 'component_tree_node',
+                                'chunk': value
+                            })
+                        else:
+                            component_tree = generation_service.normalize_tree(value)
+                    await generation_service.remember(
+                        generation_service.describe(spec), system_design, component_tree, spec
+                    )
+            finally:
+                if pipeline is not None:
+                    pipeline.cancel()
+
+            yield sse.event({
+                'type': 'component_tree',
+                'chunk': component_tree
+            })
+
+            # 6️⃣ Keep it for incremental regeneration, as /generate/stream does
+            generation_id = generation_service.store(
+                spec, system_design, component_tree, time.monotonic() - started
             )
-        })}\n\n"
-
-        # 2️⃣ Normalize input
-        spec = await generation_service.normalizer.normalize(
-            GenerateRequest(prompt=result["payload"]["prompt"])
-        )
-
-        yield f"data: {json.dumps({
-            'type': 'input_spec',
-            'chunk': spec.dict()
-        })}\n\n"
-
-        # 3️⃣ Stream system design
-        full_design = []
-        async for token in generation_service.llm.stream_system_design(
-            spec.description
-        ):
-            full_design.append(token)
-            yield f"data: {json.dumps({
-                'type': 'system_design',
-                'chunk': token
-            })}\n\n"
-
-        # 4️⃣ Component tree
-        system_design = "".join(full_design)
-        component_tree = await generation_service.generate_component_tree_from_design(system_design)
-
-        yield f"data: {json.dumps({
-            'type': 'component_tree',
-            'chunk': component_tree
-        })}\n\n"
-
-        yield f"data: {json.dumps({'type': 'done'})}\n\n"
-
-    return StreamingResponse(
-        event_generator(),
-        media_type="text/event-stream"
-    )
+
+            yield sse.event({
+                'type': 'done',
+                'generation_id': generation_id
+            })
+        finally:
+            # Client gone before the end: stop the speculative expansion and
+            # design stream instead of buffering every token for nobody
+            pending = result.get("speculation")
+            if pending is not None and not pending.task.done():
+                await pending.cancel()
+
+    return await start_stream(request, streams, event_generator())
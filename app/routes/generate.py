@@ -1,65 +1,176 @@
-from fastapi import APIRouter, HTTPException
-from app.schemas.generate import GenerateRequest, GenerateResponse
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from app.dependencies.llm import get_generation_service, get_resumable_streams
+from app.schemas.generate import GenerateRequest, GenerateResponse, SubtreeRequest
+from app.services.design_store import GenerationNotFound
 from app.services.generation_service import GenerationService
+from app.services.llm.rate_limit import RateLimitExceeded
+from app.services.zip_builder import iter_scaffold_zip, project_root
+from app.routes.streams import resume_stream, start_stream
+from app.streams.resumable import ResumableStreams
+from app.utils.sse import SSEEncoder
 from fastapi.responses import StreamingResponse
-import json
+import time
 
 router = APIRouter()
-service = GenerationService()
 
 @router.post("/", response_model=GenerateResponse)
-async def generate_architecture(payload: GenerateRequest):
+async def generate_architecture(
+    payload: GenerateRequest,
+    service: GenerationService = Depends(get_generation_service),
+):
+    """
+    Full generation, or an incremental one with `previous_generation_id`.
+    Stored generations live in this process's memory (DesignStore): an id
+    from before a restart, or from another worker, answers 404.
+    """
     try:
         result = await service.generate_architecture(payload)
         return result
+    except GenerationNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except RateLimitExceeded as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(max(1, int(e.retry_after)))},
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/{generation_id}/subtree")
+async def regenerate_subtree(
+    generation_id: str,
+    payload: SubtreeRequest,
+    service: GenerationService = Depends(get_generation_service),
+):
+    """
+    Regenerates one folder of a stored generation's component tree.
+    """
+    try:
+        return await service.regenerate_subtree(
+            generation_id, payload.path, payload.instructions
+        )
+    except (GenerationNotFound, KeyError) as e:
+        raise HTTPException(status_code=404, detail=str(e).strip("'\""))
+    except RateLimitExceeded as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(max(1, int(e.retry_after)))},
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{generation_id}/zip")
+def download_scaffold(
+    generation_id: str,
+    service: GenerationService = Depends(get_generation_service),
+):
+    """
+    The scaffold as a zip, compressed and streamed as it is written.
+    """
+    try:
+        result = service.scaffold(generation_id)
+    except GenerationNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    # A sync iterator: Starlette runs the compression in its threadpool
+    return StreamingResponse(
+        iter_scaffold_zip(result),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f'attachment; filename="{project_root(result)}.zip"'
+        },
+    )
+
 @router.post("/stream")
-async def generate_architecture_stream(payload: GenerateRequest):
+async def generate_architecture_stream(
+    payload: GenerateRequest,
+    request: Request,
+    service: GenerationService = Depends(get_generation_service),
+    streams: ResumableStreams | None = Depends(get_resumable_streams),
+    last_event_id: str | None = Header(None, alias="Last-Event-ID"),
+):
+    # 🔁 Reconnect → only the missed frames; the generation kept running
+    resumed = await resume_stream(request, streams, last_event_id)
+    if resumed is not None:
+        return resumed
+
     async def event_generator():
+        # Resumable frames are numbered by the replay buffer
+        sse = SSEEncoder(event_ids=False) if streams is not None else SSEEncoder()
+        started = time.monotonic()
         full_system_design = []
 
         # 1️⃣ NORMALIZE ONCE
         spec = await service.normalizer.normalize(payload)
 
         # 2️⃣ SEND INPUT SPEC FIRST
-        yield f"data: {json.dumps({
+        yield sse.event({
             'type': 'input_spec',
             'chunk': spec.dict()
-        })}\n\n"
-
-        # 3️⃣ BUILD PROMPT TEXT
-        payload_text = f"""
-        Project Name: {spec.project_name}
-        Description: {spec.description}
-        Use Case: {spec.use_case}
-        Requirements: {spec.requirements}
-        Tech Stack: {spec.tech_stack}
-        """
-
-        # 4️⃣ STREAM SYSTEM DESIGN
-        async for token in service.llm.stream_system_design(payload_text):
-            full_system_design.append(token)
-            yield f"data: {json.dumps({
-                'type': 'system_design',
-                'chunk': token
-            })}\n\n"
-
-        # 5️⃣ COMPONENT TREE (non-streamed)
-        system_design = "".join(full_system_design)
-        component_tree = await service.generate_component_tree_from_design(system_design)
-
-        yield f"data: {json.dumps({
+        })
+
+        # 3️⃣ BUILD PROMPT TEXT + LOOK FOR A SIMILAR PAST GENERATION
+        payload_text = service.describe(spec)
+        recall = await service.recall(payload_text, spec)
+        if recall is not None:
+            yield sse.event({
+                'type': 'similar_generation',
+                'mode': recall.mode,
+                'similarity': round(recall.similarity, 4)
+            })
+
+        # The tree may start mid-design (pipelined mode); never for a reuse
+        pipeline = None
+        if recall is None or recall.mode != "reuse":
+            pipeline = service.tree_pipeline()
+
+        async def design_tokens():
+            async for token in service.design_stream(payload_text, recall):
+                full_system_design.append(token)
+                if pipeline is not None:
+                    pipeline.feed(token)
+                yield token
+
+        # 4️⃣ STREAM SYSTEM DESIGN (coalesced frames)
+        # An early tree call must not outlive the client (design or tree phase)
+        try:
+            async for frame in sse.tokens('system_design', design_tokens()):
+                yield frame
+
+            # 5️⃣ COMPONENT TREE (streamed node by node, then the full tree)
+            system_design = "".join(full_system_design)
+            if recall is not None and recall.mode == "reuse":
+                component_tree = recall.record.get("component_tree")
+            else:
+                component_tree = None
+                async for kind, value in service.component_tree_events(system_design, pipeline):
+                    if kind == "node":
+                        yield sse.event({
+                            'type': 'component_tree_node',
+                            'chunk': value
+                        })
+                    else:
+                        component_tree = service.normalize_tree(value)
+                await service.remember(payload_text, system_design, component_tree, spec)
+        finally:
+            if pipeline is not None:
+                pipeline.cancel()
+
+        yield sse.event({
             'type': 'component_tree',
             'chunk': component_tree
-        })}\n\n"
+        })
 
-        yield f"data: {json.dumps({
-            'type': 'done'
-        })}\n\n"
+        # 6️⃣ KEEP IT FOR INCREMENTAL REGENERATION (POST / with previous_generation_id)
+        generation_id = service.store(
+            spec, system_design, component_tree, time.monotonic() - started
+        )
 
-    return StreamingResponse(
-        event_generator(),
-        media_type="text/event-stream"
-    )
+        yield sse.event({
+            'type': 'done',
+            'generation_id': generation_id
+        })
+
+    return await start_stream(request, streams, event_generator())
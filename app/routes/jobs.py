@@ -0,0 +1,92 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import StreamingResponse
+
+from app.dependencies.llm import get_job_manager
+from app.jobs.backends import TERMINAL
+from app.jobs.manager import JobManager, JobNotFound, JobQueueFull
+from app.schemas.generate import GenerateRequest
+from app.utils.sse import SSEEncoder
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+# Seconds between keep-alive comments on an idle event stream
+KEEPALIVE_SECONDS = 15
+
+
+@router.post("/generate", status_code=202)
+async def submit_generation(
+    payload: GenerateRequest,
+    jobs: JobManager = Depends(get_job_manager),
+):
+    """
+    Queues a generation (same input as POST /generate/) and returns its
+    job id at once. Poll /jobs/{id} or follow /jobs/{id}/events.
+    """
+    try:
+        job = await jobs.submit(payload)
+    except JobQueueFull as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(max(1, int(e.retry_after)))},
+        )
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "status_url": f"/jobs/{job['id']}",
+        "events_url": f"/jobs/{job['id']}/events",
+    }
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: str, jobs: JobManager = Depends(get_job_manager)):
+    """
+    Status, stage and progress; the generation result once it succeeded.
+    """
+    try:
+        return await jobs.get(job_id)
+    except JobNotFound:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+
+@router.delete("/{job_id}")
+async def cancel_job(job_id: str, jobs: JobManager = Depends(get_job_manager)):
+    try:
+        return await jobs.cancel(job_id)
+    except JobNotFound:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+
+@router.get("/{job_id}/events")
+async def job_events(
+    job_id: str,
+    jobs: JobManager = Depends(get_job_manager),
+    last_event_id: int = Header(0, alias="Last-Event-ID"),
+):
+    """
+    Progress events as SSE (status, progress, then done / error /
+    cancelled). Earlier events are replayed first; reconnecting with
+    Last-Event-ID resumes after that event.
+    """
+    try:
+        await jobs.get(job_id)
+    except JobNotFound:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_generator():
+        sse = SSEEncoder()
+        after = last_event_id
+        while True:
+            events = await jobs.backend.events(job_id, after, timeout=KEEPALIVE_SECONDS)
+            for n, event in events:
+                yield sse.event(event, event_id=n)
+                after = n
+                if event["type"] in ("done", "error", "cancelled"):
+                    return
+            if not events:
+                job = await jobs.backend.get(job_id)
+                if job is None or job["status"] in TERMINAL:
+                    return  # expired, or its last event was already sent
+                yield sse.keepalive()
+
+    return StreamingResponse(event_generator(), media_type="text/event-stream")
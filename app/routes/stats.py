@@ -0,0 +1,68 @@
+from fastapi import APIRouter, Depends
+from app.dependencies.llm import (
+    get_chat_service,
+    get_generation_service,
+    get_job_manager,
+    get_provider_registry,
+    get_resumable_streams,
+)
+from app.jobs.manager import JobManager
+from app.services.chat_service import ChatService
+from app.services.generation_service import GenerationService
+from app.services.llm.registry import ProviderRegistry
+from app.streams.resumable import ResumableStreams
+
+router = APIRouter(prefix="/stats", tags=["Stats"])
+
+@router.get("/llm")
+def llm_stats(registry: ProviderRegistry = Depends(get_provider_registry)):
+    """
+    Connection pools, response cache and request coalescing counters.
+    """
+    return registry.stats()
+
+@router.get("/chat")
+def chat_stats(chat_service: ChatService = Depends(get_chat_service)):
+    """
+    Chat generate flow: analysis mode and time to first design token.
+    """
+    return chat_service.stats()
+
+@router.get("/embeddings")
+def embedding_stats(service: GenerationService = Depends(get_generation_service)):
+    """
+    Semantic reuse: lookups, reuse/seed hit rate and top-match similarity.
+    """
+    if service.embeddings is None:
+        return {"enabled": False}
+    return {"enabled": True, **service.embeddings.stats()}
+
+@router.get("/generation")
+def generation_stats(service: GenerationService = Depends(get_generation_service)):
+    """
+    Design fan-out and component tree pipelining counters.
+    """
+    return service.stats()
+
+@router.get("/artifacts")
+def artifact_stats(service: GenerationService = Depends(get_generation_service)):
+    """
+    Artifact store: size vs quota, deduplicated puts and evictions.
+    """
+    return service.artifacts.stats()
+
+@router.get("/jobs")
+async def job_stats(jobs: JobManager = Depends(get_job_manager)):
+    """
+    Background generations: queue depth, outcomes, queue and run times.
+    """
+    return await jobs.stats()
+
+@router.get("/streams")
+def stream_stats(streams: ResumableStreams | None = Depends(get_resumable_streams)):
+    """
+    Resumable SSE: live producers, reconnects, replayed frames and evictions.
+    """
+    if streams is None:
+        return {"enabled": False}
+    return {"enabled": True, **streams.stats()}
@@ -0,0 +1,71 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from app.dependencies.llm import get_resumable_streams
+from app.streams.backends import StreamGone
+from app.streams.disconnect import until_disconnected
+from app.streams.resumable import ResumableStreams, parse_event_id
+
+router = APIRouter(prefix="/streams", tags=["Streams"])
+
+
+async def start_stream(request: Request, streams: ResumableStreams | None,
+                       frames) -> StreamingResponse:
+    """
+    Serves `frames` through a replay buffer (resumable), or directly when
+    resumable streams are disabled. Either way a client disconnect stops
+    the upstream work, see until_disconnected / ResumableStreams.
+    """
+    if streams is None:
+        return StreamingResponse(
+            until_disconnected(request, frames), media_type="text/event-stream"
+        )
+    stream_id = await streams.start(frames)
+    # Only the follower ends with the connection; the producer waits for a reconnect
+    return StreamingResponse(
+        until_disconnected(request, streams.follow(stream_id), policy="cancel", count=False),
+        media_type="text/event-stream",
+        headers={"X-Stream-Id": stream_id},
+    )
+
+
+async def resume_stream(request: Request, streams: ResumableStreams | None,
+                        last_event_id: str | None) -> StreamingResponse | None:
+    """
+    The rest of an earlier stream if `last_event_id` names one; None when
+    there is nothing to resume (start a new stream). 410 if it expired.
+    """
+    parsed = parse_event_id(last_event_id)
+    if streams is None or parsed is None:
+        return None
+    stream_id, after = parsed
+    try:
+        follower = await streams.resume(stream_id, after)
+    except StreamGone:
+        raise HTTPException(status_code=410, detail="Stream expired, start a new one")
+    return StreamingResponse(
+        until_disconnected(request, follower, policy="cancel", count=False),
+        media_type="text/event-stream",
+        headers={"X-Stream-Id": stream_id},
+    )
+
+
+@router.get("/{stream_id}")
+async def reconnect(
+    stream_id: str,
+    request: Request,
+    after: int | None = None,
+    last_event_id: str | None = Header(None, alias="Last-Event-ID"),
+    streams: ResumableStreams | None = Depends(get_resumable_streams),
+):
+    """
+    Reconnects to a /generate/stream or /chat stream: frames after
+    `after` (or after the Last-Event-ID), then live frames until it ends.
+    """
+    if after is None:
+        parsed = parse_event_id(last_event_id)
+        after = parsed[1] if parsed is not None and parsed[0] == stream_id else 0
+    response = await resume_stream(request, streams, f"{stream_id}:{after}")
+    if response is None:
+        raise HTTPException(status_code=404, detail="Resumable streams are disabled")
+    return response
@@ -11,7 +11,15 @@ class GenerateRequest(BaseModel):
     # NEW
     prompt: Optional[str] = None
 
+    # Regenerate only what changed relative to this earlier generation
+    # (kept in the serving process's memory only; see DesignStore)
+    previous_generation_id: Optional[str] = None
+
 class GenerateResponse(BaseModel):
     id: str
     result: Dict[str, Any]  # architecture JSON, diagrams, folder structure
     zip_url: str
+
+class SubtreeRequest(BaseModel):
+    path: str  # directory to regenerate, e.g. "services/orders/"
+    instructions: Optional[str] = None
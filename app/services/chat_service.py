@@ -1,15 +1,36 @@
+import time
+
+from app.core.config import settings
+from app.services.llm.hedging import LatencyTracker
 from app.services.llm.orchestrator import LLMOrchestrator
+from app.services.speculation import SpeculativeGeneration
 from app.services.intent_service import IntentService, Intent
 from app.services.generation_service import GenerationService
 from app.schemas.generate import GenerateRequest
 
 class ChatService:
-    def __init__(self):
-        self.llm = LLMOrchestrator()
-        self.generator = GenerationService()
+    def __init__(self, generator: GenerationService | None = None):
+        self.generator = generator or GenerationService()
+        self.llm: LLMOrchestrator = self.generator.llm
+        self.intents = IntentService(self.llm)
+
+        # Runtime switch: one fused analyze+expand call vs. two round trips
+        self.fused_analysis = settings.CHAT_FUSED_ANALYSIS
+        # Opt-in: expand + stream the design while the analysis runs
+        self.speculative = settings.CHAT_SPECULATIVE_GENERATION
+        self.latency = LatencyTracker(window=500, min_samples=1)
+
+        self.speculation_stats = {
+            "attempts": 0,
+            "hits": 0,
+            "misses": 0,
+            "wasted_tokens": 0,
+            "time_saved_seconds": 0.0,
+        }
 
-    async def chat(self, message: str):
-        intent = IntentService.detect(message)
+    async def chat(self, message: str, fused: bool | None = None,
+                   speculative: bool | None = None):
+        intent = await self.intents.resolve(message)
         # lowered = message.lower().strip()
 
         # if lowered in ["who are you", "who are you?", "what is your name"]:
@@ -26,18 +47,77 @@ class ChatService:
             }
 
         # GENERATE FLOW
-        analysis = await self.llm.analyze_prompt_completeness(message)
+        fused = self.fused_analysis if fused is None else fused
+        speculative = self.speculative if speculative is None else speculative
+
+        speculation = None
+        if speculative and not fused:
+            speculation = SpeculativeGeneration(self.generator, message)
+            self.speculation_stats["attempts"] += 1
+
+        try:
+            if fused:
+                analysis = await self.llm.analyze_and_expand(message)
+            else:
+                analysis = await self.llm.analyze_prompt_completeness(message)
+        except BaseException:
+            if speculation:
+                await self._discard(speculation)
+            raise
 
         if not analysis["is_clear"]:
+            if speculation:
+                await self._discard(speculation)
             return {
                 "mode": "clarify",
                 "questions": analysis["questions"],
                 "original_prompt": message
             }
 
-        return {
+        result = {
             "mode": "generate",
+            "analysis_mode": "fused" if fused else "serial",
             "payload": {
                 "prompt": message
             }
         }
+
+        # Fused mode already expanded the prompt → no re-normalization
+        if analysis.get("spec") is not None:
+            spec = analysis["spec"]
+            spec.inferred = True
+            result["spec"] = spec
+
+        # Speculation paid off → the route continues the buffered work
+        if speculation:
+            self.speculation_stats["hits"] += 1
+            result["analysis_mode"] = "speculative"
+            self.speculation_stats["time_saved_seconds"] += speculation.time_saved(
+                time.monotonic()
+            )
+            result["speculation"] = speculation
+
+        return result
+
+    async def _discard(self, speculation: SpeculativeGeneration):
+        await speculation.cancel()
+        self.speculation_stats["misses"] += 1
+        self.speculation_stats["wasted_tokens"] += speculation.buffered_tokens()
+
+    def record_first_design_token(self, analysis_mode: str, seconds: float):
+        self.latency.record(analysis_mode, "first_design_token", seconds)
+
+    def stats(self) -> dict:
+        return {
+            "fused_analysis": self.fused_analysis,
+            "speculative": self.speculative,
+            "intent": self.intents.stats(),
+            "speculation": {
+                **self.speculation_stats,
+                "time_saved_seconds": round(self.speculation_stats["time_saved_seconds"], 3),
+            },
+            "time_to_first_design_token": {
+                mode: self.latency.summary(mode, "first_design_token")
+                for mode in ("serial", "fused", "speculative")
+            },
+        }
@@ -0,0 +1,190 @@
+import asyncio
+import time
+
+from app.core.config import settings
+from app.services.llm.single_flight import StreamBroadcast
+
+# Used when outline planning is off or the planner's answer is unusable
+DEFAULT_OUTLINE = [
+    {"title": "High-level architecture", "focus": "Overall style, major building blocks and how they fit together."},
+    {"title": "Key components and responsibilities", "focus": "Services and modules, what each owns and exposes."},
+    {"title": "Data layer", "focus": "Datastores, schemas, caching and data ownership."},
+    {"title": "APIs and data flow", "focus": "External and internal APIs and how requests move between components."},
+    {"title": "Infrastructure and deployment", "focus": "Hosting, environments, CI/CD and observability."},
+    {"title": "Security", "focus": "Authentication, authorization, secrets and data protection."},
+    {"title": "Scaling, risks and trade-offs",
+     "focus": "Bottlenecks, scaling strategy, risks and the trade-offs made."},
+]
+
+
+class ProviderSlots:
+    """
+    Bounded parallelism per provider. `acquire()` returns the first
+    provider (in configured order) with a free slot, waiting otherwise.
+    """
+
+    def __init__(self, limits: dict[str, int]):
+        self.limits = {name: n for name, n in limits.items() if n > 0}
+        self.in_flight = {name: 0 for name in self.limits}
+        self._free = asyncio.Condition()
+
+    async def acquire(self) -> str:
+        async with self._free:
+            while True:
+                for name, limit in self.limits.items():
+                    if self.in_flight[name] < limit:
+                        self.in_flight[name] += 1
+                        return name
+                await self._free.wait()
+
+    async def release(self, name: str):
+        async with self._free:
+            self.in_flight[name] -= 1
+            self._free.notify()
+
+
+class SectionFanout:
+    """
+    System design as parallel sections instead of one long generation.
+
+    The outline is planned first (one short LLM call, or DEFAULT_OUTLINE),
+    then every section streams concurrently within the per-provider slots.
+    `stream()` yields the sections in outline order: the first one live,
+    later ones from their buffer as soon as the reader gets to them.
+    """
+
+    def __init__(self, llm, limits: dict[str, int],
+                 plan_outline: bool | None = None, max_sections: int | None = None):
+        self.llm = llm
+        self.slots = ProviderSlots(limits)
+        self.plan_outline = (
+            settings.DESIGN_FANOUT_OUTLINE == "llm" if plan_outline is None else plan_outline
+        )
+        self.max_sections = max_sections or settings.DESIGN_FANOUT_MAX_SECTIONS
+        self.counters = {
+            "designs": 0,
+            "sections": 0,
+            "outline_planned": 0,
+            "outline_default": 0,
+            "section_seconds": 0.0,
+            "wall_seconds": 0.0,
+        }
+        self.by_provider = {name: 0 for name in self.slots.limits}
+
+    async def outline(self, payload_text: str) -> list[dict]:
+        if self.plan_outline:
+            try:
+                data = await self.llm.plan_design_outline(payload_text, self.max_sections)
+                sections = self._clean_outline(data)
+                if sections:
+                    self.counters["outline_planned"] += 1
+                    return sections
+            except Exception as e:
+                print(f"⚠️ Design outline planning failed, using the default: {e}")
+        self.counters["outline_default"] += 1
+        return DEFAULT_OUTLINE[:self.max_sections]
+
+    def _clean_outline(self, data) -> list[dict]:
+        items = data.get("sections") if isinstance(data, dict) else data
+        if not isinstance(items, list):
+            return []
+        sections = []
+        for item in items:
+            if isinstance(item, str):
+                item = {"title": item}
+            if not isinstance(item, dict) or not str(item.get("title") or "").strip():
+                continue
+            sections.append({
+                "title": str(item["title"]).strip().lstrip("#0123456789. ").strip(),
+                "focus": str(item.get("focus") or "").strip(),
+            })
+        # Too few sections means the planner misunderstood; not worth fanning out
+        return sections[:self.max_sections] if len(sections) >= 2 else []
+
+    async def stream(self, payload_text: str):
+        started = time.monotonic()
+        sections = await self.outline(payload_text)
+        outline_text = "\n".join(
+            f"{i}. {s['title']}" + (f" — {s['focus']}" if s["focus"] else "")
+            for i, s in enumerate(sections, 1)
+        )
+
+        timing = {"section_seconds": 0.0}
+        broadcasts = []
+        for section in sections:
+            broadcast = StreamBroadcast()
+            broadcast.task = asyncio.create_task(
+                self._write(broadcast, payload_text, outline_text, section, timing)
+            )
+            broadcasts.append(broadcast)
+
+        try:
+            for i, (section, broadcast) in enumerate(zip(sections, broadcasts), 1):
+                yield f"## {i}. {section['title']}\n\n"
+                async for token in broadcast.subscribe():
+                    yield token
+                yield "\n\n"
+        finally:
+            for broadcast in broadcasts:
+                if not broadcast.task.done():
+                    broadcast.task.cancel()
+
+        self.counters["designs"] += 1
+        self.counters["sections"] += len(sections)
+        self._record_timing(timing, started)
+
+    async def generate(self, payload_text: str, outline_text: str, sections: list[dict]) -> list[str]:
+        """
+        Writes the given sections concurrently; returns their bodies in order.
+        """
+        started = time.monotonic()
+        timing = {"section_seconds": 0.0}
+        broadcasts = [StreamBroadcast() for _ in sections]
+        await asyncio.gather(*(
+            self._write(broadcast, payload_text, outline_text, section, timing)
+            for broadcast, section in zip(broadcasts, sections)
+        ))
+        bodies = []
+        for broadcast in broadcasts:
+            if broadcast.error is not None:
+                raise broadcast.error
+            bodies.append("".join(broadcast.tokens))
+        self.counters["sections"] += len(sections)
+        self._record_timing(timing, started)
+        return bodies
+
+    def _record_timing(self, timing: dict, started: float):
+        # Section time and wall time of the same completed fan-outs only,
+        # so avg_parallelism stays a ratio whichever path ran
+        self.counters["section_seconds"] += timing["section_seconds"]
+        self.counters["wall_seconds"] += time.monotonic() - started
+
+    async def _write(self, broadcast: StreamBroadcast, payload_text, outline_text, section, timing: dict):
+        provider = await self.slots.acquire()
+        try:
+            started = time.monotonic()
+            self.by_provider[provider] += 1
+            async for token in self.llm.stream_design_section(
+                payload_text, outline_text, section["title"], section["focus"], provider
+            ):
+                broadcast.publish(token)
+            timing["section_seconds"] += time.monotonic() - started
+            broadcast.close()
+        except asyncio.CancelledError:
+            broadcast.close(RuntimeError("Section generation cancelled"))
+            raise
+        except Exception as e:
+            broadcast.close(e)
+        finally:
+            await self.slots.release(provider)
+
+    def stats(self) -> dict:
+        c = self.counters
+        return {
+            "concurrency": self.slots.limits,
+            "in_flight": dict(self.slots.in_flight),
+            "sections_by_provider": dict(self.by_provider),
+            **{k: c[k] for k in ("designs", "sections", "outline_planned", "outline_default")},
+            # Sum of section durations / wall time: >1 means sections overlapped
+            "avg_parallelism": round(c["section_seconds"] / c["wall_seconds"], 2) if c["wall_seconds"] else None,
+        }
@@ -0,0 +1,206 @@
+import re
+import time
+import uuid
+from collections import OrderedDict
+
+from app.core.config import settings
+
+# Heading lines a design may use: "## 2. Data layer", "**Security**", "3) Data flow"
+_MD_HEADING = re.compile(r"^(#{1,6})\s+\S.*$", re.M)
+_BOLD_HEADING = re.compile(r"^\*\*[^*\n]{2,80}\*\*:?\s*$", re.M)
+_NUMBERED_HEADING = re.compile(r"^\d+[.)]\s+[^\n.]{2,80}$", re.M)
+
+# Section title → category (first match wins; "data flow" is about APIs, not storage)
+SECTION_CATEGORIES = (
+    ("api", re.compile(r"data\s*flow|\bapi|interface|endpoint|integration|communication|\bflow", re.I)),
+    ("security", re.compile(r"secur|auth|privacy|compliance", re.I)),
+    ("data", re.compile(r"\bdata\b|storage|database|persistence|schema", re.I)),
+    ("deployment", re.compile(r"deploy|infra|hosting|devops|ci/cd|operations|observab|monitor", re.I)),
+    ("scaling", re.compile(r"scal|performance|reliab|availab", re.I)),
+    ("risks", re.compile(r"risk|trade[- ]?offs?|limitation", re.I)),
+    ("components", re.compile(r"component|service|module|responsibilit|frontend|backend", re.I)),
+)
+ALL_CATEGORIES = frozenset(
+    [name for name, _ in SECTION_CATEGORIES] + ["architecture"]
+)
+
+# ArchitectureSpec field → section categories it always affects
+FIELD_SECTIONS = {
+    "project_name": frozenset(),  # reused sections are renamed in place
+    "description": ALL_CATEGORIES,
+    "use_case": frozenset({"architecture", "components", "api", "scaling", "risks"}),
+    "requirements": frozenset({"components", "risks"}),
+    "tech_stack": frozenset({"architecture", "risks"}),
+}
+
+# Added/removed requirement or tech-stack items → extra categories they touch
+ITEM_CATEGORIES = (
+    ("data", re.compile(
+        r"sql|postgres|mysql|mongo|redis|dynamo|cassandra|database|\bdb\b|cache|storage|\bs3\b|elastic", re.I
+    )),
+    ("security", re.compile(r"auth|oauth|jwt|login|sso|encrypt|gdpr|hipaa|pci|secur|permission|role", re.I)),
+    ("deployment", re.compile(
+        r"docker|kubernetes|k8s|aws|gcp|azure|terraform|\bci\b|deploy|serverless|lambda|vercel|heroku|monitor",
+        re.I,
+    )),
+    ("api", re.compile(r"api|rest|graphql|grpc|websocket|webhook|kafka|rabbitmq|queue|event|stream", re.I)),
+    ("scaling", re.compile(r"scal|concurren|latency|throughput|users|traffic|load|availab|uptime|performance", re.I)),
+    ("components", re.compile(
+        r"react|vue|angular|next|svelte|frontend|mobile|fastapi|django|flask|node|express|spring|service", re.I
+    )),
+)
+
+# Sections the component tree is built from
+TREE_CATEGORIES = frozenset({"architecture", "components", "data", "api", "deployment"})
+
+
+def split_sections(design: str) -> list[tuple[str, str]]:
+    """
+    Splits a design into (title, text) at its top-level headings; `text`
+    keeps the heading line so joining the texts gives the design back.
+    Text before the first heading becomes an "Overview" section.
+    """
+    starts = []
+    headings = list(_MD_HEADING.finditer(design))
+    if len(headings) >= 2:
+        top = min(len(m.group(1)) for m in headings)
+        starts = [m for m in headings if len(m.group(1)) == top]
+    else:
+        for pattern in (_BOLD_HEADING, _NUMBERED_HEADING):
+            starts = list(pattern.finditer(design))
+            if len(starts) >= 2:
+                break
+    if len(starts) < 2:
+        return [("Overview", design)]
+
+    sections = []
+    if design[:starts[0].start()].strip():
+        sections.append(("Overview", design[:starts[0].start()]))
+    for i, match in enumerate(starts):
+        end = starts[i + 1].start() if i + 1 < len(starts) else len(design)
+        title = re.sub(r"^[#*\s\d.)]+|[*:\s]+$", "", match.group(0))
+        sections.append((title, design[match.start():end]))
+    return sections
+
+
+def section_heading(text: str) -> str:
+    """
+    The heading line a section's text starts with; "" for the headerless
+    text before the first heading.
+    """
+    first = text.split("\n", 1)[0]
+    if any(p.match(first) for p in (_MD_HEADING, _BOLD_HEADING, _NUMBERED_HEADING)):
+        return first
+    return ""
+
+
+def rename_project(text: str, old: str, new: str) -> str:
+    """
+    Replaces whole-word mentions of the project name only: renaming
+    "Shop" leaves "Shopping" and "workshop" alone.
+    """
+    return re.sub(rf"(?<!\w){re.escape(old)}(?!\w)", lambda _: new, text)
+
+
+def section_category(title: str) -> str:
+    for name, pattern in SECTION_CATEGORIES:
+        if pattern.search(title):
+            return name
+    return "architecture"
+
+
+def affected_categories(old: dict, new: dict) -> tuple[list[str], set[str]]:
+    """
+    (changed spec fields, section categories to regenerate) for two specs.
+    """
+    changed, categories = [], set()
+    for field, sections in FIELD_SECTIONS.items():
+        before, after = old.get(field), new.get(field)
+        if isinstance(before, list) or isinstance(after, list):
+            before = {str(v).strip().lower() for v in before or []}
+            after = {str(v).strip().lower() for v in after or []}
+            items = before ^ after
+            if not items:
+                continue
+            for item in items:
+                categories.update(
+                    name for name, pattern in ITEM_CATEGORIES if pattern.search(item)
+                )
+        elif (before or "").strip() == (after or "").strip():
+            continue
+        changed.append(field)
+        categories.update(sections)
+    return changed, categories
+
+
+class GenerationNotFound(LookupError):
+    """
+    The previous generation id is unknown or was evicted from the store.
+    """
+
+    def __init__(self, generation_id: str):
+        super().__init__(f"Generation {generation_id} not found")
+        self.generation_id = generation_id
+
+
+class StoredGeneration:
+    def __init__(self, id: str, spec: dict, system_design: str, component_tree,
+                 full_seconds: float):
+        self.id = id
+        self.spec = spec
+        self.sections = split_sections(system_design)
+        self.component_tree = component_tree
+        self.full_seconds = full_seconds  # wall time of a full generation
+        self.created_at = time.time()
+
+    @property
+    def system_design(self) -> str:
+        return "".join(text for _, text in self.sections)
+
+
+class DesignStore:
+    """
+    Recent generations by id (LRU), split into sections so a changed spec
+    can regenerate only the sections it affects.
+
+    Process-local: ids don't survive a restart and aren't shared between
+    workers (unlike the job and stream backends, there is no Redis store).
+    """
+
+    def __init__(self, max_entries: int | None = None):
+        self.max_entries = max_entries or settings.DESIGN_STORE_MAX_ENTRIES
+        self.entries: OrderedDict[str, StoredGeneration] = OrderedDict()
+        self.counters = {"stored": 0, "hits": 0, "misses": 0, "evicted": 0}
+
+    def put(self, spec: dict, system_design: str, component_tree,
+            full_seconds: float, id: str | None = None) -> str:
+        id = id or str(uuid.uuid4())
+        self.entries[id] = StoredGeneration(id, spec, system_design, component_tree, full_seconds)
+        self.entries.move_to_end(id)
+        self.counters["stored"] += 1
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.counters["evicted"] += 1
+        return id
+
+    def get(self, id: str) -> StoredGeneration | None:
+        entry = self.entries.get(id)
+        if entry is None:
+            self.counters["misses"] += 1
+            return None
+        self.entries.move_to_end(id)
+        self.counters["hits"] += 1
+        return entry
+
+    def stats(self) -> dict:
+        return {"entries": len(self.entries), **self.counters}
+
+
+_store: DesignStore | None = None
+
+
+def get_design_store() -> DesignStore:
+    global _store
+    if _store is None:
+        _store = DesignStore()
+    return _store
@@ -1,47 +1,353 @@
+from app.artifacts.store import ArtifactStore, get_artifact_store
+from app.core.config import settings
+from app.embedding.embedding_service import (
+    EmbeddingStore,
+    Recall,
+    get_embedding_store,
+    store_generation_embedding,
+)
+from app.services.llm.cache import chunk_text
 from app.services.llm.orchestrator import LLMOrchestrator
+from app.services.design_fanout import SectionFanout
+from app.services.design_store import (
+    TREE_CATEGORIES,
+    DesignStore,
+    GenerationNotFound,
+    StoredGeneration,
+    affected_categories,
+    get_design_store,
+    rename_project,
+    section_category,
+    section_heading,
+    split_sections,
+)
 from app.services.input_normalizer import InputNormalizer
-import uuid
+from app.services.tree_pipeline import TreePipeline
+from app.services.zip_builder import iter_scaffold_zip, project_root
+from app.utils.component_tree import ComponentTree
+from app.utils.json_repair import repair_json
+from app.utils.json_stream import IncrementalJSONParser, iter_tree_nodes
+from app.utils.validator import validate_scaffold
+import json
+import time
+
+# Upper bound on how much of a stored design is pasted into a seeded prompt
+SEED_DESIGN_MAX_CHARS = 6000
 
 class GenerationService:
-    def __init__(self):
-        self.llm = LLMOrchestrator()
+    def __init__(self, llm: LLMOrchestrator | None = None,
+                 embeddings: EmbeddingStore | None = None,
+                 designs: DesignStore | None = None,
+                 artifacts: ArtifactStore | None = None):
+        self.llm = llm or LLMOrchestrator()
         self.normalizer = InputNormalizer(self.llm)
+        if embeddings is None and settings.EMBEDDING_ENABLED:
+            embeddings = get_embedding_store()
+        self.embeddings = embeddings
+        self.designs = designs or get_design_store()
+        self._artifacts = artifacts
+        self._sections: SectionFanout | None = None
+        self.fanout = self.section_writer() if settings.DESIGN_FANOUT else None
+        self.incremental_stats = {
+            "requests": 0,
+            "sections_regenerated": 0,
+            "sections_reused": 0,
+            "trees_reused": 0,
+            "output_tokens_saved": 0,
+            "seconds_saved": 0.0,
+        }
+        self.pipelined_tree = settings.GENERATION_PIPELINED_TREE
+        self.pipeline_stats = {
+            "started_early": 0,
+            "sequential": 0,
+            "patched": 0,
+            "regenerated": 0,
+            "head_fraction_sum": 0.0,
+            "overlap_seconds": 0.0,
+        }
+
+    async def generate_architecture(self, payload, progress=None):
+        """
+        The whole generation in one call. `progress(stage)` (async), if
+        given, is awaited as each stage starts: normalize, system_design,
+        component_tree, package.
+        """
+        async def stage(name):
+            if progress is not None:
+                await progress(name)
 
-    async def generate_architecture(self, payload):
+        started = time.monotonic()
+        await stage("normalize")
         spec = await self.normalizer.normalize(payload)
 
-        payload_text = f"""
-        Project Name: {spec.project_name}
-        Description: {spec.description}
-        Use Case: {spec.use_case}
-        Requirements: {spec.requirements}
-        Tech Stack: {spec.tech_stack}
-        """
+        payload_text = self.describe(spec)
+
+        recall = previous = incremental = None
+        previous_id = getattr(payload, "previous_generation_id", None)
+        if previous_id:
+            previous = self.designs.get(previous_id)
+            if previous is None:
+                raise GenerationNotFound(previous_id)
+            await stage("system_design")
+            system_design, component_tree, incremental = await self.regenerate(previous, spec)
+            await self.remember(payload_text, system_design, component_tree, spec)
+        else:
+            recall = await self.recall(payload_text, spec)
+            await stage("system_design")
+            if recall is not None and recall.mode == "reuse":
+                system_design = recall.record["system_design"]
+                component_tree = recall.record.get("component_tree")
+            else:
+                if self.fanout is not None:
+                    system_design = "".join([
+                        token async for token in self.fanout.stream(
+                            self.seeded_payload(payload_text, recall)
+                        )
+                    ])
+                else:
+                    system_design = await self.llm.generate_system_design(
+                        self.seeded_payload(payload_text, recall)
+                    )
+                await stage("component_tree")
+                component_tree = self.normalize_tree(
+                    await self.llm.generate_component_tree(system_design)
+                )
+                await self.remember(payload_text, system_design, component_tree, spec)
 
-        system_design = await self.llm.generate_system_design(payload_text)
-        component_tree = await self.llm.generate_component_tree(system_design)
+        await stage("package")
+        generation_id = self.store(
+            spec, system_design, component_tree, time.monotonic() - started, previous
+        )
 
         result = {
             "input_spec": spec.dict(),
             "system_design": system_design,
             "component_tree": component_tree,
         }
+        if recall is not None:
+            result["similar_generation"] = {
+                "id": recall.match.id,
+                "mode": recall.mode,
+                "similarity": round(recall.similarity, 4),
+            }
+        if incremental is not None:
+            result["incremental"] = incremental
 
-        # validate_scaffold(result)
-        zip_path = build_zip(result)
+        validate_scaffold(result)
 
         return {
-            "id": str(uuid.uuid4()),
+            "id": generation_id,
             "result": result,
-            "zip_url": f"/artifacts/download/{zip_path}",
+            "zip_url": await self.zip_url(generation_id, result),
+        }
+
+    @property
+    def artifacts(self) -> ArtifactStore:
+        # Created on first use: it scans the artifact directory
+        if self._artifacts is None:
+            self._artifacts = get_artifact_store()
+        return self._artifacts
+
+    async def zip_url(self, generation_id: str, result: dict) -> str:
+        """
+        Download URL of the scaffold zip in the artifact store; the
+        on-the-fly stream if it could not be stored.
+        """
+        try:
+            key = await self.artifacts.put(iter_scaffold_zip(result))
+        except Exception as e:
+            print(f"⚠️ Artifact store failed, serving the zip on the fly: {e}")
+            return f"/generate/{generation_id}/zip"
+        return f"/artifacts/download/{key}?name={project_root(result)}.zip"
+
+    def store(self, spec, system_design: str, component_tree, elapsed_seconds: float,
+              previous: StoredGeneration | None = None) -> str:
+        """
+        Keeps the generation for incremental regeneration; returns its id.
+        An incremental result keeps the full-generation time of its base.
+        """
+        full_seconds = previous.full_seconds if previous is not None else elapsed_seconds
+        return self.designs.put(spec.dict(), system_design, component_tree, full_seconds)
+
+    def scaffold(self, generation_id: str) -> dict:
+        """
+        The stored generation in the shape `iter_scaffold_zip` expects.
+        """
+        stored = self.designs.get(generation_id)
+        if stored is None:
+            raise GenerationNotFound(generation_id)
+        return {
+            "input_spec": stored.spec,
+            "system_design": stored.system_design,
+            "component_tree": stored.component_tree,
+        }
+
+    async def regenerate(self, previous: StoredGeneration, spec):
+        """
+        Regenerates only the sections of `previous` that the spec change
+        affects (and the tree, if one of its source sections changed).
+        Returns (system_design, component_tree, savings report).
+        """
+        started = time.monotonic()
+        changed, categories = affected_categories(previous.spec, spec.dict())
+        sections = previous.sections
+
+        if len(sections) < 2 and changed and categories:
+            # Unstructured design: nothing to reuse
+            stale = [0]
+        else:
+            stale = [
+                i for i, (title, _) in enumerate(sections)
+                if section_category(title) in categories
+            ]
+
+        # A renamed project keeps its reused sections, under the new name
+        old_name, new_name = previous.spec.get("project_name"), spec.project_name
+        texts = [
+            rename_project(text, old_name, new_name) if old_name and old_name != new_name else text
+            for _, text in sections
+        ]
+
+        if stale:
+            writer = self.section_writer()
+            if writer is None:
+                raise RuntimeError("No LLM provider configured for section regeneration")
+            outline_text = "\n".join(
+                f"{i}. {title}" for i, (title, _) in enumerate(sections, 1)
+            )
+            bodies = await writer.generate(self.describe(spec), outline_text, [
+                {"title": sections[i][0], "focus": "Rewrite this section for the project input above."}
+                for i in stale
+            ])
+            for i, body in zip(stale, bodies):
+                # The preamble ("Overview") has no heading line to keep
+                heading = section_heading(texts[i]) if len(sections) > 1 else ""
+                texts[i] = (heading + "\n\n" if heading.strip() else "") + body.strip() + "\n\n"
+
+        system_design = "".join(texts)
+        tree_stale = any(section_category(sections[i][0]) in TREE_CATEGORIES for i in stale)
+        if tree_stale or previous.component_tree is None:
+            component_tree = self.normalize_tree(
+                await self.llm.generate_component_tree(system_design)
+            )
+        else:
+            component_tree = previous.component_tree
+
+        elapsed = time.monotonic() - started
+        reused = [i for i in range(len(sections)) if i not in stale]
+        tokens_saved = sum(len(texts[i]) for i in reused) // 4
+        if component_tree is previous.component_tree:
+            tokens_saved += len(json.dumps(component_tree)) // 4
+        seconds_saved = max(0.0, previous.full_seconds - elapsed)
+
+        s = self.incremental_stats
+        s["requests"] += 1
+        s["sections_regenerated"] += len(stale)
+        s["sections_reused"] += len(reused)
+        s["trees_reused"] += component_tree is previous.component_tree
+        s["output_tokens_saved"] += tokens_saved
+        s["seconds_saved"] += seconds_saved
+
+        return system_design, component_tree, {
+            "previous_generation_id": previous.id,
+            "changed_fields": changed,
+            "sections_total": len(sections),
+            "sections_regenerated": [sections[i][0] for i in stale],
+            "sections_reused": len(reused),
+            "component_tree": "reused" if component_tree is previous.component_tree else "regenerated",
+            # ~4 characters per token, same estimate as the rate limiter
+            "output_tokens_saved": tokens_saved,
+            "elapsed_seconds": round(elapsed, 3),
+            "full_generation_seconds": round(previous.full_seconds, 3),
+            "time_saved_seconds": round(seconds_saved, 3),
+        }
+
+    @staticmethod
+    def describe(spec) -> str:
+        """
+        Prompt text for a normalized spec; also the embedding-store key.
+        """
+        return f"""
+        Project Name: {spec.project_name}
+        Description: {spec.description}
+        Use Case: {spec.use_case}
+        Requirements: {spec.requirements}
+        Tech Stack: {spec.tech_stack}
+        """
+
+    @staticmethod
+    def fingerprint(spec) -> dict:
+        """
+        What a stored design must share with the spec to be reused as-is.
+        """
+        return {
+            "tech_stack": sorted({s.strip().lower() for s in spec.tech_stack or []}),
+            "requirements": sorted({s.strip().lower() for s in spec.requirements or []}),
         }
 
+    async def recall(self, payload_text: str, spec=None) -> Recall | None:
+        """
+        Nearest stored generation above the seed threshold, if any. Without
+        `spec` there is nothing to check a reuse against: it only seeds.
+        """
+        if self.embeddings is None:
+            return None
+        try:
+            fingerprint = self.fingerprint(spec) if spec is not None else None
+            return await self.embeddings.lookup(payload_text, fingerprint)
+        except Exception as e:
+            # Semantic reuse is an optimisation; never fail a generation on it
+            self.embeddings.counters["errors"] += 1
+            print(f"⚠️ Embedding lookup failed: {e}")
+            return None
+
+    @staticmethod
+    def seeded_payload(payload_text: str, recall: Recall | None) -> str:
+        if recall is None or recall.mode != "seed":
+            return payload_text
+        reference = recall.record.get("system_design", "")[:SEED_DESIGN_MAX_CHARS]
+        return (
+            payload_text
+            + "\n\nReference design from a similar past project "
+            + "(reuse what fits, change what the requirements above need):\n"
+            + reference
+        )
+
+    async def design_stream(self, prompt_text: str, recall: Recall | None = None):
+        """
+        System design tokens: replayed from a reused generation, otherwise
+        streamed from the model (seeded with the reference design, if any),
+        section by section in fan-out mode.
+        """
+        if recall is not None and recall.mode == "reuse":
+            for chunk in chunk_text(recall.record["system_design"]):
+                yield chunk
+            return
+
+        payload_text = self.seeded_payload(prompt_text, recall)
+        if self.fanout is not None:
+            stream = self.fanout.stream(payload_text)
+        else:
+            stream = self.llm.stream_system_design(payload_text)
+        async for token in stream:
+            yield token
+
+    async def remember(self, payload_text: str, system_design: str, component_tree, spec=None):
+        if self.embeddings is None or not system_design:
+            return
+        record = {"system_design": system_design, "component_tree": component_tree}
+        if spec is not None:
+            record["fingerprint"] = self.fingerprint(spec)
+        await store_generation_embedding(payload_text, record, store=self.embeddings)
+
     async def shutdown(self):
+        if self.embeddings is not None:
+            await self.embeddings.close()
         await self.llm.shutdown()
 
     async def stream_system_design(self, payload):
         spec = await self.normalize_payload(payload)
-        
+
         payload_text = f"""
         Project Name: {spec['project_name']}
         Description: {spec['description']}
@@ -53,9 +359,151 @@ class GenerationService:
         async for token in self.llm.stream_system_design(payload_text):
             yield token
 
+    @staticmethod
+    def normalize_tree(component_tree):
+        """
+        Canonical `{"folders": [...]}` via ComponentTree; entries that cannot
+        be placed are dropped (and logged). None for an unusable tree.
+        """
+        if component_tree is None:
+            return None
+        tree = ComponentTree.from_dict(component_tree)
+        if tree.issues:
+            print(f"⚠️ Component tree: dropped {len(tree.issues)} entries, e.g. {tree.issues[0]}")
+        return tree.to_dict() if len(tree) else None
+
+    async def regenerate_subtree(self, generation_id: str, path: str, instructions: str = ""):
+        """
+        Regenerates one folder of a stored generation's tree with a focused
+        prompt and splices it back, instead of a full component-tree call.
+        """
+        stored = self.designs.get(generation_id)
+        if stored is None:
+            raise GenerationNotFound(generation_id)
+
+        tree = ComponentTree.from_dict(stored.component_tree)
+        target = tree.get(path)
+        if target is None or not target.is_dir:
+            raise KeyError(f"No directory {path!r} in the component tree")
+
+        subtree = await self.llm.generate_component_subtree(
+            self.design_excerpt(stored.system_design, target.name),
+            "\n".join(tree.outline()),
+            target.path,
+            "\n".join(p[len(target.path):] for p in tree.paths(target)) or "(empty)",
+            instructions or "",
+        )
+        paths = subtree.get("folders") if isinstance(subtree, dict) else subtree
+        if not isinstance(paths, list):
+            raise ValueError("Subtree regeneration returned no 'folders' list")
+
+        spliced = tree.splice(target.path, paths)
+        stored.component_tree = spliced.to_dict()
+        return {
+            "id": generation_id,
+            "path": target.path,
+            "component_tree": stored.component_tree,
+            "diff": tree.diff(spliced),
+            "issues": spliced.issues,
+        }
+
+    @staticmethod
+    def design_excerpt(system_design: str, name: str) -> str:
+        """
+        Sections that mention `name` (plus the components sections),
+        capped like a seeded prompt; the whole design if none match.
+        """
+        needle = name.replace("_", " ").replace("-", " ").lower()
+        picked = [
+            text for title, text in split_sections(system_design)
+            if needle in text.lower().replace("_", " ").replace("-", " ")
+            or section_category(title) == "components"
+        ]
+        return ("".join(picked) or system_design)[:SEED_DESIGN_MAX_CHARS]
+
     async def generate_component_tree_from_design(self, system_design):
         return await self.llm.generate_component_tree(system_design)
-    
+
+    async def stream_component_tree(self, system_design):
+        """
+        Yields ("node", path) for each tree entry as soon as it closes,
+        then ("tree", component_tree) once. Malformed or truncated output
+        is repaired locally; only a broken stream or unrepairable JSON
+        falls back to the non-streamed call.
+        """
+        parser = IncrementalJSONParser()
+        parts = []
+        try:
+            async for chunk in self.llm.stream_component_tree(system_design):
+                parts.append(chunk)
+                for node in iter_tree_nodes(parser.feed(chunk)):
+                    yield "node", node
+            if not parser.started:
+                tree = None
+            elif parser.done:
+                tree = parser.close()
+            else:
+                tree = json.loads(repair_json("".join(parts)))
+        except Exception as e:
+            print(f"⚠️ Component tree stream failed, retrying non-streamed: {e}")
+            tree = await self.generate_component_tree_from_design(system_design)
+
+        yield "tree", tree
+
+    def section_writer(self) -> SectionFanout | None:
+        """
+        Parallel section generation (fan-out mode and incremental
+        regeneration); None when no provider is configured.
+        """
+        if self._sections is None:
+            limits = {
+                name: n for name, n in settings.DESIGN_FANOUT_CONCURRENCY.items()
+                if name in self.llm.configured_providers()
+            }
+            if limits:
+                self._sections = SectionFanout(self.llm, limits)
+        return self._sections
+
+    def tree_pipeline(self) -> TreePipeline | None:
+        """
+        A pipeline to feed design tokens into, or None in sequential mode.
+        """
+        return TreePipeline(self) if self.pipelined_tree else None
+
+    async def component_tree_events(self, system_design, pipeline: TreePipeline | None = None):
+        """
+        ("node", path)… then ("tree", tree) — from the early tree when the
+        pipeline started one, otherwise from the full design. Node paths
+        are normalized like the final tree (see normalize_tree).
+        """
+        events = pipeline.events(system_design) if pipeline else self.stream_component_tree(system_design)
+        nodes = ComponentTree()
+        async for kind, value in events:
+            if kind != "node":
+                yield kind, value
+                continue
+            for path in nodes.add_new(value):
+                yield "node", path
+
+    def stats(self) -> dict:
+        s = self.pipeline_stats
+        early = s["started_early"]
+        return {
+            "pipelined_tree": self.pipelined_tree,
+            "tree_started_early": early,
+            "tree_sequential": s["sequential"],
+            "tree_patched": s["patched"],
+            "tree_regenerated": s["regenerated"],
+            "avg_head_fraction": round(s["head_fraction_sum"] / early, 3) if early else None,
+            "avg_overlap_seconds": round(s["overlap_seconds"] / early, 3) if early else None,
+            "design_fanout": self.fanout.stats() if self.fanout is not None else None,
+            "design_store": self.designs.stats(),
+            "incremental": {
+                **self.incremental_stats,
+                "seconds_saved": round(self.incremental_stats["seconds_saved"], 3),
+            },
+        }
+
     async def normalize_payload(self, payload):
         """
         Converts ANY input shape into a full ArchitectureSpec
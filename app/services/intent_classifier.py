@@ -0,0 +1,137 @@
+import re
+import zlib
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+CORPUS_PATH = Path(__file__).resolve().parent.parent / "data" / "intent_corpus.tsv"
+
+N_FEATURES = 2 ** 15
+_WORD_RE = re.compile(r"[a-z0-9][a-z0-9.+#'-]*")
+
+
+def load_corpus(path: Path = CORPUS_PATH) -> list[tuple[str, str]]:
+    """
+    Reads `label<TAB>text` lines; blank lines and `#` comments are skipped.
+    """
+    examples = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if not line.strip() or line.startswith("#"):
+            continue
+        label, text = line.split("\t", 1)
+        examples.append((label.strip(), text.strip()))
+    return examples
+
+
+def extract_features(text: str) -> dict[int, float]:
+    """
+    Hashed word unigrams/bigrams + character 3-5 grams (within word
+    boundaries), as raw term counts keyed by feature index.
+    """
+    words = _WORD_RE.findall(text.lower())
+    grams = [f"w:{w}" for w in words]
+    grams += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+    for w in words:
+        padded = f" {w} "
+        for n in (3, 4, 5):
+            grams += [f"c:{padded[i:i + n]}" for i in range(len(padded) - n + 1)]
+
+    counts: dict[int, float] = {}
+    for g in grams:
+        idx = zlib.crc32(g.encode("utf-8")) % N_FEATURES
+        counts[idx] = counts.get(idx, 0.0) + 1.0
+    return counts
+
+
+class IntentClassifier:
+    """
+    Binary TF-IDF + logistic regression model over hashed n-grams.
+
+    Small enough to train from the bundled corpus at startup (well under a second)
+    and to score a message in well under a millisecond, so routing no
+    longer depends on a keyword list or a model round trip.
+    """
+
+    def __init__(self, labels: tuple[str, str] = ("chat", "generate_architecture"),
+                 l2: float = 1e-3, epochs: int = 300, learning_rate: float = 2.0):
+        self.labels = labels
+        self.l2 = l2
+        self.epochs = epochs
+        self.learning_rate = learning_rate
+
+        self.idf = np.ones(N_FEATURES, dtype=np.float64)
+        self.weights = np.zeros(N_FEATURES, dtype=np.float64)
+        self.bias = 0.0
+
+    def _vectorize(self, text: str) -> tuple[np.ndarray, np.ndarray]:
+        counts = extract_features(text)
+        if not counts:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+        idx = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        tf = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+        values = (1.0 + np.log(tf)) * self.idf[idx]
+        values /= np.linalg.norm(values)
+        return idx, values
+
+    def fit(self, examples: list[tuple[str, str]]) -> "IntentClassifier":
+        n = len(examples)
+        if n == 0:
+            raise ValueError("Cannot train the intent classifier on an empty corpus")
+
+        # Document frequencies → smoothed idf
+        docs = [extract_features(text) for _, text in examples]
+        df = np.zeros(N_FEATURES, dtype=np.float64)
+        for counts in docs:
+            df[list(counts)] += 1.0
+        self.idf = np.log((1.0 + n) / (1.0 + df)) + 1.0
+
+        # Sparse design matrix as (row, col, value) triplets
+        rows, cols, vals = [], [], []
+        for i, (_, text) in enumerate(examples):
+            idx, values = self._vectorize(text)
+            rows.append(np.full(len(idx), i, dtype=np.int64))
+            cols.append(idx)
+            vals.append(values)
+        rows = np.concatenate(rows)
+        cols = np.concatenate(cols)
+        vals = np.concatenate(vals)
+
+        y = np.array([1.0 if label == self.labels[1] else 0.0 for label, _ in examples])
+
+        w = np.zeros(N_FEATURES, dtype=np.float64)
+        b = 0.0
+        for _ in range(self.epochs):
+            z = np.bincount(rows, weights=vals * w[cols], minlength=n) + b
+            p = 1.0 / (1.0 + np.exp(-z))
+            residual = (p - y) / n
+            grad_w = np.bincount(cols, weights=vals * residual[rows], minlength=N_FEATURES)
+            w -= self.learning_rate * (grad_w + self.l2 * w)
+            b -= self.learning_rate * residual.sum()
+
+        self.weights = w
+        self.bias = b
+        return self
+
+    def predict_proba(self, text: str) -> float:
+        """
+        Probability that `text` belongs to labels[1].
+        """
+        idx, values = self._vectorize(text)
+        z = float(values @ self.weights[idx]) + self.bias
+        return float(1.0 / (1.0 + np.exp(-z)))
+
+    def predict(self, text: str) -> tuple[str, float]:
+        """
+        Returns (label, confidence) where confidence is in [0.5, 1].
+        """
+        p = self.predict_proba(text)
+        if p >= 0.5:
+            return self.labels[1], p
+        return self.labels[0], 1.0 - p
+
+
+@lru_cache(maxsize=1)
+def get_intent_classifier() -> IntentClassifier:
+    return IntentClassifier().fit(load_corpus())
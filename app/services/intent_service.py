@@ -1,20 +1,74 @@
+import time
 from enum import Enum
 
+from app.core.config import settings
+from app.services.intent_classifier import get_intent_classifier
+
 class Intent(str, Enum):
     CHAT = "chat"
     GENERATE_ARCHITECTURE = "generate_architecture"
 
 class IntentService:
+    def __init__(self, llm=None, threshold: float | None = None,
+                 llm_fallback: bool | None = None):
+        self.llm = llm
+        self.threshold = (
+            settings.INTENT_CONFIDENCE_THRESHOLD if threshold is None else threshold
+        )
+        self.llm_fallback = (
+            settings.INTENT_LLM_FALLBACK if llm_fallback is None else llm_fallback
+        )
+        self.counters = {
+            "local": 0,
+            "llm_fallback": 0,
+            "llm_errors": 0,
+            "classify_seconds": 0.0,
+        }
+
+    @staticmethod
+    def classify(message: str) -> tuple[Intent, float]:
+        """
+        Local prediction with its confidence (0.5 … 1.0).
+        """
+        label, confidence = get_intent_classifier().predict(message)
+        return Intent(label), confidence
+
     @staticmethod
     def detect(message: str) -> Intent:
-        msg = message.lower()
+        return IntentService.classify(message)[0]
+
+    async def resolve(self, message: str) -> Intent:
+        """
+        Uses the local classifier and only asks the LLM when its
+        confidence falls below the threshold.
+        """
+        started = time.perf_counter()
+        intent, confidence = self.classify(message)
+        self.counters["classify_seconds"] += time.perf_counter() - started
 
-        keywords = [
-            "build", "generate", "design", "architecture",
-            "system", "backend", "frontend", "app", "website"
-        ]
+        if confidence >= self.threshold or not self.llm_fallback or self.llm is None:
+            self.counters["local"] += 1
+            return intent
 
-        if any(k in msg for k in keywords):
-            return Intent.GENERATE_ARCHITECTURE
+        self.counters["llm_fallback"] += 1
+        try:
+            return Intent(await self.llm.classify_intent(message))
+        except Exception as e:
+            # Routing must never fail the request; keep the local guess
+            print(f"⚠️ Intent LLM fallback failed: {e}")
+            self.counters["llm_errors"] += 1
+            return intent
 
-        return Intent.CHAT
+    def stats(self) -> dict:
+        total = self.counters["local"] + self.counters["llm_fallback"]
+        return {
+            "threshold": self.threshold,
+            "llm_fallback_enabled": self.llm_fallback,
+            "local": self.counters["local"],
+            "llm_fallback": self.counters["llm_fallback"],
+            "llm_errors": self.counters["llm_errors"],
+            "llm_fallback_rate": round(self.counters["llm_fallback"] / total, 4) if total else 0.0,
+            "avg_classify_ms": (
+                round(self.counters["classify_seconds"] * 1000 / total, 4) if total else 0.0
+            ),
+        }
@@ -1,6 +1,28 @@
 # app/services/llm/base.py
 from abc import ABC, abstractmethod
 
+
+class StructuredOutputError(ValueError):
+    """
+    The provider answered, but its output could not be parsed into the
+    expected structure. Retrying at a lower temperature may fix it.
+    """
+
+
+def pool_snapshot(client) -> dict:
+    """
+    Best-effort view of an httpx client's connection pool.
+    httpx has no public pool API, so this reads the httpcore pool.
+    """
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    connections = getattr(pool, "connections", None)
+    if connections is None:
+        return {}
+    return {
+        "connections": len(connections),
+        "idle": sum(1 for c in connections if c.is_idle()),
+    }
+
 class BaseLLM(ABC):
 
     @abstractmethod
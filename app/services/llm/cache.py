@@ -0,0 +1,250 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from app.core.config import settings
+from app.utils.prompt_loader import load_prompt
+
+# Size of the pieces a cached design is replayed in on the streaming route
+REPLAY_CHUNK_SIZE = 64
+
+
+def normalize_text(text: str) -> str:
+    """
+    Collapses whitespace so cosmetic differences (indentation of the
+    payload f-strings, trailing newlines) map to the same cache entry.
+    """
+    return re.sub(r"\s+", " ", text or "").strip()
+
+
+@lru_cache(maxsize=None)
+def template_version(filename: str) -> str:
+    """
+    Short content hash of a prompt template. Editing a prompt file
+    changes the version and therefore invalidates its cached answers.
+    """
+    return hashlib.sha256(load_prompt(filename).encode("utf-8")).hexdigest()[:12]
+
+
+def canonical_hash(**parts) -> str:
+    blob = json.dumps(
+        parts,
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def chunk_text(text: str, size: int = REPLAY_CHUNK_SIZE):
+    for i in range(0, len(text), size):
+        yield text[i:i + size]
+
+
+class LLMResponseCache:
+    """
+    Content-addressed cache for LLM answers.
+
+    Memory tier: LRU ordered dict with per-entry TTL and a byte budget.
+    Disk tier (optional): one JSON file per key, consulted on memory miss.
+    Values must be JSON serialisable.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 3600,
+        max_bytes: int = 64 * 1024 * 1024,
+        disk_dir: str | None = None,
+        enabled: bool = True,
+    ):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+
+        # key -> (expires_at, size, value)
+        self._entries: OrderedDict[str, tuple[float, int, object]] = OrderedDict()
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    def make_key(
+        self,
+        *,
+        method: str,
+        provider: str,
+        model: str,
+        temperature: float,
+        template: str | None,
+        payload,
+    ) -> str:
+        if isinstance(payload, str):
+            payload = normalize_text(payload)
+
+        return canonical_hash(
+            method=method,
+            provider=provider,
+            model=model,
+            temperature=temperature,
+            template=template_version(template) if template else None,
+            payload=payload,
+        )
+
+    async def get(self, key: str):
+        if not self.enabled:
+            return None
+
+        value = self._get_memory(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        if self.disk_dir:
+            value = await asyncio.to_thread(self._read_disk, key)
+            if value is not None:
+                self.hits += 1
+                self.disk_hits += 1
+                self._put_memory(key, value)
+                return value
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value):
+        if not self.enabled or value is None:
+            return
+
+        self._put_memory(key, value)
+
+        if self.disk_dir:
+            await asyncio.to_thread(self._write_disk, key, value)
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    # -----------------------------
+    # Memory tier
+    # -----------------------------
+
+    def _get_memory(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, size, value = entry
+        if expires_at <= time.monotonic():
+            self._drop(key)
+            self.expirations += 1
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def _put_memory(self, key: str, value):
+        size = len(json.dumps(value, ensure_ascii=False, default=str))
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+
+        if key in self._entries:
+            self._drop(key)
+
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, size, value)
+        self._bytes += size
+
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.evictions += 1
+
+    def _drop(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    # -----------------------------
+    # Disk tier
+    # -----------------------------
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.json")
+
+    def _read_disk(self, key: str):
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if record.get("expires_at", 0) <= time.time():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            self.expirations += 1
+            return None
+
+        return record.get("value")
+
+    def _write_disk(self, key: str, value):
+        path = self._disk_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write-then-rename so concurrent readers never see half a file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"expires_at": time.time() + self.ttl_seconds, "value": value},
+                f,
+                ensure_ascii=False,
+                default=str,
+            )
+        os.replace(tmp_path, path)
+
+
+_shared_cache: LLMResponseCache | None = None
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """
+    Process-wide cache shared by every orchestrator instance.
+    """
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = LLMResponseCache(
+            max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+            max_bytes=settings.LLM_CACHE_MAX_BYTES,
+            disk_dir=settings.LLM_CACHE_DIR,
+            enabled=settings.LLM_CACHE_ENABLED,
+        )
+    return _shared_cache
@@ -0,0 +1,47 @@
+from app.services.llm.rate_limit import EXPECTED_OUTPUT_TOKENS
+
+
+class CancellationTracker:
+    """
+    What client disconnects stopped (or, in "finish" mode, let complete):
+    upstream LLM calls and streams aborted per method, with the output
+    tokens already paid for and an estimate of the tokens not generated,
+    plus the streaming requests themselves.
+    """
+
+    def __init__(self):
+        self.methods: dict[str, dict[str, int]] = {}
+        self.requests = {"cancelled": 0, "finished_after_disconnect": 0}
+
+    def upstream_cancelled(self, method: str, received_chars: int = 0):
+        counters = self.methods.setdefault(
+            method, {"cancelled": 0, "tokens_received": 0, "tokens_saved": 0}
+        )
+        # ~4 characters per token, same estimate as the rate limiter
+        received = received_chars // 4
+        counters["cancelled"] += 1
+        counters["tokens_received"] += received
+        counters["tokens_saved"] += max(0, EXPECTED_OUTPUT_TOKENS.get(method, 500) - received)
+
+    def request_disconnected(self, finished: bool):
+        self.requests["finished_after_disconnect" if finished else "cancelled"] += 1
+
+    def stats(self) -> dict:
+        return {
+            "requests": dict(self.requests),
+            "upstream": {method: dict(c) for method, c in self.methods.items()},
+            "tokens_saved": sum(c["tokens_saved"] for c in self.methods.values()),
+        }
+
+
+_tracker: CancellationTracker | None = None
+
+
+def get_cancellation_tracker() -> CancellationTracker:
+    """
+    Process-wide, shared by the routes and the LLM layer.
+    """
+    global _tracker
+    if _tracker is None:
+        _tracker = CancellationTracker()
+    return _tracker
@@ -1,8 +1,6 @@
-import json
 from app.core.config import settings
-from app.services.llm.base import BaseLLM
-from app.utils.json_fix import extract_json
-from app.utils.json_fix import safe_json_loads
+from app.services.llm.base import BaseLLM, StructuredOutputError, pool_snapshot
+from app.utils.json_repair import parse_llm_json
 from app.utils.prompt_loader import load_prompt
 from langchain_core.prompts import PromptTemplate
 from langchain_google_genai import ChatGoogleGenerativeAI
@@ -10,13 +8,17 @@ from app.schemas.architecture_spec import ArchitectureSpec
 from app.utils.spec_coercion import coerce_architecture_spec
 
 class GeminiLLMProvider(BaseLLM):
-    def __init__(self, temperature: float = 0.2):
+    name = "gemini"
+    model_name = "gemini-2.5-flash"
+
+    def __init__(self, temperature: float = 0.2, client_args: dict | None = None):
         self.temperature = temperature
         self.model = ChatGoogleGenerativeAI(
-            model="gemini-2.5-flash",
+            model=self.model_name,
             temperature=self.temperature,
             google_api_key=settings.GEMINI_API_KEY,
             streaming=True,
+            client_args=client_args,
         )
 
     async def generate_system_design(self, payload_text: str) -> str:
@@ -25,7 +27,7 @@ class GeminiLLMProvider(BaseLLM):
         )
 
         chain = prompt | self.model
-        result = await chain.invoke({"input": payload_text})
+        result = await chain.ainvoke({"input": payload_text})
 
         # print("SYSTEM DESIGN OUTPUT:", result.content)
         return result.content.strip()
@@ -39,11 +41,62 @@ class GeminiLLMProvider(BaseLLM):
         result = await chain.ainvoke({"input": system_design})
 
         # print("COMPONENT TREE RAW:", result.content)
-        return safe_json_loads(result.content)
+        try:
+            return parse_llm_json(result.content, "component_tree")
+        except ValueError:
+            raise StructuredOutputError("Invalid component tree JSON from Gemini")
+
+    async def generate_component_subtree(self, system_design: str, outline: str,
+                                         path: str, current: str, instructions: str) -> dict:
+        prompt = PromptTemplate.from_file("app/prompts/component_subtree.txt")
+        chain = prompt | self.model
+        result = await chain.ainvoke({
+            "input": system_design, "outline": outline, "path": path,
+            "current": current, "instructions": instructions,
+        })
+        try:
+            return parse_llm_json(result.content, "component_subtree")
+        except ValueError:
+            raise StructuredOutputError("Invalid component subtree JSON from Gemini")
+
+    async def stream_component_tree(self, system_design: str):
+        prompt = PromptTemplate.from_file("app/prompts/component_tree.txt")
+        chain = prompt | self.model
+
+        async for chunk in chain.astream({"input": system_design}):
+            if chunk.content:
+                yield chunk.content
+
+    async def plan_design_outline(self, payload_text: str, max_sections: int) -> dict:
+        prompt = PromptTemplate.from_file("app/prompts/design_outline.txt")
+        chain = prompt | self.model
+        result = await chain.ainvoke({"input": payload_text, "max_sections": max_sections})
+        try:
+            return parse_llm_json(result.content, "design_outline")
+        except ValueError:
+            raise StructuredOutputError("Invalid design outline JSON from Gemini")
+
+    async def stream_design_section(self, payload_text: str, outline: str, title: str, focus: str):
+        prompt = PromptTemplate.from_file("app/prompts/design_section.txt")
+        chain = prompt | self.model
+
+        async for chunk in chain.astream({
+            "input": payload_text, "outline": outline, "title": title, "focus": focus,
+        }):
+            if chunk.content:
+                yield chunk.content
 
     async def shutdown(self):
+        await self.model.aclose()
         print("Gemini LLM shutdown complete.")
 
+    def pool_stats(self) -> dict:
+        """
+        Connection pool of the async httpx client inside google-genai.
+        """
+        api_client = getattr(self.model.client, "_api_client", None)
+        return pool_snapshot(getattr(api_client, "_async_httpx_client", None))
+
     async def stream_system_design(self, payload_text: str):
         prompt = PromptTemplate.from_file("app/prompts/system_design.txt")
         chain = prompt | self.model
@@ -61,14 +114,12 @@ class GeminiLLMProvider(BaseLLM):
         response = await self.generate_text(final_prompt)
 
         try:
-            json_text = extract_json(response)
-            data = json.loads(json_text)
+            data = parse_llm_json(response, "expand_prompt_to_spec")
             data = coerce_architecture_spec(data)
+            return ArchitectureSpec(**data)
         except Exception as e:
             print("Raw response:", response)
-            raise ValueError("Invalid JSON from Gemini")
-
-        return ArchitectureSpec(**data)
+            raise StructuredOutputError("Invalid JSON from Gemini")
 
     async def generate_structured_spec(self, prompt: str):
         """
@@ -77,11 +128,10 @@ class GeminiLLMProvider(BaseLLM):
         response = await self.generate_text(prompt)
 
         try:
-            json_text = extract_json(response)
-            return json.loads(json_text)
+            return parse_llm_json(response, "generate_structured_spec")
         except Exception:
             print("RAW STRUCTURED RESPONSE:\n", response)
-            raise ValueError("Invalid JSON from Gemini")
+            raise StructuredOutputError("Invalid JSON from Gemini")
 
     async def generate_text(self, prompt: str) -> str:
         """
@@ -105,5 +155,29 @@ class GeminiLLMProvider(BaseLLM):
 
         response = await self.generate_text(final_prompt)
 
-        json_text = extract_json(response)
-        return json.loads(json_text)
+        try:
+            return parse_llm_json(response, "analyze_prompt_completeness")
+        except ValueError:
+            raise StructuredOutputError("Invalid completeness JSON from Gemini")
+
+    async def analyze_and_expand(self, prompt: str) -> dict:
+        """
+        Completeness verdict AND expanded spec in a single call.
+        Returns {"is_clear", "questions", "spec": ArchitectureSpec | None}
+        """
+        template = load_prompt("analyze_and_expand.txt")
+        final_prompt = template.replace("{{prompt}}", prompt)
+
+        response = await self.generate_text(final_prompt)
+
+        try:
+            data = parse_llm_json(response, "analyze_and_expand")
+            spec = data.get("spec")
+            if data.get("is_clear") and spec:
+                data["spec"] = ArchitectureSpec(**coerce_architecture_spec(spec))
+            else:
+                data["spec"] = None
+            return data
+        except Exception:
+            print("Raw response:", response)
+            raise StructuredOutputError("Invalid analyze+expand JSON from Gemini")
@@ -3,18 +3,29 @@ from langchain_core.prompts import PromptTemplate
 from app.core.config import settings
 from app.utils.prompt_loader import load_prompt
 from app.schemas.architecture_spec import ArchitectureSpec
-import json
-from app.utils.json_fix import extract_json
+from app.utils.json_repair import parse_llm_json
 from langchain_core.messages import SystemMessage, HumanMessage
+from app.services.llm.base import StructuredOutputError
+from app.utils.spec_coercion import coerce_architecture_spec
 
 class GroqLLMProvider:
-    def __init__(self, temperature: float = 0.2):
+    name = "groq"
+
+    def __init__(self, temperature: float = 0.2, http_client=None, http_async_client=None):
+        self.temperature = temperature
+        self.model_name = settings.LLM_MODEL
         self.model = ChatGroq(
-            model=settings.LLM_MODEL,
+            model=self.model_name,
             api_key=settings.GROQ_API_KEY,
-            temperature=temperature
+            temperature=temperature,
+            http_client=http_client,
+            http_async_client=http_async_client,
         )
 
+    async def shutdown(self):
+        # HTTP clients are owned (and closed) by the ProviderRegistry
+        print("Groq LLM shutdown complete.")
+
     def _get_chat_identity_prompt(self) -> str:
         """
         Loads the identity/personality system prompt for chat.
@@ -35,9 +46,69 @@ class GroqLLMProvider:
             "app/prompts/system_design.txt"
         )
         chain = prompt | self.model
-        result = chain.invoke({"input": payload_text})
+        result = await chain.ainvoke({"input": payload_text})
         return result.content.strip()
 
+    async def stream_system_design(self, payload_text: str):
+        prompt = PromptTemplate.from_file("app/prompts/system_design.txt")
+        chain = prompt | self.model
+
+        # Native async token streaming (no event-loop blocking)
+        async for chunk in chain.astream({"input": payload_text}):
+            if chunk.content:
+                yield chunk.content
+
+    async def generate_component_tree(self, system_design: str) -> dict:
+        prompt = PromptTemplate.from_file(
+            "app/prompts/component_tree.txt"
+        )
+        chain = prompt | self.model
+        result = await chain.ainvoke({"input": system_design})
+        try:
+            return parse_llm_json(result.content, "component_tree")
+        except ValueError:
+            raise StructuredOutputError("Groq returned invalid component tree JSON")
+
+    async def generate_component_subtree(self, system_design: str, outline: str,
+                                         path: str, current: str, instructions: str) -> dict:
+        prompt = PromptTemplate.from_file("app/prompts/component_subtree.txt")
+        chain = prompt | self.model
+        result = await chain.ainvoke({
+            "input": system_design, "outline": outline, "path": path,
+            "current": current, "instructions": instructions,
+        })
+        try:
+            return parse_llm_json(result.content, "component_subtree")
+        except ValueError:
+            raise StructuredOutputError("Groq returned invalid component subtree JSON")
+
+    async def stream_component_tree(self, system_design: str):
+        prompt = PromptTemplate.from_file("app/prompts/component_tree.txt")
+        chain = prompt | self.model
+
+        async for chunk in chain.astream({"input": system_design}):
+            if chunk.content:
+                yield chunk.content
+
+    async def plan_design_outline(self, payload_text: str, max_sections: int) -> dict:
+        prompt = PromptTemplate.from_file("app/prompts/design_outline.txt")
+        chain = prompt | self.model
+        result = await chain.ainvoke({"input": payload_text, "max_sections": max_sections})
+        try:
+            return parse_llm_json(result.content, "design_outline")
+        except ValueError:
+            raise StructuredOutputError("Groq returned invalid design outline JSON")
+
+    async def stream_design_section(self, payload_text: str, outline: str, title: str, focus: str):
+        prompt = PromptTemplate.from_file("app/prompts/design_section.txt")
+        chain = prompt | self.model
+
+        async for chunk in chain.astream({
+            "input": payload_text, "outline": outline, "title": title, "focus": focus,
+        }):
+            if chunk.content:
+                yield chunk.content
+
     async def expand_prompt_to_spec(self, prompt: str) -> ArchitectureSpec:
         template = load_prompt("expand_prompt_to_spec.txt")
         final_prompt = template.replace("{{prompt}}", prompt)
@@ -45,13 +116,74 @@ class GroqLLMProvider:
         response = await self.generate_system_design(final_prompt)
 
         try:
-            json_text = extract_json(response)
-            data = json.loads(json_text)
-        except json.JSONDecodeError:
-            raise ValueError("Groq returned invalid JSON for prompt expansion")
+            data = parse_llm_json(response, "expand_prompt_to_spec")
+            return ArchitectureSpec(**coerce_architecture_spec(data))
+        except ValueError:
+            raise StructuredOutputError("Groq returned invalid JSON for prompt expansion")
+
+    async def generate_text(self, prompt: str) -> str:
+        response = await self.model.ainvoke(prompt)
+        return response.content
+
+    async def generate_structured_spec(self, prompt: str):
+        response = await self.generate_text(prompt)
+
+        try:
+            return parse_llm_json(response, "generate_structured_spec")
+        except ValueError:
+            raise StructuredOutputError("Groq returned invalid JSON")
+
+    async def analyze_prompt_completeness(self, prompt: str) -> dict:
+        """
+        Same contract as the Gemini version; used when Gemini is failed over.
+        """
+        template = load_prompt("analyze_prompt_completeness.txt")
+        final_prompt = template.replace("{{prompt}}", prompt)
+
+        response = await self.generate_text(final_prompt)
+
+        try:
+            return parse_llm_json(response, "analyze_prompt_completeness")
+        except ValueError:
+            raise StructuredOutputError("Groq returned invalid completeness JSON")
+
+    async def analyze_and_expand(self, prompt: str) -> dict:
+        """
+        Same contract as the Gemini version; used when Gemini is failed over.
+        """
+        template = load_prompt("analyze_and_expand.txt")
+        final_prompt = template.replace("{{prompt}}", prompt)
+
+        response = await self.generate_text(final_prompt)
+
+        try:
+            data = parse_llm_json(response, "analyze_and_expand")
+            spec = data.get("spec")
+            if data.get("is_clear") and spec:
+                data["spec"] = ArchitectureSpec(**coerce_architecture_spec(spec))
+            else:
+                data["spec"] = None
+            return data
+        except ValueError:
+            raise StructuredOutputError("Groq returned invalid analyze+expand JSON")
+
+    async def classify_intent(self, message: str) -> str:
+        """
+        Cheap routing check for messages the local classifier is unsure about.
+        """
+        template = load_prompt("classify_intent.txt")
+        final_prompt = template.replace("{{message}}", message)
+
+        response = await self.generate_text(final_prompt)
+
+        try:
+            intent = parse_llm_json(response, "classify_intent").get("intent")
+        except ValueError:
+            raise StructuredOutputError("Groq returned invalid intent JSON")
+        if intent not in ("chat", "generate_architecture"):
+            raise StructuredOutputError(f"Groq returned unknown intent: {intent!r}")
+        return intent
 
-        return ArchitectureSpec(**data)
-    
     async def chat(self, message: str) -> str:
         """
         Pure conversational chat.
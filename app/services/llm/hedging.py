@@ -0,0 +1,246 @@
+import asyncio
+import time
+from collections import deque
+
+from app.core.config import settings
+
+
+class LatencyTracker:
+    """
+    Rolling window of time-to-first-token samples per (provider, method).
+    For non-streaming calls the first token is the whole answer.
+    """
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: dict[tuple[str, str], deque] = {}
+
+    def record(self, provider: str, method: str, seconds: float):
+        key = (provider, method)
+        if key not in self._samples:
+            self._samples[key] = deque(maxlen=self.window)
+        self._samples[key].append(seconds)
+
+    def quantile(self, provider: str, method: str, q: float) -> float | None:
+        samples = self._samples.get((provider, method))
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(q * len(ordered)))
+        return ordered[index]
+
+    def summary(self, provider: str, method: str) -> dict:
+        samples = self._samples.get((provider, method)) or []
+        if not samples:
+            return {"count": 0}
+        ordered = sorted(samples)
+        return {
+            "count": len(ordered),
+            "p50": round(ordered[len(ordered) // 2], 4),
+            "p90": round(ordered[min(len(ordered) - 1, int(0.9 * len(ordered)))], 4),
+        }
+
+
+class HedgePolicy:
+    def __init__(
+        self,
+        enabled: bool = True,
+        quantile: float = 0.9,
+        min_delay_ms: int = 500,
+        max_delay_ms: int = 15000,
+        default_delay_ms: int = 4000,
+    ):
+        self.enabled = enabled
+        self.quantile = quantile
+        self.min_delay = min_delay_ms / 1000
+        self.max_delay = max_delay_ms / 1000
+        self.default_delay = default_delay_ms / 1000
+
+
+class Hedger:
+    """
+    Hedged requests across two providers.
+
+    The primary starts immediately. If it has not produced its first
+    token after an adaptive delay (the primary's rolling TTFT quantile,
+    clamped to the policy bounds), the same request goes to the secondary.
+    Whichever answers first wins; the other one is cancelled.
+    """
+
+    def __init__(self, policies: dict[str, HedgePolicy], enabled: bool = True,
+                 tracker: LatencyTracker | None = None):
+        self.enabled = enabled
+        self.policies = policies
+        self.tracker = tracker or LatencyTracker()
+        self.counters: dict[str, dict[str, int]] = {}
+
+    @classmethod
+    def from_settings(cls) -> "Hedger":
+        return cls(
+            policies={
+                method: HedgePolicy(**options)
+                for method, options in settings.LLM_HEDGE_POLICIES.items()
+            },
+            enabled=settings.LLM_HEDGE_ENABLED,
+        )
+
+    def _policy(self, method: str) -> HedgePolicy | None:
+        policy = self.policies.get(method)
+        if not self.enabled or policy is None or not policy.enabled:
+            return None
+        return policy
+
+    def delay_for(self, method: str, provider: str) -> float:
+        policy = self.policies.get(method) or HedgePolicy()
+        observed = self.tracker.quantile(provider, method, policy.quantile)
+        if observed is None:
+            return policy.default_delay
+        return min(policy.max_delay, max(policy.min_delay, observed))
+
+    def _count(self, method: str, field: str):
+        counters = self.counters.setdefault(
+            method,
+            {"calls": 0, "hedges_fired": 0, "hedge_wins": 0, "primary_wins": 0},
+        )
+        counters[field] += 1
+
+    async def call(self, method: str, primary, secondary, primary_fn, secondary_fn,
+                   on_hedge_win=None):
+        """
+        `primary_fn` / `secondary_fn` are zero-argument coroutine factories.
+        `on_hedge_win(secondary)` runs when the secondary's answer is used.
+        """
+        self._count(method, "calls")
+        policy = self._policy(method)
+        started = time.monotonic()
+
+        primary_task = asyncio.ensure_future(primary_fn())
+
+        if policy is None or secondary is None:
+            try:
+                return await primary_task
+            finally:
+                self._observe(primary, method, started)
+
+        delay = self.delay_for(method, primary.name)
+        done, _ = await asyncio.wait({primary_task}, timeout=delay)
+        if done:
+            self._observe(primary, method, started)
+            return primary_task.result()
+
+        # ⏱️ Primary is slow → hedge to the secondary
+        self._count(method, "hedges_fired")
+        secondary_task = asyncio.ensure_future(secondary_fn())
+        racing = {primary_task: primary, secondary_task: secondary}
+        error = None
+
+        try:
+            while racing:
+                done, _ = await asyncio.wait(racing, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    provider = racing.pop(task)
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    self._count(method, "primary_wins" if provider is primary else "hedge_wins")
+                    if provider is not primary and on_hedge_win is not None:
+                        on_hedge_win(provider)
+                    return task.result()
+            raise error
+        finally:
+            for task in racing:
+                task.cancel()
+            # A losing primary still tells us it took at least this long
+            self._observe(primary, method, started)
+
+    async def stream(self, method: str, primary, secondary, primary_factory, secondary_factory,
+                     on_hedge_win=None):
+        """
+        Hedged token stream. The race is decided on the FIRST token; after
+        that only the winning stream is consumed.
+        """
+        self._count(method, "calls")
+        policy = self._policy(method)
+        started = time.monotonic()
+        hedged = False
+
+        primary_iter = primary_factory().__aiter__()
+        primary_first = asyncio.ensure_future(primary_iter.__anext__())
+        racing = {primary_first: (primary, primary_iter)}
+        winner = None
+
+        try:
+            if policy is not None and secondary is not None:
+                delay = self.delay_for(method, primary.name)
+                done, _ = await asyncio.wait({primary_first}, timeout=delay)
+                if not done:
+                    # ⏱️ No first token yet → hedge to the secondary
+                    hedged = True
+                    self._count(method, "hedges_fired")
+                    secondary_iter = secondary_factory().__aiter__()
+                    secondary_first = asyncio.ensure_future(secondary_iter.__anext__())
+                    racing[secondary_first] = (secondary, secondary_iter)
+
+            error = None
+            while racing and winner is None:
+                done, _ = await asyncio.wait(racing, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    provider, iterator = racing.pop(task)
+                    exc = task.exception()
+                    if exc is not None and not isinstance(exc, StopAsyncIteration):
+                        error = exc
+                        await iterator.aclose()
+                        continue
+                    winner = (task, provider, iterator)
+                    break
+
+            if winner is None:
+                raise error
+        finally:
+            for task, (_, iterator) in racing.items():
+                await self._discard(task, iterator)
+            self._observe(primary, method, started)
+
+        task, provider, iterator = winner
+        if hedged:
+            self._count(method, "primary_wins" if provider is primary else "hedge_wins")
+            if provider is not primary and on_hedge_win is not None:
+                on_hedge_win(provider)
+
+        if isinstance(task.exception(), StopAsyncIteration):
+            return
+
+        try:
+            yield task.result()
+            async for token in iterator:
+                yield token
+        finally:
+            await iterator.aclose()
+
+    def _observe(self, primary, method: str, started: float):
+        self.tracker.record(primary.name, method, time.monotonic() - started)
+
+    async def _discard(self, task: asyncio.Task, iterator):
+        task.cancel()
+        try:
+            await task
+        except BaseException:
+            pass
+        try:
+            await iterator.aclose()
+        except Exception:
+            pass
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "methods": {
+                method: {
+                    **counters,
+                    "hedge_rate": round(counters["hedges_fired"] / counters["calls"], 4)
+                    if counters["calls"] else 0.0,
+                }
+                for method, counters in self.counters.items()
+            },
+        }
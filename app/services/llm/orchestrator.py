@@ -1,53 +1,321 @@
-from app.services.llm.gemini_provider import GeminiLLMProvider
-from app.services.llm.groq_provider import GroqLLMProvider
+import asyncio
+import copy
+import json
+
+from app.services.llm.registry import ProviderRegistry
+from app.services.llm.cache import chunk_text
+from app.services.llm.rate_limit import estimate_tokens
 from app.core.config import settings
+from app.core.llm_retry import PRIMARY_MODEL, FALLBACK_MODEL
 from app.services.input_normalizer import InputNormalizer
+from app.schemas.architecture_spec import ArchitectureSpec
+from app.utils.json_repair import parse_llm_json
 
 class LLMOrchestrator:
-    def __init__(self):
-        self.gemini = None
-        self.groq = None
+    def __init__(self, registry: ProviderRegistry | None = None):
+        self.registry = registry or ProviderRegistry()
+        self.cache = self.registry.cache
+        self.flights = self.registry.flights
+        self.hedger = self.registry.hedger
+        self.executor = self.registry.executor
+        self.limiter = self.registry.limiter
+        self.cancellations = self.registry.cancellations
 
     def _get_gemini(self):
-        if not self.gemini:
-            self.gemini = GeminiLLMProvider(temperature=0.2)
-        return self.gemini
+        return self.registry.gemini(temperature=0.2)
 
     def _get_groq(self):
-        if not self.groq:
-            self.groq = GroqLLMProvider(temperature=0.1)
-        return self.groq
+        return self.registry.groq(temperature=0.1)
 
-    async def generate_system_design(self, payload, prefer="gemini"):
+    def _cache_key(self, method, provider, template, payload):
+        return self.cache.make_key(
+            method=method,
+            provider=provider.name,
+            model=provider.model_name,
+            temperature=provider.temperature,
+            template=template,
+            payload=payload,
+        )
+
+    @staticmethod
+    def _answered_as_keyed(provider, answered: list) -> bool:
+        """
+        Whether the provider that answered is the one the cache key names:
+        no hedge, failover or temperature step-down produced the result.
+        """
+        return bool(answered) and all(
+            getattr(answered[-1], field) == getattr(provider, field)
+            for field in ("name", "model_name", "temperature")
+        )
+
+    async def _cached(self, method, provider, template, payload, call,
+                      encode=None, decode=None):
+        """
+        Serves `call(on_success)` from the response cache when an identical
+        request (same provider, model, temperature, template version and
+        input) was answered before, and coalesces identical in-flight
+        requests into a single upstream call. `on_success(provider)` is
+        told who answered; other providers' answers are not cached.
+        """
+        key = self._cache_key(method, provider, template, payload)
+
+        cached = await self.cache.get(key)
+        if cached is None:
+            async def load():
+                answered = []
+                try:
+                    result = await call(answered.append)
+                except asyncio.CancelledError:
+                    # Every caller went away (client disconnected)
+                    self.cancellations.upstream_cancelled(method)
+                    raise
+                if result is None:
+                    return None
+                value = encode(result) if encode else result
+                if self._answered_as_keyed(provider, answered):
+                    await self.cache.set(key, value)
+                return value
+
+            cached = await self.flights.do(key, load)
+
+        if cached is None:
+            return None
+        # Each caller gets its own copy: the shared value also sits in the
+        # LRU, and callers (normalize_tree…) may change what they get
+        return decode(cached) if decode else copy.deepcopy(cached)
+
+    def _system_design_provider(self, prefer):
         if prefer == "gemini" and settings.GEMINI_API_KEY:
-            return await self._get_gemini().generate_system_design(payload)
-        return await self._get_groq().generate_system_design(payload)
+            return self._get_gemini()
+        return self._get_groq()
+
+    def _configured(self):
+        configured = {
+            "gemini": bool(settings.GEMINI_API_KEY),
+            "groq": bool(settings.GROQ_API_KEY),
+        }
+        return [name for name in (PRIMARY_MODEL, FALLBACK_MODEL) if configured[name]]
+
+    def _candidates(self, primary):
+        """
+        Failover order for a call whose preferred provider is `primary`.
+        """
+        return [primary.name] + [
+            name for name in self._configured() if name != primary.name
+        ]
+
+    def _secondary(self, primary):
+        """
+        The other provider, used for hedging. None unless it is configured
+        and its circuit breaker is not open.
+        """
+        for name in self._configured():
+            if name != primary.name and self.executor.breakers[name].available():
+                return self.registry.provider(name)
+        return None
+
+    async def _limited(self, method, provider, text, call):
+        """
+        Waits for rate-limit admission on `provider`, then runs `call(provider)`.
+        """
+        await self.limiter.admit(provider.name, estimate_tokens(method, text))
+        return await call(provider)
+
+    async def _limited_stream(self, method, provider, text, open_stream):
+        await self.limiter.admit(provider.name, estimate_tokens(method, text))
+        async for token in open_stream(provider):
+            yield token
+
+    def _resilient(self, method, provider, text, call):
+        """
+        Retry / failover / circuit breaking (outer) around a hedged,
+        rate-limited `call(provider)` (inner).
+        """
+        async def attempt(p):
+            secondary = self._secondary(p)
+            return await self.hedger.call(
+                method, p, secondary,
+                lambda: self._limited(method, p, text, call),
+                lambda: self._limited(method, secondary, text, call),
+                on_hedge_win=lambda winner: self.executor.answered_by(winner.name),
+            )
+
+        return lambda on_success=None: self.executor.run(
+            method, self._candidates(provider), attempt, on_success=on_success
+        )
+
+    async def generate_system_design(self, payload, prefer="gemini"):
+        provider = self._system_design_provider(prefer)
+        return await self._cached(
+            "system_design", provider, "system_design.txt", payload,
+            self._resilient(
+                "system_design", provider, payload,
+                lambda p: p.generate_system_design(payload),
+            ),
+        )
 
     async def generate_component_tree(self, system_design):
         if not settings.GEMINI_API_KEY:
             return None
-        return await self._get_gemini().generate_component_tree(system_design)
+        provider = self._get_gemini()
+        return await self._cached(
+            "component_tree", provider, "component_tree.txt", system_design,
+            self._resilient(
+                "component_tree", provider, system_design,
+                lambda p: p.generate_component_tree(system_design),
+            ),
+        )
+
+    async def generate_component_subtree(self, system_design, outline, path,
+                                         current, instructions=""):
+        """
+        Paths (relative to `path`) for one folder of an existing tree.
+        """
+        provider = self._get_gemini() if settings.GEMINI_API_KEY else self._get_groq()
+        text = "\n".join((path, instructions, current, outline, system_design))
+        return await self._cached(
+            "component_subtree", provider, "component_subtree.txt", text,
+            self._resilient(
+                "component_subtree", provider, text,
+                lambda p: p.generate_component_subtree(
+                    system_design, outline, path, current, instructions
+                ),
+            ),
+        )
 
     async def shutdown(self):
-        if self.gemini:
-            await self.gemini.shutdown()
-        if self.groq and hasattr(self.groq, "shutdown"):
-            await self.groq.shutdown()
+        await self.registry.shutdown()
     
     async def stream_system_design(self, payload, prefer="gemini"):
-        if prefer == "gemini" and settings.GEMINI_API_KEY:
-            async for token in self._get_gemini().stream_system_design(payload):
+        provider = self._system_design_provider(prefer)
+        key = self._cache_key("system_design", provider, "system_design.txt", payload)
+
+        # ♻️ Cache hit → replay the stored design as stream chunks
+        cached = await self.cache.get(key)
+        if cached is not None:
+            for chunk in chunk_text(cached):
+                yield chunk
+            return
+
+        # 🔀 Identical concurrent requests share one upstream stream
+        async for token in self.flights.stream(
+            key, lambda: self._stream_upstream(
+                "system_design", key, provider, payload,
+                lambda q: q.stream_system_design(payload),
+            )
+        ):
+            yield token
+
+    async def stream_component_tree(self, system_design):
+        """
+        Raw component-tree JSON chunks as they arrive. The parsed tree is
+        cached under the same key as `generate_component_tree`.
+        """
+        if not settings.GEMINI_API_KEY:
+            return
+        provider = self._get_gemini()
+        key = self._cache_key("component_tree", provider, "component_tree.txt", system_design)
+
+        cached = await self.cache.get(key)
+        if cached is not None:
+            for chunk in chunk_text(json.dumps(cached)):
+                yield chunk
+            return
+
+        def parse(text):
+            try:
+                return parse_llm_json(text, "component_tree_stream")
+            except ValueError:
+                return None  # the caller falls back; nothing to cache
+
+        async for token in self.flights.stream(
+            key, lambda: self._stream_upstream(
+                "component_tree", key, provider, system_design,
+                lambda q: q.stream_component_tree(system_design),
+                encode=parse,
+            )
+        ):
+            yield token
+
+    async def _stream_upstream(self, method, key, provider, text, stream, encode=None):
+        def open_stream(p):
+            secondary = self._secondary(p)
+            return self.hedger.stream(
+                method, p, secondary,
+                lambda: self._limited_stream(method, p, text, stream),
+                lambda: self._limited_stream(method, secondary, text, stream),
+                on_hedge_win=lambda winner: self.executor.answered_by(winner.name),
+            )
+
+        parts, answered = [], []
+        try:
+            async for token in self.executor.stream(
+                method, self._candidates(provider), open_stream, on_success=answered.append
+            ):
+                parts.append(token)
                 yield token
-        else:
-            # Groq fallback (non-streaming → chunked)
-            text = await self._get_groq().generate_system_design(payload)
-            for ch in text:
-                yield ch
+        except (asyncio.CancelledError, GeneratorExit):
+            # Aborted mid-stream: the provider stream is closed on the way out
+            self.cancellations.upstream_cancelled(method, sum(map(len, parts)))
+            raise
+
+        # Only complete streams, and only under the key of who answered
+        value = "".join(parts).strip()
+        if encode is not None:
+            value = encode(value)
+        if value is not None and self._answered_as_keyed(provider, answered):
+            await self.cache.set(key, value)
     
+    def configured_providers(self) -> list[str]:
+        return self._configured()
+
+    async def plan_design_outline(self, payload, max_sections: int):
+        """
+        Section outline for fan-out design generation (short JSON call).
+        """
+        provider = self._get_gemini() if settings.GEMINI_API_KEY else self._get_groq()
+        text = f"{max_sections}\n{payload}"
+        return await self._cached(
+            "design_outline", provider, "design_outline.txt", text,
+            self._resilient(
+                "design_outline", provider, text,
+                lambda p: p.plan_design_outline(payload, max_sections),
+            ),
+        )
+
+    async def stream_design_section(self, payload, outline, title, focus, provider_name):
+        """
+        One fan-out section, streamed from the provider whose slot it holds.
+        """
+        provider = self.registry.provider(provider_name)
+        text = "\n".join((outline, title, focus, payload))
+        key = self._cache_key("design_section", provider, "design_section.txt", text)
+
+        cached = await self.cache.get(key)
+        if cached is not None:
+            for chunk in chunk_text(cached):
+                yield chunk
+            return
+
+        async for token in self.flights.stream(
+            key, lambda: self._stream_upstream(
+                "design_section", key, provider, text,
+                lambda q: q.stream_design_section(payload, outline, title, focus),
+            )
+        ):
+            yield token
+
     async def expand_prompt_to_spec(self, prompt: str):
-        if settings.GEMINI_API_KEY:
-            return await self._get_gemini().expand_prompt_to_spec(prompt)
-        return await self._get_groq().expand_prompt_to_spec(prompt)
+        provider = self._get_gemini() if settings.GEMINI_API_KEY else self._get_groq()
+        return await self._cached(
+            "expand_prompt_to_spec", provider, "expand_prompt_to_spec.txt", prompt,
+            self._resilient(
+                "expand_prompt_to_spec", provider, prompt,
+                lambda p: p.expand_prompt_to_spec(prompt),
+            ),
+            encode=lambda spec: spec.dict(),
+            decode=lambda data: ArchitectureSpec(**data),
+        )
     
     async def generate_structured_spec(self, prompt):
         """
@@ -55,16 +323,84 @@ class LLMOrchestrator:
         Never used for streaming.
         """
         provider = self._get_gemini() if settings.GEMINI_API_KEY else self._get_groq()
-        return await provider.generate_structured_spec(prompt)
+        return await self.executor.run(
+            "generate_structured_spec", self._candidates(provider),
+            lambda p: self._limited(
+                "generate_structured_spec", p, prompt,
+                lambda q: q.generate_structured_spec(prompt),
+            ),
+        )
 
     async def chat(self, message: str) -> str:
         """
         Chat always uses Groq.
         """
-        return await self._get_groq().chat(message)
+        return await self.executor.run(
+            "chat", ["groq"],
+            lambda p: self._limited("chat", p, message, lambda q: q.chat(message)),
+        )
+
+    async def classify_intent(self, message: str) -> str:
+        """
+        Intent fallback for low-confidence local predictions → Groq
+        """
+        provider = self._get_groq()
+        return await self._cached(
+            "classify_intent", provider, "classify_intent.txt", message,
+            lambda on_success: self.executor.run(
+                "classify_intent", ["groq"],
+                lambda p: self._limited(
+                    "classify_intent", p, message, lambda q: q.classify_intent(message)
+                ),
+                on_success=on_success,
+            ),
+        )
 
     async def analyze_prompt_completeness(self, prompt: str) -> dict:
         """
         Prompt analysis / clarification detection → Gemini
         """
-        return await self._get_gemini().analyze_prompt_completeness(prompt)
+        provider = self._get_gemini()
+        return await self._cached(
+            "analyze_prompt_completeness", provider,
+            "analyze_prompt_completeness.txt", prompt,
+            lambda on_success: self.executor.run(
+                "analyze_prompt_completeness", self._candidates(provider),
+                lambda p: self._limited(
+                    "analyze_prompt_completeness", p, prompt,
+                    lambda q: q.analyze_prompt_completeness(prompt),
+                ),
+                on_success=on_success,
+            ),
+        )
+
+    async def analyze_and_expand(self, prompt: str) -> dict:
+        """
+        Fused completeness analysis + spec expansion (one round trip).
+        """
+        provider = self._get_gemini() if settings.GEMINI_API_KEY else self._get_groq()
+
+        def encode(result):
+            spec = result.get("spec")
+            return {**result, "spec": spec.dict() if spec is not None else None}
+
+        def decode(data):
+            spec = data.get("spec")
+            return {**data, "spec": ArchitectureSpec(**spec) if spec else None}
+
+        return await self._cached(
+            "analyze_and_expand", provider, "analyze_and_expand.txt", prompt,
+            lambda on_success: self.executor.run(
+                "analyze_and_expand", self._candidates(provider),
+                lambda p: self._limited(
+                    "analyze_and_expand", p, prompt,
+                    lambda q: q.analyze_and_expand(prompt),
+                ),
+                on_success=on_success,
+            ),
+            encode=encode,
+            decode=decode,
+        )
+
+    def stats(self) -> dict:
+        return self.registry.stats()
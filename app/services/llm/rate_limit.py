@@ -0,0 +1,254 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+
+from app.core.config import settings
+
+# Rough output budget per call, used for the tokens-per-minute estimate
+EXPECTED_OUTPUT_TOKENS = {
+    "system_design": 2000,
+    "component_tree": 800,
+    "expand_prompt_to_spec": 300,
+    "generate_structured_spec": 300,
+    "analyze_prompt_completeness": 200,
+    "analyze_and_expand": 500,
+    "chat": 300,
+    "classify_intent": 20,
+    "design_outline": 200,
+    "design_section": 500,
+    "component_subtree": 300,
+}
+
+
+def estimate_tokens(method: str, text: str) -> int:
+    # ~4 characters per token for English prompts
+    return len(text or "") // 4 + EXPECTED_OUTPUT_TOKENS.get(method, 500)
+
+
+class RateLimitExceeded(RuntimeError):
+    """
+    The call could not be admitted: the provider queue is full or the
+    deadline passed while waiting for budget.
+    """
+
+    def __init__(self, provider: str, reason: str, retry_after: float = 1.0):
+        super().__init__(f"{provider} rate limit: {reason}")
+        self.provider = provider
+        self.retry_after = retry_after
+
+
+class BucketBackend(ABC):
+    """
+    Storage for token buckets. `take` is all-or-nothing across buckets.
+    """
+
+    @abstractmethod
+    async def take(self, buckets: list[tuple[str, float, float, float]]) -> float:
+        """
+        buckets: (key, amount, capacity, refill_per_second)
+        Returns 0 when every bucket was debited, otherwise the seconds to
+        wait until all of them could be (nothing is debited then).
+        """
+
+    async def close(self):
+        pass
+
+
+class InMemoryBucketBackend(BucketBackend):
+    """
+    Per-process buckets. Right for a single worker.
+    """
+
+    def __init__(self):
+        # key -> (tokens, updated_at)
+        self._buckets: dict[str, tuple[float, float]] = {}
+
+    async def take(self, buckets):
+        now = time.monotonic()
+        levels = []
+        wait = 0.0
+
+        for key, amount, capacity, rate in buckets:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            levels.append(tokens)
+            amount = min(amount, capacity)
+            if tokens < amount:
+                wait = max(wait, (amount - tokens) / rate)
+
+        for (key, amount, capacity, _), tokens in zip(buckets, levels):
+            if wait == 0:
+                tokens -= min(amount, capacity)
+            self._buckets[key] = (tokens, now)
+
+        return wait
+
+
+# Same algorithm as InMemoryBucketBackend, atomically inside Redis.
+# KEYS = bucket keys, ARGV = amount, capacity, rate for each key.
+_TAKE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local wait = 0
+local levels = {}
+for i, key in ipairs(KEYS) do
+  local base = (i - 1) * 3
+  local amount = tonumber(ARGV[base + 1])
+  local capacity = tonumber(ARGV[base + 2])
+  local rate = tonumber(ARGV[base + 3])
+  local data = redis.call('HMGET', key, 'tokens', 'ts')
+  local tokens = tonumber(data[1]) or capacity
+  local ts = tonumber(data[2]) or now
+  tokens = math.min(capacity, tokens + (now - ts) * rate)
+  levels[i] = tokens
+  amount = math.min(amount, capacity)
+  if tokens < amount then
+    wait = math.max(wait, (amount - tokens) / rate)
+  end
+end
+for i, key in ipairs(KEYS) do
+  local base = (i - 1) * 3
+  local tokens = levels[i]
+  if wait == 0 then
+    tokens = tokens - math.min(tonumber(ARGV[base + 1]), tonumber(ARGV[base + 2]))
+  end
+  redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', tostring(now))
+  redis.call('EXPIRE', key, 120)
+end
+return tostring(wait)
+"""
+
+
+class RedisBucketBackend(BucketBackend):
+    """
+    Buckets shared by every worker through Redis (or any server that
+    speaks the Redis protocol and EVALSHA).
+    """
+
+    def __init__(self, url: str, prefix: str = "kafei:llm:bucket:"):
+        import redis.asyncio as redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._script = self.client.register_script(_TAKE_SCRIPT)
+
+    async def take(self, buckets):
+        keys = [self.prefix + key for key, *_ in buckets]
+        args = []
+        for _, amount, capacity, rate in buckets:
+            args += [amount, capacity, rate]
+        return float(await self._script(keys=keys, args=args))
+
+    async def close(self):
+        await self.client.aclose()
+
+
+class AdmissionController:
+    """
+    Per-provider admission control in front of every upstream LLM call.
+
+    Each provider has a requests-per-minute and an estimated
+    tokens-per-minute bucket. Calls that do not fit wait in a bounded FIFO
+    queue until budget frees up, instead of hitting the provider and
+    getting a 429. A full queue or a missed deadline raises
+    RateLimitExceeded.
+    """
+
+    def __init__(self, backend: BucketBackend, limits: dict[str, dict[str, int]],
+                 max_queue: int = 100, max_wait: float = 20.0):
+        self.backend = backend
+        self.limits = limits
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+
+        self._locks: dict[str, asyncio.Lock] = {}
+        self.queue_depth: dict[str, int] = {}
+        self.counters: dict[str, dict[str, float]] = {}
+
+    @classmethod
+    def from_settings(cls) -> "AdmissionController":
+        if settings.LLM_RATE_LIMIT_BACKEND == "redis":
+            backend = RedisBucketBackend(settings.LLM_RATE_LIMIT_REDIS_URL)
+        else:
+            backend = InMemoryBucketBackend()
+        return cls(
+            backend,
+            settings.LLM_RATE_LIMITS,
+            max_queue=settings.LLM_ADMISSION_QUEUE_SIZE,
+            max_wait=settings.LLM_ADMISSION_MAX_WAIT_SECONDS,
+        )
+
+    def _buckets(self, provider: str, tokens: int):
+        limits = self.limits.get(provider) or {}
+        buckets = []
+        if limits.get("rpm"):
+            buckets.append((f"{provider}:rpm", 1, limits["rpm"], limits["rpm"] / 60))
+        if limits.get("tpm"):
+            buckets.append((f"{provider}:tpm", tokens, limits["tpm"], limits["tpm"] / 60))
+        return buckets
+
+    def _count(self, provider: str, field: str, value: float = 1):
+        counters = self.counters.setdefault(
+            provider,
+            {"admitted": 0, "rejected": 0, "waited": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0},
+        )
+        counters[field] += value
+
+    async def admit(self, provider: str, tokens: int):
+        buckets = self._buckets(provider, tokens)
+        if not buckets:
+            return
+
+        if self.queue_depth.get(provider, 0) >= self.max_queue:
+            self._count(provider, "rejected")
+            raise RateLimitExceeded(provider, "admission queue full", self.max_wait)
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = started + self.max_wait
+        lock = self._locks.setdefault(provider, asyncio.Lock())
+        self.queue_depth[provider] = self.queue_depth.get(provider, 0) + 1
+
+        try:
+            # FIFO: only the head of the queue polls the buckets
+            try:
+                await asyncio.wait_for(lock.acquire(), deadline - loop.time())
+            except asyncio.TimeoutError:
+                self._count(provider, "rejected")
+                raise RateLimitExceeded(provider, "deadline exceeded in queue")
+
+            try:
+                while True:
+                    wait = await self.backend.take(buckets)
+                    if wait == 0:
+                        break
+                    if loop.time() + wait > deadline:
+                        self._count(provider, "rejected")
+                        raise RateLimitExceeded(provider, "budget exhausted", wait)
+                    await asyncio.sleep(wait)
+            finally:
+                lock.release()
+        finally:
+            self.queue_depth[provider] -= 1
+
+        waited = loop.time() - started
+        self._count(provider, "admitted")
+        if waited > 0.001:
+            self._count(provider, "waited")
+            self._count(provider, "wait_seconds", waited)
+            counters = self.counters[provider]
+            counters["max_wait_seconds"] = max(counters["max_wait_seconds"], waited)
+
+    async def close(self):
+        await self.backend.close()
+
+    def stats(self) -> dict:
+        return {
+            provider: {
+                "queue_depth": self.queue_depth.get(provider, 0),
+                **counters,
+                "avg_wait_seconds": round(counters["wait_seconds"] / counters["waited"], 4)
+                if counters["waited"] else 0.0,
+            }
+            for provider, counters in self.counters.items()
+        }
@@ -0,0 +1,171 @@
+import httpx
+
+from app.core.config import settings
+from app.services.llm.base import pool_snapshot
+from app.services.llm.cache import get_llm_cache
+from app.services.llm.cancellation import get_cancellation_tracker
+from app.services.llm.gemini_provider import GeminiLLMProvider
+from app.services.llm.groq_provider import GroqLLMProvider
+from app.services.llm.hedging import Hedger
+from app.services.llm.rate_limit import AdmissionController
+from app.services.llm.resilience import RetryExecutor
+from app.services.llm.single_flight import get_single_flight
+from app.utils.json_repair import repair_stats
+
+GROQ_BASE_URL = "https://api.groq.com"
+
+DEFAULT_TEMPERATURES = {"gemini": 0.2, "groq": 0.1}
+
+
+class ProviderRegistry:
+    """
+    Process-wide owner of every LLM client.
+
+    Built once in the app lifespan and injected into the services, so all
+    routes share the same provider instances, keep-alive HTTP pools,
+    response cache, single-flight coalescer, hedging statistics and the
+    retry executor with its per-provider circuit breakers and rate limits.
+    """
+
+    def __init__(self, cache=None, flights=None):
+        self.cache = cache or get_llm_cache()
+        self.flights = flights or get_single_flight()
+        self.hedger = Hedger.from_settings()
+        self.executor = RetryExecutor.from_settings(
+            self.provider, DEFAULT_TEMPERATURES.keys()
+        )
+        self.limiter = AdmissionController.from_settings()
+        self.cancellations = get_cancellation_tracker()
+
+        self.limits = httpx.Limits(
+            max_connections=settings.LLM_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_POOL_MAX_KEEPALIVE,
+            keepalive_expiry=settings.LLM_POOL_KEEPALIVE_EXPIRY,
+        )
+        self.timeout = httpx.Timeout(settings.LLM_HTTP_TIMEOUT)
+
+        # (provider name, temperature) -> provider instance
+        self._providers: dict[tuple[str, float], object] = {}
+
+        self._groq_http: httpx.Client | None = None
+        self._groq_async_http: httpx.AsyncClient | None = None
+
+        self.warmed_up: dict[str, bool] = {}
+
+    # -----------------------------
+    # Providers
+    # -----------------------------
+
+    def provider(self, name: str, temperature: float | None = None):
+        if temperature is None:
+            temperature = DEFAULT_TEMPERATURES[name]
+        return self.gemini(temperature) if name == "gemini" else self.groq(temperature)
+
+    def gemini(self, temperature: float = 0.2) -> GeminiLLMProvider:
+        key = ("gemini", temperature)
+        if key not in self._providers:
+            # One google-genai client per temperature, pooled via httpx limits
+            self._providers[key] = GeminiLLMProvider(
+                temperature=temperature,
+                client_args={"limits": self.limits, "timeout": self.timeout},
+            )
+        return self._providers[key]
+
+    def groq(self, temperature: float = 0.1) -> GroqLLMProvider:
+        key = ("groq", temperature)
+        if key not in self._providers:
+            http_client, http_async_client = self._groq_clients()
+            self._providers[key] = GroqLLMProvider(
+                temperature=temperature,
+                http_client=http_client,
+                http_async_client=http_async_client,
+            )
+        return self._providers[key]
+
+    def _groq_clients(self):
+        """
+        All Groq models share one sync and one async keep-alive pool,
+        whatever their temperature.
+        """
+        if self._groq_async_http is None:
+            self._groq_http = httpx.Client(limits=self.limits, timeout=self.timeout)
+            self._groq_async_http = httpx.AsyncClient(
+                limits=self.limits, timeout=self.timeout
+            )
+        return self._groq_http, self._groq_async_http
+
+    # -----------------------------
+    # Lifecycle
+    # -----------------------------
+
+    async def warmup(self):
+        """
+        Opens the TLS connections up front so the first user request
+        does not pay for the handshake. Failures are logged, not raised.
+        """
+        if not settings.LLM_WARMUP:
+            return
+
+        if settings.GROQ_API_KEY:
+            _, client = self._groq_clients()
+            self.groq()
+            try:
+                await client.get(
+                    f"{GROQ_BASE_URL}/openai/v1/models",
+                    headers={"Authorization": f"Bearer {settings.GROQ_API_KEY}"},
+                )
+                self.warmed_up["groq"] = True
+            except httpx.HTTPError as e:
+                print("Groq warmup failed:", e)
+                self.warmed_up["groq"] = False
+
+        if settings.GEMINI_API_KEY:
+            provider = self.gemini()
+            try:
+                await provider.model.async_client.models.get(
+                    model=provider.model_name
+                )
+                self.warmed_up["gemini"] = True
+            except Exception as e:
+                print("Gemini warmup failed:", e)
+                self.warmed_up["gemini"] = False
+
+    async def shutdown(self):
+        for provider in self._providers.values():
+            await provider.shutdown()
+        self._providers.clear()
+
+        if self._groq_async_http is not None:
+            await self._groq_async_http.aclose()
+            self._groq_http.close()
+            self._groq_async_http = None
+            self._groq_http = None
+
+        await self.limiter.close()
+
+        print("LLM provider registry closed.")
+
+    def stats(self) -> dict:
+        gemini_pools = {}
+        for (name, temperature), provider in self._providers.items():
+            if name == "gemini":
+                gemini_pools[str(temperature)] = provider.pool_stats()
+
+        return {
+            "providers": [
+                {"name": name, "temperature": temperature}
+                for name, temperature in self._providers
+            ],
+            "warmed_up": dict(self.warmed_up),
+            "pools": {
+                "groq": pool_snapshot(self._groq_async_http),
+                "gemini": gemini_pools,
+            },
+            "cache": self.cache.stats(),
+            "single_flight": self.flights.stats(),
+            "hedging": self.hedger.stats(),
+            "resilience": self.executor.stats(),
+            "rate_limits": self.limiter.stats(),
+            "cancellation": self.cancellations.stats(),
+            "structured_output": repair_stats.stats(),
+        }
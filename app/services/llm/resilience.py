@@ -0,0 +1,305 @@
+import asyncio
+import random
+import time
+
+from app.core.config import settings
+from app.core.llm_retry import MAX_RETRIES, TEMPERATURE_SEQUENCE
+from app.services.llm.base import StructuredOutputError
+from app.services.llm.rate_limit import RateLimitExceeded
+
+
+class CircuitOpenError(RuntimeError):
+    """Every candidate provider's circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Per-provider breaker.
+
+    closed    → calls flow; consecutive errors (or latency spikes) are counted
+    open      → calls are rejected until `recovery_seconds` have passed
+    half_open → a single probe call decides between closed and open
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_seconds: float = 30,
+        latency_spike_seconds: float | None = None,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.latency_spike_seconds = latency_spike_seconds
+
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+        self.successes = 0
+        self.failures = 0
+        self.latency_spikes = 0
+        self.trips = 0
+        self.rejected = 0
+
+    def available(self) -> bool:
+        """
+        Side-effect free check used to pick hedging partners.
+        """
+        if self.state == self.OPEN:
+            return time.monotonic() - self.opened_at >= self.recovery_seconds
+        return not (self.state == self.HALF_OPEN and self._probe_in_flight)
+
+    def allow(self) -> bool:
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.recovery_seconds:
+                self.rejected += 1
+                return False
+            self.state = self.HALF_OPEN
+
+        if self.state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                self.rejected += 1
+                return False
+            self._probe_in_flight = True
+
+        return True
+
+    def release(self):
+        """
+        The call was abandoned by us (cancelled) → no verdict on the provider.
+        """
+        self._probe_in_flight = False
+
+    def record_success(self, latency: float):
+        self._probe_in_flight = False
+
+        if self.latency_spike_seconds and latency > self.latency_spike_seconds:
+            # Answered, but so slowly that waiting on it is the real outage
+            self.latency_spikes += 1
+            self._register_failure()
+            return
+
+        self.successes += 1
+        self.consecutive_failures = 0
+        self.state = self.CLOSED
+
+    def record_failure(self):
+        self._probe_in_flight = False
+        self.failures += 1
+        self._register_failure()
+
+    def _register_failure(self):
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.trips += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "successes": self.successes,
+            "failures": self.failures,
+            "latency_spikes": self.latency_spikes,
+            "trips": self.trips,
+            "rejected": self.rejected,
+        }
+
+
+class RetryExecutor:
+    """
+    Runs an LLM call with retries, failover and per-provider breakers.
+
+    - provider errors    → breaker failure, jittered backoff, next attempt
+                           fails over to the next candidate provider
+    - parse failures     → same provider, the next temperature in
+                           TEMPERATURE_SEQUENCE below the one it used
+    - open breaker       → provider skipped without waiting for a timeout
+    - rate limited       → next provider right away (not a provider fault)
+    """
+
+    def __init__(self, resolve, breakers: dict[str, CircuitBreaker],
+                 max_retries: int = MAX_RETRIES,
+                 temperatures: list[float] = TEMPERATURE_SEQUENCE,
+                 base_delay: float = 0.25, max_delay: float = 4.0):
+        # resolve(name, temperature | None) -> provider
+        self.resolve = resolve
+        self.breakers = breakers
+        self.max_retries = max_retries
+        self.temperatures = temperatures
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.counters: dict[str, dict[str, int]] = {}
+        # attempt task -> provider that actually answered (a hedge won)
+        self._answered: dict[asyncio.Task, str] = {}
+
+    @classmethod
+    def from_settings(cls, resolve, provider_names) -> "RetryExecutor":
+        breakers = {
+            name: CircuitBreaker(
+                name,
+                failure_threshold=settings.LLM_BREAKER_FAILURE_THRESHOLD,
+                recovery_seconds=settings.LLM_BREAKER_RECOVERY_SECONDS,
+                latency_spike_seconds=settings.LLM_BREAKER_LATENCY_SPIKE_SECONDS,
+            )
+            for name in provider_names
+        }
+        return cls(
+            resolve,
+            breakers,
+            base_delay=settings.LLM_RETRY_BASE_DELAY_MS / 1000,
+            max_delay=settings.LLM_RETRY_MAX_DELAY_MS / 1000,
+        )
+
+    def _count(self, method: str, field: str):
+        counters = self.counters.setdefault(
+            method,
+            {"calls": 0, "retries": 0, "parse_retries": 0, "failovers": 0, "failed": 0},
+        )
+        counters[field] += 1
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: uniform(0, min(max, base * 2^attempt))
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _pick(self, candidates: list[str], start: int):
+        """
+        First candidate (rotating from `start`) whose breaker lets us through.
+        """
+        for offset in range(len(candidates)):
+            index = (start + offset) % len(candidates)
+            if self.breakers[candidates[index]].allow():
+                return index
+        return None
+
+    def _cooler(self, temperature: float | None) -> float:
+        """
+        Next step of TEMPERATURE_SEQUENCE below `temperature` (the floor
+        once there is none), so the first retry is always cooler.
+        """
+        if temperature is None:
+            return self.temperatures[0]
+        return next((t for t in self.temperatures if t < temperature), min(self.temperatures))
+
+    def answered_by(self, name: str):
+        """
+        Called from inside an attempt when another provider than the one
+        it was given produced the result (a hedge won), so the outcome is
+        recorded against that provider's breaker.
+        """
+        self._answered[asyncio.current_task()] = name
+
+    async def run(self, method: str, candidates: list[str], attempt, on_success=None):
+        """
+        `attempt(provider)` performs one call and returns its result;
+        `on_success(provider)` is then called with the provider that
+        answered (a hedge winner, a failover, a cooler retry).
+        """
+        self._count(method, "calls")
+        current = 0
+        temperature = None  # provider default until its output fails to parse
+        last_error: Exception | None = None
+        task = asyncio.current_task()
+
+        for attempt_no in range(self.max_retries):
+            if attempt_no:
+                self._count(method, "retries")
+
+            index = self._pick(candidates, current)
+            if index is None:
+                break
+            if index != current:
+                self._count(method, "failovers")
+                current = index
+
+            name = candidates[current]
+            breaker = self.breakers[name]
+            provider = self.resolve(name, temperature)
+            started = time.monotonic()
+
+            try:
+                result = await attempt(provider)
+            except StructuredOutputError as e:
+                # The provider is healthy, its output was not → cooler retry
+                breaker.record_success(time.monotonic() - started)
+                self._count(method, "parse_retries")
+                temperature = self._cooler(provider.temperature)
+                last_error = e
+                continue
+            except RateLimitExceeded as e:
+                breaker.release()
+                last_error = e
+                current = (current + 1) % len(candidates)
+                continue
+            except asyncio.CancelledError:
+                breaker.release()  # not the provider's fault
+                raise
+            except Exception as e:
+                breaker.record_failure()
+                last_error = e
+                current = (current + 1) % len(candidates)
+                await asyncio.sleep(self._backoff(attempt_no))
+                continue
+            finally:
+                answered = self._answered.pop(task, name)
+
+            if answered != name:
+                # Overtaken by the hedge: credit the secondary, no verdict on `name`
+                breaker.release()
+                breaker = self.breakers[answered]
+                provider = self.resolve(answered, None)  # hedges run at the default
+            breaker.record_success(time.monotonic() - started)
+            if on_success is not None:
+                on_success(provider)
+            return result
+
+        self._count(method, "failed")
+        if last_error is None:
+            raise CircuitOpenError(f"All providers unavailable for {method}: {candidates}")
+        raise last_error
+
+    async def stream(self, method: str, candidates: list[str], open_stream, on_success=None):
+        """
+        Streaming variant. Retries and failover only happen BEFORE the first
+        token; once tokens reached the client the stream cannot be replaced.
+        """
+        first = {}
+
+        async def attempt(provider):
+            iterator = open_stream(provider).__aiter__()
+            try:
+                token = await iterator.__anext__()
+            except StopAsyncIteration:
+                token = None
+            except BaseException:
+                await iterator.aclose()
+                raise
+            first["iterator"] = iterator
+            return token
+
+        token = await self.run(method, candidates, attempt, on_success)
+        iterator = first["iterator"]
+
+        if token is None:
+            return
+        try:
+            yield token
+            async for token in iterator:
+                yield token
+        finally:
+            await iterator.aclose()
+
+    def stats(self) -> dict:
+        return {
+            "breakers": {name: b.stats() for name, b in self.breakers.items()},
+            "methods": {method: dict(c) for method, c in self.counters.items()},
+        }
@@ -0,0 +1,182 @@
+import asyncio
+
+from app.core.config import settings
+
+
+class StreamBroadcast:
+    """
+    Buffers the tokens of ONE upstream stream and replays them to any
+    number of subscribers. A subscriber that joins late first receives
+    every token produced so far, then follows the live stream.
+    """
+
+    def __init__(self):
+        self.tokens: list[str] = []
+        self.done = False
+        self.error: BaseException | None = None
+        self.subscribers = 0
+        self.task: asyncio.Task | None = None
+        self._changed = asyncio.Event()
+
+    def publish(self, token: str):
+        self.tokens.append(token)
+        self._wake()
+
+    def close(self, error: BaseException | None = None):
+        self.done = True
+        self.error = error
+        self._wake()
+
+    def _wake(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def subscribe(self):
+        self.subscribers += 1
+        index = 0
+        try:
+            while True:
+                if index < len(self.tokens):
+                    token = self.tokens[index]
+                    index += 1
+                    yield token
+                    continue
+
+                if self.done:
+                    if self.error is not None:
+                        raise self.error
+                    return
+
+                await self._changed.wait()
+        finally:
+            self.subscribers -= 1
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls.
+
+    `do(key, fn)` runs `fn()` once per key while it is in flight; every
+    other caller with the same key awaits the same result.
+    `stream(key, factory)` does the same for async token streams, fanning
+    the single upstream stream out to all subscribers.
+
+    A call or stream whose last caller leaves (cancelled, client gone)
+    before the end is cancelled upstream, unless `finish_abandoned` is set:
+    then it runs to completion so the result still lands in the cache.
+    """
+
+    def __init__(self, finish_abandoned: bool = False):
+        self.finish_abandoned = finish_abandoned
+        self._calls: dict[str, asyncio.Task] = {}
+        self._waiting: dict[asyncio.Task, int] = {}
+        self._streams: dict[str, StreamBroadcast] = {}
+
+        self.calls_started = 0
+        self.calls_coalesced = 0
+        self.calls_abandoned = 0
+        self.streams_started = 0
+        self.streams_coalesced = 0
+        self.streams_abandoned = 0
+        self.abandoned_finished = 0
+
+    async def do(self, key: str, fn):
+        task = self._calls.get(key)
+
+        if task is None:
+            task = asyncio.create_task(fn())
+            self._calls[key] = task
+            self.calls_started += 1
+            task.add_done_callback(lambda t: self._forget_call(key, t))
+        else:
+            self.calls_coalesced += 1
+
+        # Shielded: one caller going away must not cancel the shared call…
+        self._waiting[task] = self._waiting.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            # …but the last one does, unless abandoned calls are finished
+            if self._waiting[task] == 1 and not task.done():
+                if self.finish_abandoned:
+                    self.abandoned_finished += 1
+                else:
+                    task.cancel()
+                    self.calls_abandoned += 1
+            raise
+        finally:
+            self._waiting[task] -= 1
+            if not self._waiting[task]:
+                del self._waiting[task]
+
+    def _forget_call(self, key: str, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved; waiters re-raise it themselves
+            task.exception()
+
+    async def stream(self, key: str, factory):
+        broadcast = self._streams.get(key)
+
+        if broadcast is None:
+            broadcast = StreamBroadcast()
+            self._streams[key] = broadcast
+            self.streams_started += 1
+            broadcast.task = asyncio.create_task(self._pump(key, broadcast, factory))
+        else:
+            self.streams_coalesced += 1
+
+        subscription = broadcast.subscribe()
+        try:
+            async for token in subscription:
+                yield token
+        finally:
+            await subscription.aclose()
+            # Last subscriber gone before the end → nobody reads the rest
+            if broadcast.subscribers == 0 and not broadcast.done:
+                if self.finish_abandoned:
+                    self.abandoned_finished += 1
+                else:
+                    broadcast.task.cancel()
+                    self.streams_abandoned += 1
+
+    async def _pump(self, key: str, broadcast: StreamBroadcast, factory):
+        try:
+            async for token in factory():
+                broadcast.publish(token)
+        except BaseException as e:
+            broadcast.close(e)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+        else:
+            broadcast.close()
+        finally:
+            if self._streams.get(key) is broadcast:
+                del self._streams[key]
+
+    def stats(self) -> dict:
+        return {
+            "calls_in_flight": len(self._calls),
+            "streams_in_flight": len(self._streams),
+            "calls_started": self.calls_started,
+            "calls_coalesced": self.calls_coalesced,
+            "calls_abandoned": self.calls_abandoned,
+            "streams_started": self.streams_started,
+            "streams_coalesced": self.streams_coalesced,
+            "streams_abandoned": self.streams_abandoned,
+            "abandoned_finished": self.abandoned_finished,
+        }
+
+
+_shared_flights: SingleFlight | None = None
+
+
+def get_single_flight() -> SingleFlight:
+    """
+    Process-wide coalescer shared by every orchestrator instance.
+    """
+    global _shared_flights
+    if _shared_flights is None:
+        _shared_flights = SingleFlight(finish_abandoned=settings.DISCONNECT_POLICY == "finish")
+    return _shared_flights
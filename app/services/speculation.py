@@ -0,0 +1,82 @@
+import asyncio
+import time
+
+from app.services.llm.single_flight import StreamBroadcast
+
+
+class SpeculativeGeneration:
+    """
+    Starts spec expansion and the system-design stream for a prompt
+    BEFORE the completeness analysis has decided it is clear enough.
+
+    The design comes from `GenerationService.design_stream`, after the
+    same embedding recall, so a committed speculation matches the normal
+    /chat path (reuse, seeding, section fan-out).
+
+    Design tokens are buffered in a StreamBroadcast; once the analysis
+    commits the speculation, the client replays the buffer and then
+    follows the live stream. If the prompt needs clarification instead,
+    `cancel()` stops the work and the buffer is discarded.
+    """
+
+    def __init__(self, generator, prompt: str):
+        self.generator = generator
+        self.llm = generator.llm
+        self.prompt = prompt
+        self.started_at = time.monotonic()
+        self.finished_at: float | None = None
+        self.recall = None  # similar past generation, set before spec() resolves
+
+        self.buffer = StreamBroadcast()
+        self._spec = asyncio.get_running_loop().create_future()
+        self.task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        try:
+            spec = await self.llm.expand_prompt_to_spec(self.prompt)
+            spec.inferred = True
+            self.recall = await self.generator.recall(self.generator.describe(spec), spec)
+            self._spec.set_result(spec)
+
+            async for token in self.generator.design_stream(spec.description, self.recall):
+                self.buffer.publish(token)
+        except BaseException as e:
+            if not self._spec.done():
+                self._spec.set_exception(e)
+                self._spec.exception()  # mark retrieved; spec() re-raises
+            self.buffer.close(e)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+        else:
+            self.buffer.close()
+        finally:
+            self.finished_at = time.monotonic()
+
+    async def spec(self):
+        return await asyncio.shield(self._spec)
+
+    def stream(self):
+        return self.buffer.subscribe()
+
+    def buffered_tokens(self) -> int:
+        # ~4 characters per token
+        return sum(len(t) for t in self.buffer.tokens) // 4
+
+    def time_saved(self, committed_at: float) -> float:
+        """
+        Speculative work that overlapped the analysis call.
+        """
+        end = min(committed_at, self.finished_at or committed_at)
+        return max(0.0, end - self.started_at)
+
+    async def cancel(self):
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            # The task's own cancellation is expected; one aimed at the
+            # caller (e.g. a client disconnect) must go on
+            if asyncio.current_task().cancelling():
+                raise
+        except Exception as e:
+            print(f"⚠️ Discarded speculative generation had failed: {e}")
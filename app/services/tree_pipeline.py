@@ -0,0 +1,151 @@
+import asyncio
+import re
+import time
+
+from app.core.config import settings
+
+# A design line that opens one of the sections AFTER components/modules.
+# Once one streams in, everything the component tree is built from is done.
+_LATE_SECTION = re.compile(
+    r"^\s*(?:#{1,6}\s*|\*\*\s*|\d+[.)]\s*)+[^\n]*"
+    r"(data\s*flow|deployment|risks?|trade[- ]?offs?|scal(?:ing|ability)|monitoring)",
+    re.IGNORECASE,
+)
+
+# Things the tail of a design often introduces that the tree should contain
+_TAIL_ARTIFACTS = (
+    (re.compile(r"docker[- ]compose", re.I), "docker-compose.yml"),
+    (re.compile(r"\bdocker(?:file)?\b|\bcontaineri[sz]", re.I), "Dockerfile"),
+    (re.compile(r"\bkubernetes\b|\bk8s\b|\bhelm\b", re.I), "k8s/"),
+    (re.compile(r"\bterraform\b", re.I), "infra/terraform/"),
+    (re.compile(r"github actions", re.I), ".github/workflows/"),
+    (re.compile(r"gitlab[- ]ci", re.I), ".gitlab-ci.yml"),
+)
+
+
+class TreePipeline:
+    """
+    Starts component-tree generation while the design is still streaming.
+
+    `feed(token)` watches the design; as soon as a section after the
+    components (data flow, deployment, risks…) begins and at least
+    `min_chars` arrived, the tree is generated from that head in the
+    background. `events(full_design)` then yields the buffered and live
+    ("node", path) events and a final ("tree", tree) reconciled against
+    the full design. If the trigger never fires, it degrades to the
+    sequential path.
+    """
+
+    def __init__(self, service, min_chars: int | None = None):
+        self.service = service
+        self.min_chars = settings.GENERATION_PIPELINE_MIN_CHARS if min_chars is None else min_chars
+
+        self.parts: list[str] = []
+        self.length = 0
+        self.scanned = 0          # offset of the first line not checked yet
+        self.head: str | None = None
+        self.started_at: float | None = None
+
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.task: asyncio.Task | None = None
+
+    @property
+    def started(self) -> bool:
+        return self.task is not None
+
+    def feed(self, token: str):
+        self.parts.append(token)
+        self.length += len(token)
+        if self.started or self.length < self.min_chars or "\n" not in token:
+            return
+
+        text = "".join(self.parts)
+        self.parts = [text]
+        end = text.rfind("\n")
+        for match in re.finditer(r"[^\n]*\n", text[self.scanned:end + 1]):
+            line_start = self.scanned + match.start()
+            if line_start >= self.min_chars and _LATE_SECTION.match(match.group(0)):
+                self._start(text[:line_start])
+                return
+        self.scanned = end + 1
+
+    def _start(self, head: str):
+        self.head = head
+        self.started_at = time.monotonic()
+        self.service.pipeline_stats["started_early"] += 1
+        self.task = asyncio.create_task(self._run(head))
+
+    async def _run(self, head: str):
+        try:
+            async for event in self.service.stream_component_tree(head):
+                await self.queue.put(event)
+        except Exception as e:
+            await self.queue.put(("error", e))
+
+    async def events(self, system_design: str):
+        stats = self.service.pipeline_stats
+        if not self.started:
+            stats["sequential"] += 1
+            async for event in self.service.stream_component_tree(system_design):
+                yield event
+            return
+
+        stats["head_fraction_sum"] += len(self.head) / max(len(system_design), 1)
+        stats["overlap_seconds"] += time.monotonic() - self.started_at
+
+        seen = set()
+        try:
+            while True:
+                kind, value = await self.queue.get()
+                if kind == "error":
+                    print(f"⚠️ Early component tree failed, using the full design: {value}")
+                    stats["regenerated"] += 1
+                    async for event in self.service.stream_component_tree(system_design):
+                        if event[0] != "node" or event[1] not in seen:
+                            yield event
+                    return
+                if kind == "node":
+                    seen.add(value)
+                    yield kind, value
+                    continue
+
+                tree, added = self.reconcile(value, system_design)
+                if tree is None:
+                    # Tree from the head failed → regenerate from the full design
+                    stats["regenerated"] += 1
+                    tree = await self.service.generate_component_tree_from_design(system_design)
+                elif added:
+                    stats["patched"] += 1
+                for path in added:
+                    if path not in seen:
+                        yield "node", path
+                yield "tree", tree
+                return
+        finally:
+            # Client gone mid-tree: don't let the early tree call run for nobody
+            self.cancel()
+
+    def reconcile(self, tree, system_design: str):
+        """
+        Adds artifacts the design tail introduced (Dockerfile, k8s/, CI…)
+        that the head-based tree lacks. Returns (tree, added_paths), or
+        (None, []) when the tree is unusable.
+        """
+        if not isinstance(tree, dict) or not isinstance(tree.get("folders"), list):
+            return None, []
+
+        tail = system_design[len(self.head):]
+        existing = " ".join(str(p).lower() for p in tree["folders"])
+        added = []
+        for pattern, path in _TAIL_ARTIFACTS:
+            name = path.rstrip("/").rsplit("/", 1)[-1].lower()
+            if pattern.search(tail) and name not in existing and not pattern.search(self.head):
+                added.append(path)
+
+        if added:
+            tree = {**tree, "folders": tree["folders"] + added}
+        return tree, added
+
+    def cancel(self):
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
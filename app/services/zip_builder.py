@@ -1,26 +1,155 @@
-import os
-import zipfile
-import uuid
+import io
 import json
-import tempfile
+import re
+import zipfile
+
+from app.utils.component_tree import ComponentTree
+
+CHUNK_SIZE = 64 * 1024
+ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+# Placeholder written into scaffold files, by extension
+_COMMENT = {
+    ".py": "# {path}\n", ".rb": "# {path}\n", ".sh": "# {path}\n", ".yml": "# {path}\n",
+    ".yaml": "# {path}\n", ".toml": "# {path}\n", ".tf": "# {path}\n",
+    ".js": "// {path}\n", ".jsx": "// {path}\n", ".ts": "// {path}\n", ".tsx": "// {path}\n",
+    ".go": "// {path}\n", ".java": "// {path}\n", ".kt": "// {path}\n", ".rs": "// {path}\n",
+    ".cs": "// {path}\n", ".swift": "// {path}\n", ".css": "/* {path} */\n",
+    ".scss": "/* {path} */\n", ".sql": "-- {path}\n", ".md": "# {name}\n",
+    ".html": "<!-- {path} -->\n",
+}
+
+
+class _Sink(io.RawIOBase):
+    """
+    Write-only, unseekable target for ZipFile: bytes are handed out by
+    `drain()` as soon as they are written, so nothing accumulates.
+    zipfile switches to data descriptors for unseekable output.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    @property
+    def size(self) -> int:
+        return len(self.buffer)
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.buffer += data
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = bytes(self.buffer)
+        self.buffer = bytearray()
+        return data
+
+
+def iter_zip(entries, compresslevel: int = 6, chunk_size: int = CHUNK_SIZE):
+    """
+    Streams a zip archive. `entries` yields (arcname, content): a name
+    ending in "/" is a directory; content is str, bytes or an iterable of
+    either (written chunk by chunk). Memory stays at about one chunk plus
+    the compressor state and the central directory (~100 bytes a file).
+    """
+    sink = _Sink()
+    # Fixed timestamps: the same scaffold always zips to the same bytes,
+    # which is what lets the artifact store deduplicate by content hash
+    mtime = ZIP_EPOCH
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED,
+                         compresslevel=compresslevel) as zf:
+        for arcname, content in entries:
+            if arcname in zf.NameToInfo:
+                continue  # first entry wins (e.g. a tree path shadowing docs/)
+            info = zipfile.ZipInfo(arcname, mtime)
+            if arcname.endswith("/"):
+                info.external_attr = 0o40755 << 16 | 0x10
+                zf.writestr(info, b"")
+            elif isinstance(content, (str, bytes)) or content is None:
+                # Size known up front: no zip64 extra needed
+                info.external_attr = 0o644 << 16
+                zf.writestr(info, content or b"", zipfile.ZIP_DEFLATED, compresslevel)
+            else:
+                info.compress_type = zipfile.ZIP_DEFLATED
+                info.external_attr = 0o644 << 16
+                with zf.open(info, "w", force_zip64=True) as dest:
+                    for chunk in _chunks(content, chunk_size):
+                        dest.write(chunk)
+                        if sink.size >= chunk_size:
+                            yield sink.drain()
+            if sink.size >= chunk_size:
+                yield sink.drain()
+    data = sink.drain()  # rest + central directory
+    if data:
+        yield data
+
+
+def _chunks(content, chunk_size):
+    if content is None:
+        return
+    if isinstance(content, (str, bytes)):
+        content = [content]
+    for part in content:
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        for i in range(0, len(part), chunk_size):
+            yield part[i:i + chunk_size]
+
+
+def project_root(result: dict) -> str:
+    name = (result.get("input_spec") or {}).get("project_name") or "project"
+    return re.sub(r"[^A-Za-z0-9._-]+", "-", name).strip("-.").lower() or "project"
+
+
+def components_diagram(tree: ComponentTree, root: str, max_depth: int = 2) -> str:
+    """
+    Mermaid flowchart of the top folders of the component tree.
+    """
+    ids: dict[str, str] = {}
+    lines = ["flowchart TD", f'    root["{root}"]']
+    for path in tree.outline(max_depth):
+        if not path.endswith("/"):
+            continue
+        node = tree.index[path]
+        ids[path] = f"n{len(ids)}"
+        parent = ids.get(node.parent.path, "root")
+        lines.append(f'    {parent} --> {ids[path]}["{node.name}/"]')
+    return "\n".join(lines) + "\n"
+
 
-def build_zip(response_text: str) -> str:
+def scaffold_entries(result: dict):
     """
-    Creates a temporary folder, writes the generated architecture into a file,
-    zips it, and returns the filename.
+    The generated project as zip entries: README, design, spec, tree,
+    a components diagram, and the component tree as real folders/files.
     """
-    artifact_id = str(uuid.uuid4())
-    temp_dir = tempfile.mkdtemp()
-    scaffold_path = os.path.join(temp_dir, "architecture.txt")
+    root = project_root(result)
+    tree = ComponentTree.from_dict(result.get("component_tree") or {"folders": []})
+    spec = result.get("input_spec") or {}
 
-    # Write result file
-    with open(scaffold_path, "w", encoding="utf-8") as f:
-        f.write(json.dumps(response_text, indent=2, ensure_ascii=False))
+    yield f"{root}/", None
+    yield f"{root}/README.md", (
+        f"# {spec.get('project_name') or root}\n\n{spec.get('description') or ''}\n\n"
+        "See docs/system_design.md for the architecture.\n"
+    )
+    yield f"{root}/docs/", None
+    yield f"{root}/docs/system_design.md", result.get("system_design") or ""
+    yield f"{root}/docs/input_spec.json", json.dumps(spec, indent=2, ensure_ascii=False)
+    yield f"{root}/docs/component_tree.json", json.dumps(tree.to_dict(), indent=2, ensure_ascii=False)
+    yield f"{root}/docs/diagrams/", None
+    yield f"{root}/docs/diagrams/components.mmd", components_diagram(tree, root)
 
-    zip_filename = f"{artifact_id}.zip"
-    zip_filepath = os.path.join(temp_dir, zip_filename)
+    for node in tree.root.walk():
+        if node is tree.root:
+            continue
+        if node.is_dir:
+            yield f"{root}/{node.path}", None
+        else:
+            ext = "." + node.name.rsplit(".", 1)[-1] if "." in node.name else ""
+            template = _COMMENT.get(ext.lower(), "")
+            yield f"{root}/{node.path}", template.format(path=node.path, name=node.name)
 
-    with zipfile.ZipFile(zip_filepath, "w") as zipf:
-        zipf.write(scaffold_path, arcname="architecture.txt")
 
-    return zip_filename
+def iter_scaffold_zip(result: dict):
+    return iter_zip(scaffold_entries(result))
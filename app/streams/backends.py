@@ -0,0 +1,248 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+
+from app.core.config import settings
+
+
+class StreamGone(LookupError):
+    """Unknown or expired stream, or the requested events were evicted."""
+
+
+class ReplayBackend(ABC):
+    """
+    Replay buffers for resumable SSE streams: per stream, the encoded
+    frames numbered from 1 and whether the producer has finished.
+    """
+    name = "base"
+
+    @abstractmethod
+    async def create(self, stream_id: str): ...
+
+    @abstractmethod
+    async def append(self, stream_id: str, frame: str) -> int:
+        """Buffers a frame; returns its number."""
+
+    @abstractmethod
+    async def finish(self, stream_id: str): ...
+
+    @abstractmethod
+    async def attach(self, stream_id: str, delta: int) -> int:
+        """Adds `delta` to the stream's connected followers; returns the count."""
+
+    @abstractmethod
+    async def read(self, stream_id: str, after: int,
+                   timeout: float) -> tuple[list[tuple[int, str]], bool]:
+        """
+        (frames numbered above `after`, finished). Waits up to `timeout`
+        for a new frame; raises StreamGone if they can no longer be replayed.
+        """
+
+    def stats(self) -> dict:
+        return {}
+
+    async def close(self):
+        pass
+
+
+class _Buffer:
+    __slots__ = ("frames", "last", "size", "finished", "updated", "followers")
+
+    def __init__(self):
+        self.frames: deque[tuple[int, str]] = deque()
+        self.last = 0
+        self.size = 0
+        self.finished = False
+        self.updated = time.monotonic()
+        self.followers = 0
+
+
+class InMemoryReplayBackend(ReplayBackend):
+    """
+    Buffers in this process. Each keeps its latest `max_events` frames;
+    all of them together stay under `max_bytes` (least recently written
+    streams go first, finished ones before live ones). A finished stream
+    is dropped `ttl` seconds after its last frame.
+    """
+    name = "memory"
+
+    def __init__(self, ttl: float | None = None, max_events: int | None = None,
+                 max_bytes: int | None = None):
+        self.ttl = ttl or settings.SSE_REPLAY_TTL_SECONDS
+        self.max_events = max_events or settings.SSE_REPLAY_MAX_EVENTS
+        self.max_bytes = max_bytes or settings.SSE_REPLAY_MAX_BYTES
+        self.buffers: OrderedDict[str, _Buffer] = OrderedDict()
+        self.total_bytes = 0
+        self.changed = asyncio.Condition()
+        self.counters = {"expired": 0, "evicted_streams": 0, "dropped_frames": 0}
+
+    def _drop(self, stream_id: str):
+        self.total_bytes -= self.buffers.pop(stream_id).size
+
+    def _prune(self):
+        now = time.monotonic()
+        for stream_id in [
+            stream_id for stream_id, buffer in self.buffers.items()
+            if buffer.finished and now - buffer.updated > self.ttl
+        ]:
+            self._drop(stream_id)
+            self.counters["expired"] += 1
+
+    def _evict(self, keep: str):
+        while self.total_bytes > self.max_bytes and len(self.buffers) > 1:
+            candidates = [s for s in self.buffers if s != keep]
+            victim = next((s for s in candidates if self.buffers[s].finished), candidates[0])
+            self._drop(victim)
+            self.counters["evicted_streams"] += 1
+
+    async def create(self, stream_id):
+        self._prune()
+        self.buffers[stream_id] = _Buffer()
+
+    async def append(self, stream_id, frame):
+        buffer = self.buffers.get(stream_id)
+        if buffer is None:
+            return 0  # evicted while live: later readers get StreamGone
+        buffer.last += 1
+        buffer.frames.append((buffer.last, frame))
+        buffer.size += len(frame)
+        self.total_bytes += len(frame)
+        if len(buffer.frames) > self.max_events:
+            _, old = buffer.frames.popleft()
+            buffer.size -= len(old)
+            self.total_bytes -= len(old)
+            self.counters["dropped_frames"] += 1
+        buffer.updated = time.monotonic()
+        self.buffers.move_to_end(stream_id)
+        self._evict(keep=stream_id)
+        async with self.changed:
+            self.changed.notify_all()
+        return buffer.last
+
+    async def finish(self, stream_id):
+        buffer = self.buffers.get(stream_id)
+        if buffer is not None:
+            buffer.finished = True
+            buffer.updated = time.monotonic()
+        async with self.changed:
+            self.changed.notify_all()
+
+    async def attach(self, stream_id, delta):
+        buffer = self.buffers.get(stream_id)
+        if buffer is None:
+            return 0
+        buffer.followers += delta
+        return buffer.followers
+
+    def _buffer(self, stream_id, after) -> _Buffer:
+        buffer = self.buffers.get(stream_id)
+        if buffer is None:
+            raise StreamGone(stream_id)
+        first = buffer.frames[0][0] if buffer.frames else buffer.last + 1
+        if after + 1 < first:
+            raise StreamGone(f"{stream_id}: events {after + 1}-{first - 1} were evicted")
+        return buffer
+
+    async def read(self, stream_id, after, timeout):
+        buffer = self._buffer(stream_id, after)
+        if buffer.last <= after and not buffer.finished and timeout > 0:
+            async with self.changed:
+                try:
+                    await asyncio.wait_for(self.changed.wait_for(
+                        lambda: buffer.last > after or buffer.finished
+                        or stream_id not in self.buffers
+                    ), timeout)
+                except asyncio.TimeoutError:
+                    pass
+            buffer = self._buffer(stream_id, after)
+        frames = [(n, frame) for n, frame in buffer.frames if n > after]
+        return frames, buffer.finished
+
+    def stats(self):
+        return {
+            "streams": len(self.buffers),
+            "live": sum(not b.finished for b in self.buffers.values()),
+            "bytes": self.total_bytes,
+            **self.counters,
+        }
+
+
+class RedisReplayBackend(ReplayBackend):
+    """
+    Buffers in Redis streams (ids 0-<n>), so a client can reconnect to any
+    app process. Trimmed to about `max_events` frames per stream and
+    expired `ttl` seconds after the last write; overall memory is bounded
+    by the server's own maxmemory policy.
+    """
+    name = "redis"
+
+    def __init__(self, url: str, prefix: str = "kafei:sse:",
+                 ttl: float | None = None, max_events: int | None = None):
+        import redis.asyncio as redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.ttl = int(ttl or settings.SSE_REPLAY_TTL_SECONDS)
+        self.max_events = max_events or settings.SSE_REPLAY_MAX_EVENTS
+
+    def _frames(self, stream_id):
+        return f"{self.prefix}frames:{stream_id}"
+
+    def _meta(self, stream_id):
+        return f"{self.prefix}meta:{stream_id}"
+
+    async def create(self, stream_id):
+        await self.client.hset(self._meta(stream_id), mapping={"last": 0, "finished": 0})
+        await self.client.expire(self._meta(stream_id), self.ttl)
+
+    async def append(self, stream_id, frame):
+        # One producer per stream, so the ids are appended in order
+        n = await self.client.hincrby(self._meta(stream_id), "last", 1)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.xadd(self._frames(stream_id), {"f": frame}, id=f"0-{n}",
+                      maxlen=self.max_events, approximate=True)
+            pipe.expire(self._frames(stream_id), self.ttl)
+            pipe.expire(self._meta(stream_id), self.ttl)
+            await pipe.execute()
+        return n
+
+    async def finish(self, stream_id):
+        await self.client.hset(self._meta(stream_id), "finished", 1)
+
+    async def attach(self, stream_id, delta):
+        # Counted across processes: a client may reconnect to another one
+        return await self.client.hincrby(self._meta(stream_id), "followers", delta)
+
+    async def read(self, stream_id, after, timeout):
+        meta = await self.client.hgetall(self._meta(stream_id))
+        if not meta:
+            raise StreamGone(stream_id)
+        key = self._frames(stream_id)
+        # Checked for after == 0 too: a replay from the start must not be partial
+        head = await self.client.xrange(key, count=1)
+        first = int(head[0][0].split(b"-")[1]) if head else int(meta[b"last"]) + 1
+        if after + 1 < first:
+            raise StreamGone(f"{stream_id}: events {after + 1}-{first - 1} were evicted")
+
+        entries = await self.client.xrange(key, min=f"(0-{after}")  # exclusive start
+        if not entries and meta[b"finished"] == b"0" and timeout > 0:
+            reply = await self.client.xread({key: f"0-{after}"}, block=int(timeout * 1000))
+            entries = reply[0][1] if reply else []
+            meta = await self.client.hgetall(self._meta(stream_id)) or meta
+        frames = [
+            (int(entry_id.split(b"-")[1]), fields[b"f"].decode()) for entry_id, fields in entries
+        ]
+        return frames, meta[b"finished"] == b"1"
+
+    async def close(self):
+        await self.client.aclose()
+
+
+def build_replay_backend(name: str | None = None) -> ReplayBackend:
+    name = name or settings.SSE_REPLAY_BACKEND
+    if name == "memory":
+        return InMemoryReplayBackend()
+    if name == "redis":
+        return RedisReplayBackend(settings.SSE_REPLAY_REDIS_URL)
+    raise ValueError(f"Unknown SSE replay backend: {name}")
@@ -0,0 +1,80 @@
+import asyncio
+
+from fastapi import Request
+
+from app.core.config import settings
+from app.services.llm.cancellation import get_cancellation_tracker
+
+# Generations left to finish after their client went away ("finish" policy)
+_background: set[asyncio.Task] = set()
+
+
+def _spawn(coro):
+    task = asyncio.create_task(coro)
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+    return task
+
+
+async def _disconnected(request: Request, poll: float):
+    while not await request.is_disconnected():
+        await asyncio.sleep(poll)
+
+
+async def _drain(step: asyncio.Future | None, iterator):
+    try:
+        if step is not None:
+            await step
+        async for _ in iterator:
+            pass
+    except Exception as e:
+        print(f"⚠️ Generation failed after its client disconnected: {e}")
+
+
+async def until_disconnected(request: Request, frames, policy: str | None = None,
+                             poll: float | None = None, count: bool = True):
+    """
+    Yields `frames` while the client is connected.
+
+    `request.is_disconnected()` is polled alongside the stream, so a client
+    that leaves is noticed even while nothing is being written (waiting
+    on the model). Then, with policy "cancel", the frame generator is
+    cancelled: the cancellation unwinds through GenerationService and the
+    orchestrator and closes the provider streams. With "finish" the
+    generation runs on in the background (frames discarded), so it still
+    lands in the LLM cache, the embedding store and the design store.
+    """
+    policy = policy or settings.DISCONNECT_POLICY
+    poll = poll or settings.DISCONNECT_POLL_SECONDS
+    watcher = asyncio.create_task(_disconnected(request, poll))
+    iterator = frames.__aiter__()
+    step = None
+    completed = False
+    try:
+        while True:
+            step = asyncio.ensure_future(iterator.__anext__())
+            await asyncio.wait({step, watcher}, return_when=asyncio.FIRST_COMPLETED)
+            if not step.done():
+                return  # client gone
+            try:
+                frame = step.result()
+            except StopAsyncIteration:
+                completed = True
+                return
+            except BaseException:
+                completed = True  # the generation failed, not the client
+                raise
+            step = None
+            yield frame
+    finally:
+        watcher.cancel()
+        if not completed:
+            if count:
+                get_cancellation_tracker().request_disconnected(finished=policy == "finish")
+            # Not awaited here: this may run inside the server's cancelled scope
+            if policy == "finish":
+                _spawn(_drain(step, iterator))
+            elif step is not None and not step.done():
+                step.cancel()
+            else:
+                _spawn(iterator.aclose())
@@ -0,0 +1,174 @@
+import asyncio
+import uuid
+
+from app.core.config import settings
+from app.services.llm.cancellation import get_cancellation_tracker
+from app.streams.backends import ReplayBackend, StreamGone, build_replay_backend
+from app.utils.sse import SSEEncoder
+
+# Seconds between keep-alive comments while a follower waits for frames
+KEEPALIVE_SECONDS = 15
+
+
+def parse_event_id(value: str | None) -> tuple[str, int] | None:
+    """
+    "<stream id>:<n>" (the `id:` of a resumable frame) → (stream id, n).
+    """
+    if not value or ":" not in value:
+        return None
+    stream_id, _, n = value.strip().rpartition(":")
+    if not stream_id or not n.isdigit():
+        return None
+    return stream_id, int(n)
+
+
+class ResumableStreams:
+    """
+    Decouples an SSE stream from the connection that started it.
+
+    The route's frame generator runs as a background producer writing
+    into a replay buffer; each connection only follows the buffer. Frames
+    go out with `id: <stream id>:<n>`, so a client that drops can
+    reconnect with that Last-Event-ID and receive just what it missed
+    while the upstream generation carries on.
+
+    A producer nobody has followed for `reconnect_seconds` is cancelled
+    (policy "cancel") or left to finish into the buffer ("finish").
+    """
+
+    def __init__(self, backend: ReplayBackend | None = None, policy: str | None = None,
+                 reconnect_seconds: float | None = None, poll: float | None = None):
+        self.backend = backend or build_replay_backend()
+        self.policy = policy or settings.DISCONNECT_POLICY
+        self.reconnect_seconds = (
+            settings.DISCONNECT_RECONNECT_SECONDS if reconnect_seconds is None else reconnect_seconds
+        )
+        self.poll = poll or settings.DISCONNECT_POLL_SECONDS
+        self.producers: dict[str, asyncio.Task] = {}
+        self._watchdogs: set[asyncio.Task] = set()
+        self.counters = {
+            "started": 0,
+            "completed": 0,
+            "failed": 0,
+            "cancelled_unfollowed": 0,
+            "finished_unfollowed": 0,
+            "resumed": 0,
+            "replayed_frames": 0,
+            "gone": 0,
+        }
+
+    async def start(self, frames) -> str:
+        """
+        Runs `frames` (an async iterator of SSE frames without ids) to
+        completion in the background; returns the stream id.
+        """
+        stream_id = uuid.uuid4().hex
+        await self.backend.create(stream_id)
+        task = asyncio.create_task(self._produce(stream_id, frames))
+        self.producers[stream_id] = task
+        task.add_done_callback(lambda _: self.producers.pop(stream_id, None))
+
+        watchdog = asyncio.create_task(self._watch(stream_id, task))
+        self._watchdogs.add(watchdog)
+        watchdog.add_done_callback(self._watchdogs.discard)
+        task.add_done_callback(lambda _: watchdog.cancel())
+
+        self.counters["started"] += 1
+        return stream_id
+
+    async def _watch(self, stream_id: str, producer: asyncio.Task):
+        """
+        Cancels (or lets finish) a producer once no client has followed it
+        for `reconnect_seconds`, counted across processes by the backend.
+        """
+        idle = 0.0
+        while True:
+            await asyncio.sleep(self.poll)
+            idle = 0.0 if await self.backend.attach(stream_id, 0) > 0 else idle + self.poll
+            if idle < self.reconnect_seconds:
+                continue
+            if self.policy == "finish":
+                self.counters["finished_unfollowed"] += 1
+                get_cancellation_tracker().request_disconnected(finished=True)
+            else:
+                self.counters["cancelled_unfollowed"] += 1
+                get_cancellation_tracker().request_disconnected(finished=False)
+                producer.cancel()
+            return
+
+    async def _produce(self, stream_id: str, frames):
+        try:
+            async for frame in frames:
+                await self.backend.append(stream_id, frame)
+            self.counters["completed"] += 1
+        except asyncio.CancelledError:
+            # Unfollowed (or shutting down); a late reconnect learns why it stops
+            await self.backend.append(
+                stream_id, SSEEncoder(event_ids=False).event(
+                    {"type": "error", "detail": "Stream cancelled: no client connected"}
+                )
+            )
+            raise
+        except Exception as e:
+            # Followers get an error frame instead of a stream that just stops
+            self.counters["failed"] += 1
+            print(f"⚠️ Stream {stream_id} failed: {e}")
+            await self.backend.append(
+                stream_id, SSEEncoder(event_ids=False).event({"type": "error", "detail": str(e)})
+            )
+        finally:
+            await self.backend.finish(stream_id)
+
+    async def resume(self, stream_id: str, after: int):
+        """
+        Follower for a reconnect; raises StreamGone (before anything is
+        sent) if the stream or the frames after `after` are gone.
+        """
+        try:
+            await self.backend.read(stream_id, after, timeout=0)
+        except StreamGone:
+            self.counters["gone"] += 1
+            raise
+        self.counters["resumed"] += 1
+        return self.follow(stream_id, after, replay=True)
+
+    async def follow(self, stream_id: str, after: int = 0, replay: bool = False):
+        await self.backend.attach(stream_id, 1)
+        try:
+            while True:
+                try:
+                    frames, finished = await self.backend.read(stream_id, after, KEEPALIVE_SECONDS)
+                except StreamGone:
+                    # Evicted under a slow follower: say so rather than hang up silently
+                    yield SSEEncoder(event_ids=False).event(
+                        {"type": "error", "detail": "Stream is no longer available"}
+                    )
+                    return
+                for n, frame in frames:
+                    yield f"id: {stream_id}:{n}\n{frame}"
+                    after = n
+                if replay:
+                    self.counters["replayed_frames"] += len(frames)
+                    replay = False
+                if finished and not frames:
+                    return
+                if not frames:
+                    yield SSEEncoder.keepalive()
+        finally:
+            await self.backend.attach(stream_id, -1)
+
+    async def shutdown(self):
+        tasks = list(self.producers.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.backend.close()
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend.name,
+            "policy": self.policy,
+            "producing": len(self.producers),
+            **self.counters,
+            **self.backend.stats(),
+        }
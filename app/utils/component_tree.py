@@ -0,0 +1,206 @@
+import re
+import sys
+from itertools import islice
+
+# Deeper than this is almost always an LLM looping on a path
+MAX_DEPTH = 16
+_BAD_SEGMENT = re.compile(r'[<>:"|?*\x00-\x1f]')
+_LEADING_DOT = re.compile(r"^(?:\./)+")
+
+
+class TreeNode:
+    """
+    One file or directory. Slotted and with an interned path: scaffolds
+    run to thousands of entries and every path prefix repeats.
+    """
+
+    __slots__ = ("name", "path", "parent", "children")
+
+    def __init__(self, name: str, path: str, parent: "TreeNode | None", is_dir: bool):
+        self.name = name
+        self.path = sys.intern(path)
+        self.parent = parent
+        self.children: dict[str, TreeNode] | None = {} if is_dir else None
+
+    @property
+    def is_dir(self) -> bool:
+        return self.children is not None
+
+    def walk(self):
+        """Pre-order, in insertion order."""
+        yield self
+        if self.children:
+            for child in self.children.values():
+                yield from child.walk()
+
+    def __repr__(self):
+        return f"TreeNode({self.path!r})"
+
+
+class ComponentTree:
+    """
+    Typed view of the `{"folders": [...]}` component tree.
+
+    Paths are normalized ("./app//x" → "app/x", directories end in "/"),
+    missing parent directories are created, a file that turns out to have
+    children becomes a directory, and unusable entries (absolute, "..",
+    illegal characters, too deep) are dropped and reported in `issues`. `index` maps every path to its
+    node.
+    """
+
+    def __init__(self):
+        self.root = TreeNode("", "", None, is_dir=True)
+        self.index: dict[str, TreeNode] = {}
+        self.issues: list[str] = []
+        self._inserted = 0  # index insertions; new keys always go last
+
+    # ---------- building ----------
+
+    @classmethod
+    def from_dict(cls, data) -> "ComponentTree":
+        tree = cls()
+        if not isinstance(data, dict) or not isinstance(data.get("folders"), list):
+            tree.issues.append("component_tree must be an object with a 'folders' list")
+            return tree
+        tree.extend(data["folders"])
+        return tree
+
+    @classmethod
+    def from_paths(cls, paths) -> "ComponentTree":
+        tree = cls()
+        tree.extend(paths)
+        return tree
+
+    def extend(self, paths, base: str = ""):
+        for raw in paths:
+            self.add(raw, base)
+
+    def add(self, raw, base: str = "") -> TreeNode | None:
+        if not isinstance(raw, str):
+            self.issues.append(f"not a path: {raw!r}")
+            return None
+        path = raw.strip().replace("\\", "/")
+        if path.startswith("/") or re.match(r"^[A-Za-z]:/", path):
+            self.issues.append(f"absolute path: {raw!r}")
+            return None
+
+        is_dir = path.endswith("/")
+        parts = [p for p in path.split("/") if p not in ("", ".")]
+        if base:
+            parts = [p for p in base.split("/") if p] + parts
+        if not parts:
+            self.issues.append(f"empty path: {raw!r}")
+            return None
+        if ".." in parts:
+            self.issues.append(f"path escapes the project: {raw!r}")
+            return None
+        if len(parts) > MAX_DEPTH:
+            self.issues.append(f"path deeper than {MAX_DEPTH}: {raw!r}")
+            return None
+        if any(_BAD_SEGMENT.search(p) for p in parts):
+            self.issues.append(f"illegal characters: {raw!r}")
+            return None
+
+        node = self.root
+        for depth, name in enumerate(parts):
+            leaf = depth == len(parts) - 1
+            child = node.children.get(name)
+            if child is None:
+                prefix = node.path
+                child_dir = is_dir or not leaf
+                child = TreeNode(name, prefix + name + ("/" if child_dir else ""), node, child_dir)
+                node.children[name] = child
+                self.index[child.path] = child
+                self._inserted += 1
+            elif not child.is_dir and (not leaf or is_dir):
+                # "app/routes" listed before "app/routes/x.py": it was a directory
+                self._promote(child)
+            node = child
+        return node
+
+    def add_new(self, raw, base: str = "") -> list[str]:
+        """
+        Adds `raw` and returns the paths that appeared (missing parents
+        first, or the new path of a file promoted to a directory), for
+        emitting a streamed tree entry by entry.
+        """
+        before = self._inserted
+        self.add(raw, base)
+        return list(islice(reversed(self.index), self._inserted - before))[::-1]
+
+    def _promote(self, node: TreeNode):
+        del self.index[node.path]
+        node.path = sys.intern(node.path + "/")
+        node.children = {}
+        self.index[node.path] = node
+        self._inserted += 1
+
+    # ---------- queries ----------
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, path: str):
+        return path in self.index
+
+    def get(self, path: str) -> TreeNode | None:
+        return self.index.get(path) or self.index.get(path.rstrip("/") + "/")
+
+    def paths(self, under: TreeNode | None = None) -> list[str]:
+        start = under or self.root
+        return [n.path for n in start.walk() if n is not self.root and n is not under]
+
+    def to_dict(self) -> dict:
+        return {"folders": self.paths()}
+
+    def outline(self, max_depth: int = 2) -> list[str]:
+        """Paths down to `max_depth` levels, for prompts that need context."""
+        return [p for p in self.paths() if p.rstrip("/").count("/") < max_depth]
+
+    # ---------- comparing / editing ----------
+
+    def diff(self, other: "ComponentTree") -> dict:
+        """
+        Structural diff from self to `other`: added / removed paths and
+        entries that turned from a file into a directory or back.
+        """
+        mine = {p.rstrip("/"): p for p in self.index}
+        theirs = {p.rstrip("/"): p for p in other.index}
+        return {
+            "added": [theirs[k] for k in theirs if k not in mine],
+            "removed": [mine[k] for k in mine if k not in theirs],
+            "changed": [theirs[k] for k in theirs if k in mine and mine[k] != theirs[k]],
+        }
+
+    def splice(self, path: str, paths) -> "ComponentTree":
+        """
+        A new tree with everything under directory `path` replaced by
+        `paths` (relative to `path`, or already prefixed with it).
+        """
+        target = self.get(path)
+        if target is None or not target.is_dir:
+            raise KeyError(f"No directory {path!r} in the component tree")
+
+        spliced = ComponentTree()
+        replaced = False
+        for node in self.root.walk():
+            if node is self.root:
+                continue
+            if node.path.startswith(target.path) and node is not target:
+                if not replaced:
+                    replaced = True
+                    spliced._add_subtree(target.path, paths)
+                continue
+            spliced.add(node.path)
+            if node is target and not target.children:
+                replaced = True
+                spliced._add_subtree(target.path, paths)
+        return spliced
+
+    def _add_subtree(self, prefix: str, paths):
+        for raw in paths:
+            path = _LEADING_DOT.sub("", raw.strip()) if isinstance(raw, str) else raw
+            if isinstance(path, str) and path.startswith(prefix):
+                self.add(path)
+            else:
+                self.add(raw, base=prefix)
@@ -0,0 +1,264 @@
+import json
+import re
+
+from app.utils.json_fix import extract_json
+
+_BARE_WORD = re.compile(r"[A-Za-z0-9_.+\-$]+")
+_PY_LITERALS = {
+    "True": "true", "False": "false", "None": "null",
+    "true": "true", "false": "false", "null": "null",
+    "NaN": "null", "Infinity": "null", "-Infinity": "null", "undefined": "null",
+}
+_NUMBER = re.compile(r"-?(0|[1-9]\d*)(\.\d+)?([eE][+-]?\d+)?$")
+
+
+class _Frame:
+    __slots__ = ("closer", "expect")
+
+    def __init__(self, closer):
+        self.closer = closer
+        # "}": key | colon | value | comma ; "]": value | comma
+        self.expect = "key" if closer == "}" else "value"
+
+
+def repair_json(text: str) -> str:
+    """
+    Rewrites almost-JSON from an LLM into valid JSON text.
+
+    Fixes: prose / code fences around the value, // # and /* */ comments,
+    single-quoted strings, unquoted keys, Python literals, raw newlines in
+    strings, trailing or missing commas, mismatched closers and truncated
+    output (open brackets are closed; a cut-off string value and dangling
+    keys are dropped, so `"app/ro` never becomes a real path).
+    Raises ValueError when there is no object or array to salvage.
+    """
+    if not text:
+        raise ValueError("Empty response from LLM")
+
+    out: list[str] = []
+    stack: list[_Frame] = []
+    i, n = 0, len(text)
+
+    # Skip prose and fences before the root value
+    while i < n and text[i] not in "{[":
+        i += 1
+    if i == n:
+        raise ValueError("No JSON found in LLM response")
+
+    def value_written():
+        if stack:
+            stack[-1].expect = "comma"
+
+    def before_value():
+        frame = stack[-1] if stack else None
+        if frame is None:
+            return
+        if frame.expect == "comma":
+            # Two values with no comma between them
+            out.append(",")
+            frame.expect = "key" if frame.closer == "}" else "value"
+        elif frame.expect == "colon":
+            out.append(":")
+            frame.expect = "value"
+
+    while i < n:
+        ch = text[i]
+
+        # Strings (either quote style) → double-quoted JSON string
+        if ch in "\"'":
+            frame = stack[-1] if stack else None
+            is_key = frame is not None and frame.closer == "}" and frame.expect in ("key", "comma")
+            if not is_key:
+                before_value()
+            elif frame.expect == "comma":
+                out.append(",")
+            quote, i = ch, i + 1
+            buf = ['"']
+            closed = False
+            while i < n:
+                c = text[i]
+                if c == "\\" and i + 1 < n:
+                    nxt = text[i + 1]
+                    if nxt == "'":
+                        buf.append("'")
+                    elif nxt in '"\\/bfnrtu':
+                        buf.append("\\" + nxt)
+                    else:
+                        buf.append("\\\\" + nxt)  # invalid escape → literal backslash
+                    i += 2
+                    continue
+                if c == quote:
+                    closed = True
+                    i += 1
+                    break
+                if c == '"':
+                    buf.append('\\"')
+                elif c == "\n":
+                    buf.append("\\n")
+                elif c == "\r":
+                    buf.append("\\r")
+                elif c == "\t":
+                    buf.append("\\t")
+                else:
+                    buf.append(c)
+                i += 1
+            if not closed and not is_key:
+                # Truncated mid-value: a partial string is not data. The
+                # frame still expects a value, so the closing pass drops
+                # the comma or key that led to it.
+                break
+            if buf[-1] == "\\":  # truncated inside an escape
+                buf.pop()
+            buf.append('"')
+            out.append("".join(buf))
+            if is_key:
+                frame.expect = "colon"
+            else:
+                value_written()
+            if not closed:
+                break
+            continue
+
+        # Comments
+        if ch == "/" and text.startswith("//", i) or ch == "#":
+            end = text.find("\n", i)
+            i = n if end == -1 else end + 1
+            continue
+        if ch == "/" and text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            i = n if end == -1 else end + 2
+            continue
+
+        if ch in " \t\r\n`":
+            i += 1
+            continue
+
+        if ch in "{[":
+            before_value()
+            stack.append(_Frame("}" if ch == "{" else "]"))
+            out.append(ch)
+            i += 1
+            continue
+
+        if ch in "}]":
+            # Close everything up to the matching bracket (mismatches are
+            # treated as the closer the structure actually needs)
+            frame = stack.pop()
+            _finish_frame(out, frame)
+            out.append(frame.closer)
+            i += 1
+            if not stack:
+                break
+            value_written()
+            continue
+
+        if ch == ",":
+            frame = stack[-1]
+            if frame.expect == "comma":
+                out.append(",")
+                frame.expect = "key" if frame.closer == "}" else "value"
+            i += 1
+            continue
+
+        if ch == ":":
+            frame = stack[-1]
+            if frame.expect == "colon":
+                out.append(":")
+                frame.expect = "value"
+            i += 1
+            continue
+
+        match = _BARE_WORD.match(text, i)
+        if not match:
+            i += 1  # stray character (e.g. "=" or "…") — drop it
+            continue
+        word = match.group(0)
+        i = match.end()
+        frame = stack[-1]
+        if frame.closer == "}" and frame.expect in ("key", "comma"):
+            if frame.expect == "comma":
+                out.append(",")
+            out.append(json.dumps(word))
+            frame.expect = "colon"
+            continue
+        before_value()
+        if word in _PY_LITERALS:
+            out.append(_PY_LITERALS[word])
+        elif _NUMBER.match(word):
+            out.append(word)
+        else:
+            out.append(json.dumps(word))
+        value_written()
+
+    # Truncated output: close whatever is still open
+    while stack:
+        frame = stack.pop()
+        _finish_frame(out, frame)
+        out.append(frame.closer)
+        value_written()
+
+    return "".join(out)
+
+
+def _finish_frame(out: list[str], frame: _Frame):
+    """
+    Drops a dangling key or colon before the frame is closed.
+    """
+    if frame.closer == "}" and frame.expect in ("colon", "value"):
+        # Remove `"key"` or `"key":` that never got a value
+        if frame.expect == "value":
+            out.pop()  # ":"
+        out.pop()      # "key"
+    if out and out[-1] == ",":
+        out.pop()
+
+
+class RepairStats:
+    """
+    Per-method outcome counters for structured LLM output:
+    clean (parsed as-is), repaired locally, or regenerated (a new call).
+    """
+
+    def __init__(self):
+        self.counters: dict[str, dict[str, int]] = {}
+
+    def record(self, method: str, outcome: str):
+        counts = self.counters.setdefault(
+            method, {"clean": 0, "repaired": 0, "regenerated": 0}
+        )
+        counts[outcome] += 1
+
+    def stats(self) -> dict:
+        report = {}
+        for method, counts in self.counters.items():
+            defective = counts["repaired"] + counts["regenerated"]
+            report[method] = {
+                **counts,
+                "repair_rate": round(counts["repaired"] / defective, 4) if defective else None,
+                "round_trips_saved": counts["repaired"],
+            }
+        return report
+
+
+repair_stats = RepairStats()
+
+
+def parse_llm_json(text: str, method: str = "unknown"):
+    """
+    json.loads for LLM replies: strict parse first, local repair second.
+    Raises ValueError only when both fail (the caller then regenerates).
+    """
+    try:
+        value = json.loads(extract_json(text))
+        repair_stats.record(method, "clean")
+        return value
+    except ValueError:
+        pass
+
+    try:
+        value = json.loads(repair_json(text))
+    except ValueError:
+        repair_stats.record(method, "regenerated")
+        raise
+    repair_stats.record(method, "repaired")
+    return value
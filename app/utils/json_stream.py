@@ -0,0 +1,208 @@
+import json
+
+_WHITESPACE = " \t\r\n"
+_LITERALS = {"true": True, "false": False, "null": None}
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class _Frame:
+    __slots__ = ("container", "path", "key", "expect")
+
+    def __init__(self, container, path, expect):
+        self.container = container
+        self.path = path
+        self.key = None
+        # dict: key | colon | value | comma ; list: value | comma
+        self.expect = expect
+
+
+class IncrementalJSONParser:
+    """
+    Push parser for JSON arriving in arbitrary LLM chunks.
+
+    `feed(chunk)` returns the array items completed by that chunk as
+    `(path, value)` pairs — e.g. `(("folders", 3), "app/routes/")` — so
+    callers can render a tree entry as soon as its closing quote/bracket
+    arrives. Anything before the first `{`/`[` (```json fences, prose) and
+    after the root value closes is skipped on the fly. Trailing commas are
+    tolerated.
+    """
+
+    def __init__(self):
+        self.started = False
+        self.done = False
+        self.root = None
+        self.stack: list[_Frame] = []
+
+        self._string: list[str] | None = None  # open string buffer
+        self._escape = ""                      # pending escape sequence
+        self._scalar: list[str] | None = None  # open number / literal
+        self._last_string = ""
+
+    # ---------- public ----------
+
+    def feed(self, chunk: str) -> list[tuple[tuple, object]]:
+        events = []
+        i, n = 0, len(chunk)
+
+        while i < n and not self.done:
+            if self._string is not None:
+                i = self._feed_string(chunk, i)
+                if self._string is None:
+                    self._string_closed(events)
+                continue
+
+            ch = chunk[i]
+
+            if not self.started:
+                if ch in "{[":
+                    self.started = True
+                    self._open(ch)
+                i += 1
+                continue
+
+            if self._scalar is not None:
+                if ch in _WHITESPACE or ch in ",]}":
+                    self._close_scalar(events)
+                    continue  # re-read the delimiter
+                self._scalar.append(ch)
+                i += 1
+                continue
+
+            i += 1
+            if ch in _WHITESPACE:
+                continue
+
+            frame = self.stack[-1]
+            is_dict = isinstance(frame.container, dict)
+
+            if ch == '"':
+                self._string = []
+            elif ch == ":" and is_dict and frame.expect == "colon":
+                frame.expect = "value"
+            elif ch == ",":
+                frame.expect = "key" if is_dict else "value"
+            elif ch in "}]":
+                self._close(events)
+            elif ch in "{[":
+                self._open(ch)
+            elif ch == "`":
+                # A fence glued to the closing bracket; the root is still open
+                continue
+            else:
+                self._scalar = [ch]
+
+        return events
+
+    def close(self):
+        """
+        Returns the parsed root value; raises ValueError if it never closed.
+        """
+        if not self.done:
+            raise ValueError("Incomplete JSON: stream ended before the root value closed")
+        return self.root
+
+    # ---------- internals ----------
+
+    def _child_path(self, frame: _Frame) -> tuple:
+        if isinstance(frame.container, dict):
+            return frame.path + (frame.key,)
+        return frame.path + (len(frame.container),)
+
+    def _open(self, ch):
+        path = self._child_path(self.stack[-1]) if self.stack else ()
+        if ch == "{":
+            self.stack.append(_Frame({}, path, "key"))
+        else:
+            self.stack.append(_Frame([], path, "value"))
+
+    def _close(self, events):
+        frame = self.stack.pop()
+        self._complete(frame.container, events)
+
+    def _complete(self, value, events):
+        if not self.stack:
+            self.root = value
+            self.done = True
+            return
+
+        parent = self.stack[-1]
+        if isinstance(parent.container, dict):
+            parent.container[parent.key] = value
+        else:
+            events.append((self._child_path(parent), value))
+            parent.container.append(value)
+        parent.expect = "comma"
+
+    def _feed_string(self, chunk: str, i: int) -> int:
+        n = len(chunk)
+        while i < n:
+            if self._escape:
+                self._escape += chunk[i]
+                i += 1
+                if self._escape[1] == "u":
+                    if len(self._escape) < 6:
+                        continue
+                    self._append_code_point(int(self._escape[2:], 16))
+                else:
+                    self._string.append(_ESCAPES.get(self._escape[1], self._escape[1]))
+                self._escape = ""
+                continue
+
+            # Copy the run up to the next quote or backslash in one go
+            quote = chunk.find('"', i)
+            slash = chunk.find("\\", i)
+            stop = min(p for p in (quote, slash, n) if p != -1)
+            if stop > i:
+                self._string.append(chunk[i:stop])
+            i = stop
+            if i == n:
+                break
+            if chunk[i] == "\\":
+                self._escape = "\\"
+                i += 1
+            else:
+                value = "".join(self._string)
+                self._string = None
+                self._last_string = value
+                return i + 1
+        return i
+
+    def _append_code_point(self, code):
+        last = self._string[-1] if self._string else ""
+        if 0xDC00 <= code <= 0xDFFF and last and 0xD800 <= ord(last[-1]) <= 0xDBFF:
+            # Second half of a \uXXXX surrogate pair
+            high = ord(last[-1])
+            self._string[-1] = last[:-1]
+            code = 0x10000 + ((high - 0xD800) << 10) + (code - 0xDC00)
+        self._string.append(chr(code))
+
+    def _string_closed(self, events):
+        value = self._last_string
+        frame = self.stack[-1]
+        if isinstance(frame.container, dict) and frame.expect == "key":
+            frame.key = value
+            frame.expect = "colon"
+        else:
+            self._complete(value, events)
+
+    def _close_scalar(self, events):
+        text = "".join(self._scalar)
+        self._scalar = None
+        if text in _LITERALS:
+            value = _LITERALS[text]
+        else:
+            try:
+                value = json.loads(text)
+            except ValueError:
+                raise ValueError(f"Invalid JSON literal: {text!r}")
+        self._complete(value, events)
+
+
+def iter_tree_nodes(events, array_key: str = "folders"):
+    """
+    Filters parser events down to entries of the top-level `array_key` list.
+    """
+    for path, value in events:
+        if len(path) == 2 and path[0] == array_key:
+            yield value
@@ -1,7 +1,101 @@
+import json
+import re
+import typing
+
+from app.schemas.architecture_spec import ArchitectureSpec
+
+_LIST_SPLIT = re.compile(r"\n|;|,(?![^()]*\))")
+_BULLET = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+
+
+def _canonical(key: str) -> str:
+    # "Tech Stack", "techStack", "tech-stack" → "techstack"
+    return re.sub(r"[^a-z0-9]", "", str(key).lower())
+
+
+def _as_str(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, list):
+        return " ".join(_as_str(v) for v in value if v is not None)
+    if isinstance(value, dict):
+        return json.dumps(value)
+    return str(value)
+
+
+def _as_str_list(value, separator=_LIST_SPLIT) -> list[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        parts = separator.split(value)
+    elif isinstance(value, dict):
+        # {"frontend": "React", "backend": "FastAPI"} → ["React", "FastAPI"]
+        parts = [p for v in value.values() for p in _as_str_list(v, separator)]
+    elif isinstance(value, list):
+        parts = value
+    else:
+        parts = [value]
+
+    items = []
+    for part in parts:
+        if isinstance(part, (list, dict)):
+            items.extend(_as_str_list(part, separator))
+            continue
+        text = _BULLET.sub("", _as_str(part)).strip()
+        if text:
+            items.append(text)
+    return items
+
+
+def coerce_to_schema(data: dict, model) -> dict:
+    """
+    Schema-guided cleanup of LLM output BEFORE Pydantic validation:
+    matches keys by name regardless of case / spacing / camelCase,
+    coerces str ⇄ list[str] ⇄ bool and fills missing fields with empty
+    values so a near-miss validates instead of costing a new LLM call.
+    """
+    if not isinstance(data, dict):
+        raise ValueError(f"Expected a JSON object for {model.__name__}")
+
+    fields = getattr(model, "model_fields", None) or model.__fields__
+    by_canonical = {_canonical(k): k for k in data}
+    coerced = {}
+
+    for name, field in fields.items():
+        annotation = getattr(field, "annotation", None) or field.outer_type_
+        source = name if name in data else by_canonical.get(_canonical(name))
+        required = field.is_required() if hasattr(field, "is_required") else field.required
+
+        if source is None:
+            if not required:
+                continue
+            value = None
+        else:
+            value = data[source]
+
+        if annotation is str:
+            coerced[name] = _as_str(value)
+        elif typing.get_origin(annotation) is list:
+            coerced[name] = _as_str_list(value)
+        elif annotation is bool:
+            if isinstance(value, str):
+                value = value.strip().lower() in ("true", "yes", "1")
+            coerced[name] = bool(value)
+        else:
+            coerced[name] = value
+
+    return coerced
+
+
 def coerce_architecture_spec(data: dict) -> dict:
     """
     Fix common LLM type mismatches BEFORE Pydantic validation.
     """
+    data = dict(data)
+
+    # Historical separators: requirements one per line, tech stack comma-separated
     if "requirements" in data and isinstance(data["requirements"], str):
         data["requirements"] = [
             r.strip()
@@ -16,7 +110,4 @@ def coerce_architecture_spec(data: dict) -> dict:
             if t.strip()
         ]
 
-    if "use_case" in data and isinstance(data["use_case"], list):
-        data["use_case"] = " ".join(data["use_case"])
-
-    return data
+    return coerce_to_schema(data, ArchitectureSpec)
@@ -0,0 +1,147 @@
+import asyncio
+import json
+from json.encoder import encode_basestring_ascii  # C-accelerated string escaper
+
+from app.core.config import settings
+
+class SSEEncoder:
+    """
+    Server-Sent Events encoder shared by the streaming routes.
+
+    - Token events are coalesced: tokens arriving within `window_ms`
+      (or until `max_bytes` is buffered) go out as ONE frame.
+    - The token envelope is pre-rendered per event type, so each frame
+      only escapes the chunk string instead of running `json.dumps`
+      over a whole dict.
+    - Every frame can carry a monotonically increasing `id:` field.
+
+    Frames keep the existing wire format:
+        data: {"type": "system_design", "chunk": "..."}
+    """
+
+    def __init__(
+        self,
+        window_ms: int | None = None,
+        max_bytes: int | None = None,
+        event_ids: bool | None = None,
+    ):
+        self.window = (
+            settings.SSE_COALESCE_WINDOW_MS if window_ms is None else window_ms
+        ) / 1000
+        self.max_bytes = (
+            settings.SSE_COALESCE_MAX_BYTES if max_bytes is None else max_bytes
+        )
+        self.event_ids = settings.SSE_EVENT_IDS if event_ids is None else event_ids
+        self.last_id = 0
+        self._envelopes: dict[str, str] = {}
+
+    def _frame(self, data: str, event_id: int | None = None) -> str:
+        if event_id is not None:
+            return f"id: {event_id}\ndata: {data}\n\n"
+        if not self.event_ids:
+            return f"data: {data}\n\n"
+        self.last_id += 1
+        return f"id: {self.last_id}\ndata: {data}\n\n"
+
+    def event(self, payload: dict, event_id: int | None = None) -> str:
+        """
+        Encodes a complete stage event (input_spec, component_tree, done).
+        Stage events are written immediately, never batched. `event_id`
+        overrides the encoder's own numbering (events replayed from a store).
+        """
+        return self._frame(json.dumps(payload), event_id)
+
+    @staticmethod
+    def keepalive() -> str:
+        # Comment frame: keeps proxies from closing an idle stream
+        return ": keep-alive\n\n"
+
+    def token(self, event_type: str, chunk: str) -> str:
+        envelope = self._envelopes.get(event_type)
+        if envelope is None:
+            envelope = f'{{"type": {encode_basestring_ascii(event_type)}, "chunk": '
+            self._envelopes[event_type] = envelope
+        return self._frame(f"{envelope}{encode_basestring_ascii(chunk)}}}")
+
+    async def tokens(self, event_type: str, source):
+        """
+        Re-emits an async token stream as coalesced SSE frames.
+
+        A pump task drains `source` into a buffer; the consumer wakes on
+        the first buffered token, keeps the window open for `window_ms`
+        (or until `max_bytes` is buffered) and writes everything collected
+        as one frame. Whatever is buffered is flushed when the source ends,
+        so the next stage event always follows the last token immediately.
+        """
+        if self.window <= 0:
+            async for chunk in source:
+                yield self.token(event_type, chunk)
+            return
+
+        buffer: list[str] = []
+        size = 0
+        finished = False
+        error: BaseException | None = None
+        ready = asyncio.Event()  # something buffered (or source finished)
+        full = asyncio.Event()   # byte window reached (or source finished)
+
+        async def pump():
+            nonlocal size, finished, error
+            try:
+                async for chunk in source:
+                    buffer.append(chunk)
+                    size += len(chunk)
+                    ready.set()
+                    if size >= self.max_bytes:
+                        full.set()
+            except Exception as e:
+                error = e
+            finally:
+                finished = True
+                ready.set()
+                full.set()
+
+        task = asyncio.create_task(pump())
+
+        try:
+            while True:
+                await ready.wait()
+
+                if not finished:
+                    try:
+                        await asyncio.wait_for(full.wait(), self.window)
+                    except asyncio.TimeoutError:
+                        pass
+
+                chunks = buffer[:]
+                buffer.clear()
+                size = 0
+                if not finished:
+                    ready.clear()
+                    full.clear()
+
+                for frame in self._split(event_type, chunks):
+                    yield frame
+
+                if finished and not buffer:
+                    break
+        finally:
+            task.cancel()
+
+        if error is not None:
+            raise error
+
+    def _split(self, event_type: str, chunks: list[str]):
+        """
+        Packs buffered chunks into frames of at most ~max_bytes each.
+        """
+        batch: list[str] = []
+        batch_size = 0
+        for chunk in chunks:
+            if batch and batch_size + len(chunk) > self.max_bytes:
+                yield self.token(event_type, "".join(batch))
+                batch, batch_size = [], 0
+            batch.append(chunk)
+            batch_size += len(chunk)
+        if batch:
+            yield self.token(event_type, "".join(batch))
@@ -1,8 +1,11 @@
+from app.utils.component_tree import ComponentTree
+
+
 def validate_scaffold(result: dict):
     """
     Validator supporting PARTIAL_SUCCESS mode.
     System design is mandatory.
-    Component tree is optional.
+    Component tree is optional, but must contain usable paths if present.
     """
 
     # System design is REQUIRED
@@ -22,4 +25,8 @@ def validate_scaffold(result: dict):
         if not isinstance(component_tree["folders"], list):
             raise ValueError("'folders' must be a list")
 
+        tree = ComponentTree.from_dict(component_tree)
+        if component_tree["folders"] and not len(tree):
+            raise ValueError(f"component_tree has no usable paths: {tree.issues[:3]}")
+
     return True
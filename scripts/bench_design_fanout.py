@@ -0,0 +1,88 @@
+"""
+System design wall time: one sequential generation vs section fan-out.
+
+Uses a fake LLM whose timing models a streamed provider — time to first
+token plus a fixed per-token interval — so the numbers show what
+generating sections concurrently saves, not how fast any provider is.
+
+    python scripts/bench_design_fanout.py [--tokens 1400] [--sections 7]
+
+sequential: the whole design in one stream (previous behaviour)
+fan-out:    an outline call, then --sections streams in parallel within
+            --gemini / --groq slots, emitted in outline order
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.design_fanout import DEFAULT_OUTLINE, SectionFanout  # noqa: E402
+
+
+class FakeStreamingLLM:
+    def __init__(self, args):
+        self.args = args
+        self.section_tokens = args.tokens // args.sections
+
+    async def _stream(self, tokens):
+        await asyncio.sleep(self.args.ttft_ms / 1000)
+        for i in range(tokens):
+            await asyncio.sleep(self.args.token_ms / 1000)
+            yield f"w{i} "
+
+    async def stream_system_design(self, payload_text):
+        async for token in self._stream(self.args.tokens):
+            yield token
+
+    async def plan_design_outline(self, payload_text, max_sections):
+        await asyncio.sleep(self.args.outline_ms / 1000)
+        return {"sections": DEFAULT_OUTLINE[:self.args.sections]}
+
+    async def stream_design_section(self, payload_text, outline, title, focus, provider):
+        async for token in self._stream(self.section_tokens):
+            yield token
+
+
+async def timed(stream) -> tuple[float, float]:
+    started = time.perf_counter()
+    first = None
+    async for _ in stream:
+        if first is None:
+            first = time.perf_counter() - started
+    return first, time.perf_counter() - started
+
+
+async def run(args):
+    llm = FakeStreamingLLM(args)
+    limits = {"gemini": args.gemini, "groq": args.groq}
+    print(
+        f"design={args.tokens} tokens in {args.sections} sections, ttft={args.ttft_ms}ms, "
+        f"{args.token_ms}ms/token, outline={args.outline_ms}ms, slots={limits}"
+    )
+
+    sequential = await timed(llm.stream_system_design("payload"))
+    print(f"sequential  first token {sequential[0]:5.2f}s   done {sequential[1]:5.2f}s")
+
+    fanout = SectionFanout(llm, limits, plan_outline=True, max_sections=args.sections)
+    fanned = await timed(fanout.stream("payload"))
+    print(f"fan-out     first token {fanned[0]:5.2f}s   done {fanned[1]:5.2f}s")
+    print(f"speed-up {sequential[1] / fanned[1]:.2f}x   stats: {fanout.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tokens", type=int, default=1400)
+    parser.add_argument("--sections", type=int, default=7)
+    parser.add_argument("--ttft-ms", type=float, default=600)
+    parser.add_argument("--token-ms", type=float, default=4)
+    parser.add_argument("--outline-ms", type=float, default=700)
+    parser.add_argument("--gemini", type=int, default=4)
+    parser.add_argument("--groq", type=int, default=2)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Embedding pipeline benchmark: per-item vs micro-batched writes.
+
+Uses a local fake embedder whose cost models a remote embedding API —
+a fixed round-trip latency plus a small per-text cost — so the numbers
+show how batching amortises round trips, not how fast any provider is.
+
+    python scripts/bench_embedding_batch.py [--items 2000] [--rtt-ms 40]
+
+per-item:  every request awaits its own embed + write, with at most
+           --concurrency calls in flight (provider connection pool)
+batched:   requests submit to EmbeddingBatcher and return immediately;
+           --in-flight batches are written concurrently
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.embedding.backends import NumpyVectorBackend  # noqa: E402
+from app.embedding.batcher import EmbeddingBatcher  # noqa: E402
+from app.embedding.embedder import HashingEmbedder  # noqa: E402
+from app.embedding.embedding_service import EmbeddingStore  # noqa: E402
+
+DIM = 768
+
+
+class FakeRemoteEmbedder(HashingEmbedder):
+    name = "fake"
+
+    def __init__(self, rtt_ms, per_item_ms):
+        super().__init__(dim=DIM)
+        self.rtt = rtt_ms / 1000
+        self.per_item = per_item_ms / 1000
+        self.calls = 0
+
+    async def embed(self, texts):
+        self.calls += 1
+        await asyncio.sleep(self.rtt + self.per_item * len(texts))
+        return await super().embed(texts)
+
+
+def texts(n):
+    return [f"Project {i}: ecommerce platform with react, node and postgres #{i}" for i in range(n)]
+
+
+async def per_item(args):
+    embedder = FakeRemoteEmbedder(args.rtt_ms, args.per_item_ms)
+    store = EmbeddingStore(embedder=embedder, backend=NumpyVectorBackend(dim=DIM, max_entries=10**6))
+    pool = asyncio.Semaphore(args.concurrency)
+
+    async def request(text):
+        async with pool:
+            await store.index(text)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(request(t) for t in texts(args.items)))
+    return time.perf_counter() - start, embedder.calls, None
+
+
+async def batched(args):
+    embedder = FakeRemoteEmbedder(args.rtt_ms, args.per_item_ms)
+    store = EmbeddingStore(embedder=embedder, backend=NumpyVectorBackend(dim=DIM, max_entries=10**6))
+    store.batcher = EmbeddingBatcher(
+        store, max_batch=args.batch, window_ms=args.window_ms, max_queue=args.items,
+        max_in_flight=args.in_flight,
+    )
+
+    start = time.perf_counter()
+    submit_start = time.perf_counter()
+    for t in texts(args.items):
+        store.batcher.submit(t)
+    submit_us = (time.perf_counter() - submit_start) / args.items * 1e6
+    await store.close()
+    return time.perf_counter() - start, embedder.calls, submit_us
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--rtt-ms", type=float, default=40)
+    parser.add_argument("--per-item-ms", type=float, default=0.5)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--window-ms", type=int, default=200)
+    parser.add_argument("--in-flight", type=int, default=4)
+    args = parser.parse_args()
+
+    print(
+        f"{args.items} texts, fake embedder: {args.rtt_ms} ms round trip "
+        f"+ {args.per_item_ms} ms/text\n"
+    )
+    for name, scenario in (("per-item", per_item), ("batched", batched)):
+        seconds, calls, submit_us = asyncio.run(scenario(args))
+        line = (
+            f"{name:<9} {args.items / seconds:10.0f} vectors/s   "
+            f"{calls:5d} embed calls   {seconds:6.2f} s"
+        )
+        if submit_us is not None:
+            line += f"   request-path cost {submit_us:.1f} µs/submit"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
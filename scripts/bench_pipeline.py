@@ -0,0 +1,130 @@
+"""
+End-to-end latency of a streamed generation: sequential vs pipelined tree.
+
+Uses a fake LLM whose timing models a streamed provider — time to first
+token plus a fixed per-token interval — for both the system design and
+the component tree, so the numbers show what overlapping the two stages
+saves, not how fast any provider is.
+
+    python scripts/bench_pipeline.py [--runs 5] [--design-tokens 900]
+
+sequential: the tree starts after the last design token (previous behaviour)
+pipelined:  the tree starts once the components section of the design is
+            complete and runs while the rest of the design streams
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.generation_service import GenerationService  # noqa: E402
+from app.services.tree_pipeline import TreePipeline  # noqa: E402
+
+SECTIONS = (
+    ("1. High-level architecture", 0.20),
+    ("2. Key components and responsibilities", 0.30),
+    ("3. Data flow", 0.20),
+    ("4. Deployment strategy", 0.15),
+    ("5. Risks and trade-offs", 0.15),
+)
+
+
+def build_design(tokens: int) -> list[str]:
+    out = []
+    for title, share in SECTIONS:
+        out.append(f"## {title}\n")
+        words = max(1, int(tokens * share))
+        for i in range(words):
+            out.append(f"word{i} " if (i + 1) % 12 else f"word{i}.\n")
+        out.append("\n")
+    out.append("Deploy as Docker containers on Kubernetes.\n")
+    return out
+
+
+class FakeStreamingLLM:
+    def __init__(self, design, tree_nodes, ttft, token_interval):
+        self.design = design
+        self.tree = {"folders": [f"app/module_{i}/" for i in range(tree_nodes)]}
+        self.ttft = ttft
+        self.token_interval = token_interval
+
+    async def _stream(self, chunks):
+        await asyncio.sleep(self.ttft)
+        for chunk in chunks:
+            await asyncio.sleep(self.token_interval)
+            yield chunk
+
+    async def stream_system_design(self, payload_text):
+        async for token in self._stream(self.design):
+            yield token
+
+    async def stream_component_tree(self, system_design):
+        text = json.dumps(self.tree)
+        async for chunk in self._stream([text[i:i + 8] for i in range(0, len(text), 8)]):
+            yield chunk
+
+    async def generate_component_tree(self, system_design):
+        return self.tree
+
+
+async def one_request(service: GenerationService, pipelined: bool) -> tuple[float, float]:
+    """
+    Mirrors the /generate/stream route; returns (design_done, tree_done) seconds.
+    """
+    started = time.perf_counter()
+    pipeline = TreePipeline(service) if pipelined else None
+    parts = []
+    async for token in service.design_stream("payload"):
+        parts.append(token)
+        if pipeline is not None:
+            pipeline.feed(token)
+    design_done = time.perf_counter() - started
+
+    async for kind, value in service.component_tree_events("".join(parts), pipeline):
+        pass
+    return design_done, time.perf_counter() - started
+
+
+async def run(args):
+    design = build_design(args.design_tokens)
+    llm = FakeStreamingLLM(design, args.tree_nodes, args.ttft_ms / 1000, args.token_ms / 1000)
+    service = GenerationService(llm, embeddings=None)
+    service.embeddings = None
+
+    print(
+        f"design={args.design_tokens} tokens, tree={args.tree_nodes} nodes, "
+        f"ttft={args.ttft_ms}ms, {args.token_ms}ms/token, runs={args.runs}"
+    )
+    results = {}
+    for mode in ("sequential", "pipelined"):
+        samples = [await one_request(service, mode == "pipelined") for _ in range(args.runs)]
+        design = statistics.median(s[0] for s in samples)
+        total = statistics.median(s[1] for s in samples)
+        results[mode] = total
+        print(
+            f"{mode:<11} design done {design:6.2f}s   tree done {total:6.2f}s   "
+            f"tree after design {total - design:5.2f}s"
+        )
+
+    saved = results["sequential"] - results["pipelined"]
+    print(f"saved {saved:.2f}s end-to-end ({saved / results['sequential']:.0%})")
+    print("stats:", service.stats())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--design-tokens", type=int, default=900)
+    parser.add_argument("--tree-nodes", type=int, default=40)
+    parser.add_argument("--ttft-ms", type=float, default=600)
+    parser.add_argument("--token-ms", type=float, default=4)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
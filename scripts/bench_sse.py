@@ -0,0 +1,94 @@
+"""
+SSE encoder benchmark.
+
+Compares the per-token f-string + json.dumps framing the streaming routes
+used before against app.utils.sse.SSEEncoder.
+
+    python scripts/bench_sse.py [--tokens 20000]
+
+Two scenarios:
+- burst: tokens are available immediately (pure CPU cost of framing)
+- paced: tokens arrive every --interval-ms (a realistic model stream),
+         so time-window coalescing kicks in
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.utils.sse import SSEEncoder  # noqa: E402
+
+WORDS = [
+    "service", "gateway", "postgres", "cache", "queue", "worker", "auth",
+    "deploy", "region", "replica", "shard", "\"quoted\"", "naïve", "→", "\n",
+]
+
+
+def make_tokens(n: int) -> list[str]:
+    rnd = random.Random(42)
+    return [rnd.choice(WORDS) + " " for _ in range(n)]
+
+
+async def source(tokens, interval: float):
+    for token in tokens:
+        if interval:
+            await asyncio.sleep(interval)
+        yield token
+
+
+async def legacy(tokens, interval):
+    frames = []
+    async for token in source(tokens, interval):
+        frames.append(f"data: {json.dumps({'type': 'system_design', 'chunk': token})}\n\n")
+    return frames
+
+
+async def encoder(tokens, interval, window_ms, max_bytes):
+    sse = SSEEncoder(window_ms=window_ms, max_bytes=max_bytes, event_ids=True)
+    return [f async for f in sse.tokens("system_design", source(tokens, interval))]
+
+
+def report(name, frames, elapsed, cpu, n_tokens):
+    wire = sum(len(f.encode("utf-8")) for f in frames)
+    print(
+        f"  {name:<28} frames={len(frames):>7}  bytes={wire:>9}  "
+        f"wall={elapsed * 1000:>8.1f}ms  cpu={cpu * 1000:>7.1f}ms  "
+        f"frames/s={len(frames) / elapsed:>10.0f}  tokens/s={n_tokens / elapsed:>10.0f}"
+    )
+
+
+async def measure(name, coro, n_tokens):
+    start, cpu_start = time.perf_counter(), time.process_time()
+    frames = await coro
+    report(name, frames, time.perf_counter() - start, time.process_time() - cpu_start, n_tokens)
+
+
+async def run(args):
+    tokens = make_tokens(args.tokens)
+    scenarios = [("burst", 0.0, tokens), ("paced", args.interval_ms / 1000, tokens[: args.paced_tokens])]
+
+    for label, interval, toks in scenarios:
+        print(f"{label} ({len(toks)} tokens, interval={interval * 1000:.1f}ms)")
+
+        await measure("legacy f-string/json.dumps", legacy(toks, interval), len(toks))
+        await measure("SSEEncoder (no batching)", encoder(toks, interval, 0, args.max_bytes), len(toks))
+        await measure(
+            f"SSEEncoder ({args.window_ms}ms window)",
+            encoder(toks, interval, args.window_ms, args.max_bytes),
+            len(toks),
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, default=20000)
+    parser.add_argument("--paced-tokens", type=int, default=1000)
+    parser.add_argument("--interval-ms", type=float, default=2.0)
+    parser.add_argument("--window-ms", type=int, default=50)
+    parser.add_argument("--max-bytes", type=int, default=4096)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,160 @@
+"""
+Memory-mapped vector index benchmark (app/embedding/mmap_index.py).
+
+Builds clustered synthetic corpora at each size, then — in a fresh process
+per size, so resident memory reflects only what the index maps and touches
+— measures open time, query latency (flat scan and IVF) and RSS.
+
+    python scripts/bench_vector_index.py [--sizes 10000,100000,1000000] [--dim 768]
+
+Note: 1M x 768 float32 is ~3 GB on disk; use --dim 256 on small machines.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np  # noqa: E402
+
+from app.embedding.mmap_index import MmapVectorIndex  # noqa: E402
+
+BUILD_CHUNK = 50_000
+
+
+def rss_mb():
+    """
+    (anonymous, file-backed) resident MB. File-backed pages are the mapped
+    index — shared page cache the kernel can reclaim — and include pages
+    mapped by fault-around, so they overstate what a search really needs.
+    """
+    anon = file = float("nan")
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("RssAnon:"):
+                anon = int(line.split()[1]) / 1024
+            elif line.startswith("RssFile:"):
+                file = int(line.split()[1]) / 1024
+    return np.array([anon, file])
+
+
+def clustered(rng, centers, n):
+    labels = rng.integers(len(centers), size=n)
+    noise = rng.standard_normal((n, centers.shape[1])).astype(np.float32)
+    v = centers[labels] + noise * (0.6 / np.sqrt(centers.shape[1]))
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+
+def build(path, n, dim, nlist):
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((256, dim)).astype(np.float32)
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+    index = MmapVectorIndex(path, dim)
+    start = time.perf_counter()
+    for offset in range(0, n, BUILD_CHUNK):
+        rows = min(BUILD_CHUNK, n - offset)
+        index.append(clustered(rng, centers, rows), [{"i": offset + i} for i in range(rows)])
+    append_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index.train_ivf(nlist)
+    train_s = time.perf_counter() - start
+    index.flush()
+
+    queries = clustered(rng, centers, 64)
+    np.save(os.path.join(path, "bench_queries.npy"), queries)
+    return append_s, train_s
+
+
+def timed(fn, repeat):
+    fn()  # warm the page cache
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def measure(path, dim, nprobe, k):
+    base = rss_mb()
+    start = time.perf_counter()
+    index = MmapVectorIndex(path, dim)
+    open_ms = (time.perf_counter() - start) * 1000
+    after_open = rss_mb()
+
+    queries = np.load(os.path.join(path, "bench_queries.npy"))
+    ivf_ms, (_, ivf_rows) = timed(lambda: index.search(queries[:1], k, nprobe=nprobe), 20)
+    rss_ivf = rss_mb()
+
+    repeat = 3 if index.count >= 500_000 else 10
+    flat_ms, (_, flat_rows) = timed(lambda: index.search(queries[:1], k), repeat)
+    flat_batch_ms, (_, batch_rows) = timed(lambda: index.search(queries[:32], k), repeat)
+    _, (_, ivf_batch_rows) = timed(lambda: index.search(queries[:32], k, nprobe=nprobe), 1)
+    rss_flat = rss_mb()
+
+    recall = np.mean([
+        len(set(a) & set(b)) / k for a, b in zip(ivf_batch_rows, batch_rows)
+    ])
+    print(json.dumps({
+        "open_ms": open_ms,
+        "rss_open_mb": (after_open - base).tolist(),
+        "ivf_ms": ivf_ms,
+        "rss_ivf_mb": (rss_ivf - base).tolist(),
+        "flat_ms": flat_ms,
+        "flat_batch32_ms": flat_batch_ms,
+        "rss_flat_mb": (rss_flat - base).tolist(),
+        "ivf_recall": float(recall),
+    }))
+
+
+def fmt_rss(pair):
+    return f"{pair[0]:.0f}+{pair[1]:.0f}"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(args.measure, args.dim, args.nprobe, args.k)
+        return
+
+    print(
+        f"dim={args.dim} k={args.k} nprobe={args.nprobe}; "
+        "RSS columns are anon+file MB above the pre-open baseline\n\n"
+        f"{'rows':>9} {'disk MB':>8} {'append s':>9} {'train s':>8} {'open ms':>8} "
+        f"{'RSS open':>11} {'ivf ms':>7} {'RSS ivf':>11} {'recall':>7} "
+        f"{'flat ms':>8} {'flat x32':>9} {'RSS flat':>11}"
+    )
+    for n in (int(s) for s in args.sizes.split(",")):
+        with tempfile.TemporaryDirectory() as path:
+            nlist = max(16, int(np.sqrt(n)))
+            append_s, train_s = build(path, n, args.dim, nlist)
+            disk = sum(
+                os.path.getsize(os.path.join(path, f)) for f in os.listdir(path)
+            ) / 2**20
+            out = subprocess.run(
+                [sys.executable, __file__, "--measure", path, "--dim", str(args.dim),
+                 "--nprobe", str(args.nprobe), "--k", str(args.k)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            m = json.loads(out.strip().splitlines()[-1])
+            print(
+                f"{n:>9} {disk:>8.0f} {append_s:>9.2f} {train_s:>8.2f} {m['open_ms']:>8.2f} "
+                f"{fmt_rss(m['rss_open_mb']):>11} {m['ivf_ms']:>7.2f} "
+                f"{fmt_rss(m['rss_ivf_mb']):>11} {m['ivf_recall']:>7.2f} "
+                f"{m['flat_ms']:>8.2f} {m['flat_batch32_ms']:>9.2f} "
+                f"{fmt_rss(m['rss_flat_mb']):>11}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Scaffold zip benchmark: temp-directory build vs streaming writer.
+
+    python scripts/bench_zip.py [--files 1000 10000 50000] [--design-kb 256]
+
+temp-dir:  the previous approach — every file written under
+           tempfile.mkdtemp(), then zipped on disk (the directory and the
+           archive are removed here, which the old code never did)
+streaming: iter_scaffold_zip — entries compressed straight into the
+           response chunks, nothing written to disk
+
+Peak memory is the Python heap high-water mark (tracemalloc) while the
+archive is produced and consumed chunk by chunk.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.zip_builder import iter_scaffold_zip, scaffold_entries  # noqa: E402
+
+
+def make_result(files: int, design_kb: int) -> dict:
+    folders = []
+    per_service = 50
+    for i in range(files):
+        service, module = divmod(i, per_service)
+        folders.append(f"services/svc_{service}/app/module_{module}.py")
+    return {
+        "input_spec": {"project_name": "bench", "description": "benchmark scaffold"},
+        "system_design": ("## Section\n" + "lorem ipsum dolor sit amet " * 38 + "\n") * design_kb,
+        "component_tree": {"folders": folders},
+    }
+
+
+def temp_dir_zip(result) -> tuple[int, int]:
+    temp_dir = tempfile.mkdtemp()
+    try:
+        on_disk = 0
+        for arcname, content in scaffold_entries(result):
+            path = os.path.join(temp_dir, "src", arcname)
+            if arcname.endswith("/"):
+                os.makedirs(path, exist_ok=True)
+                continue
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(content or "")
+            on_disk += len(content or "")
+
+        zip_path = os.path.join(temp_dir, "scaffold.zip")
+        with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zipf:
+            src = os.path.join(temp_dir, "src")
+            for base, dirs, names in os.walk(src):
+                for name in names:
+                    full = os.path.join(base, name)
+                    zipf.write(full, arcname=os.path.relpath(full, src))
+        size = os.path.getsize(zip_path)
+        return size, on_disk + size
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def streaming_zip(result) -> tuple[int, int]:
+    size = 0
+    for chunk in iter_scaffold_zip(result):
+        size += len(chunk)
+    return size, 0
+
+
+def measure(fn, result):
+    tracemalloc.start()
+    started = time.perf_counter()
+    size, disk = fn(result)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, size, disk
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--design-kb", type=int, default=256)
+    args = parser.parse_args()
+
+    print(f"{'files':>7} {'mode':<10} {'time':>8} {'peak heap':>10} {'zip':>9} {'temp disk':>10}")
+    for files in args.files:
+        result = make_result(files, args.design_kb)
+        for name, fn in (("temp-dir", temp_dir_zip), ("streaming", streaming_zip)):
+            elapsed, peak, size, disk = measure(fn, result)
+            print(
+                f"{files:>7} {name:<10} {elapsed:7.2f}s {peak / 2**20:8.1f}MB "
+                f"{size / 2**20:7.1f}MB {disk / 2**20:8.1f}MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
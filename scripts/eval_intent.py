@@ -0,0 +1,94 @@
+"""
+Offline evaluation of the local intent classifier.
+
+Runs k-fold cross-validation over app/data/intent_corpus.tsv, compares it
+with the keyword scan IntentService used before, and micro-benchmarks the
+per-message classification cost.
+
+    python scripts/eval_intent.py [--folds 5] [--threshold 0.65]
+
+"Wasted LLM round trips" counts chat messages routed into the generate
+flow, each of which costs at least one analysis call before the user gets
+a clarification they never asked for.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.intent_classifier import IntentClassifier, load_corpus  # noqa: E402
+
+LEGACY_KEYWORDS = [
+    "build", "generate", "design", "architecture",
+    "system", "backend", "frontend", "app", "website"
+]
+
+
+def legacy_detect(text):
+    msg = text.lower()
+    if any(k in msg for k in LEGACY_KEYWORDS):
+        return "generate_architecture"
+    return "chat"
+
+
+def report(name, pairs):
+    correct = sum(1 for truth, pred in pairs if truth == pred)
+    wasted = sum(1 for truth, pred in pairs if truth == "chat" and pred != "chat")
+    missed = sum(1 for truth, pred in pairs if truth != "chat" and pred == "chat")
+    print(
+        f"{name:<24} accuracy {correct / len(pairs):6.1%}  "
+        f"wasted LLM round trips {wasted:3d}  missed generations {missed:3d}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=0.65)
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    examples = load_corpus()
+    random.Random(0).shuffle(examples)
+    print(f"{len(examples)} labelled examples, {args.folds}-fold cross-validation\n")
+
+    local, fallbacks = [], 0
+    for fold in range(args.folds):
+        train = [e for i, e in enumerate(examples) if i % args.folds != fold]
+        model = IntentClassifier().fit(train)
+        for label, text in examples[fold::args.folds]:
+            pred, confidence = model.predict(text)
+            local.append((label, pred))
+            fallbacks += confidence < args.threshold
+
+    report("keyword scan (legacy)", [(label, legacy_detect(text)) for label, text in examples])
+    report("local classifier", local)
+    print(
+        f"\nbelow threshold {args.threshold}: {fallbacks}/{len(examples)} "
+        f"({fallbacks / len(examples):.1%}) would be confirmed by the LLM"
+    )
+
+    start = time.perf_counter()
+    model = IntentClassifier().fit(examples)
+    train_ms = (time.perf_counter() - start) * 1000
+
+    texts = [text for _, text in examples]
+    start = time.perf_counter()
+    for i in range(args.iterations):
+        model.predict(texts[i % len(texts)])
+    per_call_us = (time.perf_counter() - start) / args.iterations * 1e6
+
+    start = time.perf_counter()
+    for i in range(args.iterations):
+        legacy_detect(texts[i % len(texts)])
+    legacy_us = (time.perf_counter() - start) / args.iterations * 1e6
+
+    print(f"\ntraining: {train_ms:.1f} ms")
+    print(f"classify: {per_call_us:.1f} µs/message (keyword scan {legacy_us:.2f} µs)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import hashlib
+import os
+
+import pytest
+from fastapi import HTTPException
+
+from app.artifacts.backends import LocalFSBackend
+from app.artifacts.store import ArtifactStore
+from app.routes.artifacts import parse_range
+from app.services.zip_builder import iter_scaffold_zip
+
+RESULT = {
+    "input_spec": {"project_name": "Shop", "description": "Sells things"},
+    "system_design": "## Architecture\nFastAPI + Postgres\n",
+    "component_tree": {"folders": ["app/main.py", "docs/api.md"]},
+}
+
+
+def test_identical_content_is_stored_once(tmp_path):
+    store = ArtifactStore(LocalFSBackend(str(tmp_path)), quota_bytes=2**20)
+
+    first = store.put_chunks([b"hello ", b"world"])
+    second = store.put_chunks([b"hello world"])
+
+    assert first == second == hashlib.sha256(b"hello world").hexdigest()
+    assert store.get(first) == 11
+    assert b"".join(store.backend.read(first, 6)) == b"world"
+    assert store.stats()["stored"] == 1 and store.stats()["deduplicated"] == 1
+    assert os.listdir(tmp_path / ".staging") == []
+
+
+def test_scaffold_zips_are_deterministic_so_they_deduplicate(tmp_path):
+    store = ArtifactStore(LocalFSBackend(str(tmp_path)), quota_bytes=2**20)
+
+    assert store.put_chunks(iter_scaffold_zip(RESULT)) == store.put_chunks(iter_scaffold_zip(RESULT))
+    assert store.stats()["artifacts"] == 1
+
+
+def test_least_recently_used_artifacts_are_evicted_over_quota(tmp_path):
+    store = ArtifactStore(LocalFSBackend(str(tmp_path)), quota_bytes=250)
+
+    a = store.put_chunks([b"a" * 100])
+    b = store.put_chunks([b"b" * 100])
+    store.get(a)  # a is now more recent than b
+    c = store.put_chunks([b"c" * 100])
+
+    assert store.get(b) is None
+    assert store.get(a) == 100 and store.get(c) == 100
+    assert store.stats()["evicted"] == 1 and store.stats()["bytes"] == 200
+
+    # A restart rebuilds the index from the backend
+    reopened = ArtifactStore(LocalFSBackend(str(tmp_path)), quota_bytes=250)
+    assert set(reopened.lru) == {a, c}
+
+
+def test_parse_range():
+    assert parse_range(None, 100) is None
+    assert parse_range("bytes=0-9", 100) == (0, 10)
+    assert parse_range("bytes=90-", 100) == (90, 100)
+    assert parse_range("bytes=-10", 100) == (90, 100)
+    assert parse_range("bytes=0-9,20-29", 100) is None
+    with pytest.raises(HTTPException) as exc:
+        parse_range("bytes=100-", 100)
+    assert exc.value.status_code == 416
@@ -0,0 +1,80 @@
+import asyncio
+
+from app.schemas.architecture_spec import ArchitectureSpec
+from app.services.design_store import DesignStore
+from app.services.generation_service import GenerationService
+from app.utils.component_tree import ComponentTree
+from app.utils.validator import validate_scaffold
+
+FOLDERS = [
+    "./app//", "app/main.py", "app/routes", "app/routes/orders.py",
+    "services/orders/", "services/orders/api.py", ".github/workflows/ci.yml",
+    "/etc/passwd", "../secrets", 42,
+]
+
+
+def test_paths_are_normalized_indexed_and_bad_entries_reported():
+    tree = ComponentTree.from_dict({"folders": FOLDERS})
+    assert tree.paths() == [
+        "app/", "app/main.py", "app/routes/", "app/routes/orders.py",
+        "services/", "services/orders/", "services/orders/api.py",
+        ".github/", ".github/workflows/", ".github/workflows/ci.yml",
+    ]
+    assert len(tree.issues) == 3
+    assert tree.get("services/orders").is_dir
+    assert tree.index["app/routes/orders.py"].parent is tree.index["app/routes/"]
+
+
+def test_splice_replaces_one_folder_and_diff_reports_it():
+    tree = ComponentTree.from_dict({"folders": FOLDERS})
+    spliced = tree.splice("services/orders", [
+        "handlers/", "handlers/create.py", "services/orders/models.py",
+    ])
+    assert spliced.paths(spliced.get("services/orders/")) == [
+        "services/orders/handlers/", "services/orders/handlers/create.py",
+        "services/orders/models.py",
+    ]
+    assert "app/routes/orders.py" in spliced
+    assert tree.diff(spliced) == {
+        "added": ["services/orders/handlers/", "services/orders/handlers/create.py",
+                  "services/orders/models.py"],
+        "removed": ["services/orders/api.py"],
+        "changed": [],
+    }
+
+
+def test_validate_scaffold_rejects_a_tree_with_no_usable_paths():
+    validate_scaffold({"system_design": "x", "component_tree": {"folders": FOLDERS}})
+    try:
+        validate_scaffold({"system_design": "x", "component_tree": {"folders": ["/abs", ".."]}})
+    except ValueError as e:
+        assert "no usable paths" in str(e)
+    else:
+        raise AssertionError("expected ValueError")
+
+
+class FakeLLM:
+    def __init__(self):
+        self.calls = []
+
+    async def generate_component_subtree(self, system_design, outline, path, current, instructions):
+        self.calls.append((system_design, path, current))
+        return {"folders": ["handlers/", "handlers/refund.py"]}
+
+
+def test_service_regenerates_only_the_requested_subtree():
+    async def run():
+        service = GenerationService(FakeLLM(), embeddings=None, designs=DesignStore(10))
+        spec = ArchitectureSpec(project_name="Shop", description="", use_case="",
+                                requirements=[], tech_stack=[])
+        design = "## Overview\nA shop.\n## Orders service\nHandles orders and refunds.\n"
+        gen_id = service.store(spec, design, {"folders": FOLDERS}, 5.0)
+        return service, await service.regenerate_subtree(gen_id, "services/orders/")
+
+    service, result = asyncio.run(run())
+    excerpt, path, current = service.llm.calls[0]
+    assert path == "services/orders/" and current == "api.py"
+    assert "Handles orders" in excerpt and "A shop." not in excerpt
+    assert result["diff"]["removed"] == ["services/orders/api.py"]
+    assert "services/orders/handlers/refund.py" in result["component_tree"]["folders"]
+    assert service.designs.get(result["id"]).component_tree == result["component_tree"]
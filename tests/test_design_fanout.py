@@ -0,0 +1,77 @@
+import asyncio
+
+from app.services.design_fanout import DEFAULT_OUTLINE, SectionFanout
+
+OUTLINE = {"sections": [
+    {"title": "Architecture", "focus": "big picture"},
+    {"title": "Data layer", "focus": "storage"},
+    {"title": "APIs", "focus": "endpoints"},
+    {"title": "Security", "focus": "auth"},
+]}
+
+
+class FakeLLM:
+    def __init__(self, outline=OUTLINE):
+        self.outline = outline
+        self.in_flight = {}
+        self.peak = {}
+
+    async def plan_design_outline(self, payload_text, max_sections):
+        if isinstance(self.outline, Exception):
+            raise self.outline
+        return self.outline
+
+    async def stream_design_section(self, payload_text, outline, title, focus, provider):
+        self.in_flight[provider] = self.in_flight.get(provider, 0) + 1
+        self.peak[provider] = max(self.peak.get(provider, 0), self.in_flight[provider])
+        try:
+            # Earlier sections are slower, so they finish last
+            await asyncio.sleep(0.01 * (10 - len(title) % 10))
+            yield f"{title} body "
+            yield f"({provider})"
+        finally:
+            self.in_flight[provider] -= 1
+
+
+def run(fanout, payload="project"):
+    async def collect():
+        return "".join([token async for token in fanout.stream(payload)])
+    return asyncio.run(collect())
+
+
+def test_sections_stream_in_outline_order_within_provider_limits():
+    llm = FakeLLM()
+    fanout = SectionFanout(llm, {"gemini": 2, "groq": 1})
+    design = run(fanout)
+
+    headings = [line for line in design.splitlines() if line.startswith("## ")]
+    assert headings == ["## 1. Architecture", "## 2. Data layer", "## 3. APIs", "## 4. Security"]
+    assert design.index("Architecture body") < design.index("Security body")
+    assert llm.peak["gemini"] <= 2 and llm.peak["groq"] <= 1
+    assert fanout.slots.in_flight == {"gemini": 0, "groq": 0}
+
+    stats = fanout.stats()
+    assert stats["sections"] == 4 and stats["outline_planned"] == 1
+    assert stats["avg_parallelism"] > 1
+
+
+def test_unusable_outline_falls_back_to_the_default():
+    for outline in (ValueError("bad json"), {"sections": ["only one"]}):
+        fanout = SectionFanout(FakeLLM(outline), {"gemini": 3}, max_sections=5)
+        design = run(fanout)
+        assert design.count("\n## ") + design.startswith("## ") == 5
+        assert DEFAULT_OUTLINE[0]["title"] in design
+        assert fanout.counters["outline_default"] == 1
+
+
+def test_parallelism_counts_regenerated_sections_against_their_own_wall_time():
+    fanout = SectionFanout(FakeLLM(), {"gemini": 2, "groq": 1})
+
+    async def both_paths():
+        [token async for token in fanout.stream("project")]
+        for _ in range(2):
+            await fanout.generate("project", "outline", OUTLINE["sections"])
+
+    asyncio.run(both_paths())
+    # Never more overlap than there are slots, whichever path ran
+    assert 1 < fanout.stats()["avg_parallelism"] <= 3
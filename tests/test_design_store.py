@@ -0,0 +1,169 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from app.routes.chat import chat
+from app.schemas.architecture_spec import ArchitectureSpec
+from app.services.design_store import (
+    DesignStore,
+    affected_categories,
+    section_category,
+    split_sections,
+)
+from app.services.generation_service import GenerationService
+
+DESIGN = (
+    "Intro line.\n"
+    "## 1. High-level architecture\nShopify Lite is a FastAPI monolith.\n\n"
+    "## 2. Key components and responsibilities\n- Orders\n\n"
+    "## 3. Data layer\nPostgres for orders.\n\n"
+    "## 4. Security\nSessions in cookies.\n\n"
+    "## 5. Risks and trade-offs\nSingle region.\n"
+)
+TREE = {"folders": ["app/", "app/orders/"]}
+
+SPEC = ArchitectureSpec(
+    project_name="Shopify Lite",
+    description="A small storefront",
+    use_case="Sell products online",
+    requirements=["Checkout", "Order history"],
+    tech_stack=["FastAPI", "Postgres"],
+)
+
+
+class FakeLLM:
+    def __init__(self):
+        self.sections = []
+        self.trees = 0
+
+    def configured_providers(self):
+        return ["gemini"]
+
+    async def stream_design_section(self, payload_text, outline, title, focus, provider):
+        self.sections.append(title)
+        yield f"New {title} text."
+
+    async def generate_component_tree(self, system_design):
+        self.trees += 1
+        return {"folders": ["app/", "app/orders/", "app/auth/"]}
+
+
+def test_split_sections_round_trips_and_categorises():
+    sections = split_sections(DESIGN)
+    assert [t for t, _ in sections] == [
+        "Overview", "High-level architecture", "Key components and responsibilities",
+        "Data layer", "Security", "Risks and trade-offs",
+    ]
+    assert "".join(text for _, text in sections) == DESIGN
+    assert [section_category(t) for t, _ in sections[1:]] == [
+        "architecture", "components", "data", "security", "risks",
+    ]
+    assert section_category("Data flow between components") == "api"
+
+
+def test_spec_changes_map_to_the_sections_they_affect():
+    old = SPEC.model_dump()
+    changed, categories = affected_categories(old, {**old, "tech_stack": ["FastAPI", "MySQL"]})
+    assert changed == ["tech_stack"]
+    assert categories == {"architecture", "risks", "data"}
+
+    changed, categories = affected_categories(old, {**old, "project_name": "Shop"})
+    assert changed == ["project_name"] and categories == set()
+
+
+def regenerate(new_spec):
+    async def run():
+        service = GenerationService(FakeLLM(), embeddings=None, designs=DesignStore(10))
+        service.embeddings = None
+        gen_id = service.store(SPEC, DESIGN, TREE, elapsed_seconds=12.0)
+        previous = service.designs.get(gen_id)
+        return service, await service.regenerate(previous, new_spec)
+    return asyncio.run(run())
+
+
+def test_only_affected_sections_are_regenerated():
+    spec = SPEC.model_copy(update={"requirements": ["Checkout", "Order history", "OAuth login"]})
+    service, (design, tree, report) = regenerate(spec)
+
+    assert service.llm.sections == ["Key components and responsibilities", "Security", "Risks and trade-offs"]
+    assert "## 4. Security\n\nNew Security text." in design
+    assert "Postgres for orders." in design  # data layer reused verbatim
+    assert report["sections_reused"] == 3
+    assert report["component_tree"] == "regenerated" and tree["folders"][-1] == "app/auth/"
+    assert report["output_tokens_saved"] > 0
+    assert report["time_saved_seconds"] > 11
+
+
+def test_rename_reuses_everything_including_the_tree():
+    service, (design, tree, report) = regenerate(SPEC.model_copy(update={"project_name": "Shop Mini"}))
+    assert service.llm.sections == [] and service.llm.trees == 0
+    assert "Shop Mini is a FastAPI monolith." in design
+    assert tree == TREE and report["component_tree"] == "reused"
+
+
+def test_rename_is_whole_word_and_the_preamble_keeps_no_bogus_heading():
+    design = (
+        "Shop sells shoes online.\nIt is small.\n\n"
+        "## 1. High-level architecture\nShop is a monolith.\n\n"
+        "## 2. Key components and responsibilities\n- Shopping cart for Shop\n\n"
+        "## 3. Data layer\nPostgres, backed up by a workshop script.\n\n"
+        "## 4. Security\nSessions in cookies.\n\n"
+        "## 5. Risks and trade-offs\nSingle region.\n"
+    )
+    spec = SPEC.model_copy(update={"project_name": "Shop"})
+
+    async def run():
+        service = GenerationService(FakeLLM(), embeddings=None, designs=DesignStore(10))
+        previous = service.designs.get(service.store(spec, design, TREE, elapsed_seconds=5.0))
+        new_spec = spec.model_copy(update={"project_name": "Store", "tech_stack": ["FastAPI", "Postgres", "Celery"]})
+        return await service.regenerate(previous, new_spec)
+
+    new_design, _, report = asyncio.run(run())
+    assert report["sections_regenerated"] == ["Overview", "High-level architecture", "Risks and trade-offs"]
+    # The stale intro is rewritten in place, not under its first line as a title
+    assert new_design.startswith("New Overview text.\n\n## 1. High-level architecture\n\nNew High-level")
+    assert "- Shopping cart for Store\n" in new_design
+    assert "backed up by a workshop script." in new_design
+
+
+def test_chat_stream_stores_the_generation_for_regeneration():
+    class ChatLLM(FakeLLM):
+        async def stream_system_design(self, payload_text):
+            for part in DESIGN.split("\n## "):
+                yield part if part.startswith("Intro") else "\n## " + part
+
+        async def stream_component_tree(self, system_design):
+            yield json.dumps(TREE)
+
+    class Request:
+        async def is_disconnected(self):
+            return False
+
+    async def run():
+        service = GenerationService(ChatLLM(), embeddings=None, designs=DesignStore(10))
+
+        async def generate(message, **_):
+            return {"mode": "generate", "analysis_mode": "fused",
+                    "payload": {"prompt": message}, "spec": SPEC.model_copy()}
+
+        chat_service = SimpleNamespace(
+            generator=service, chat=generate, record_first_design_token=lambda *a: None,
+        )
+        response = await chat(
+            {"message": "a storefront"}, Request(), chat_service=chat_service,
+            streams=None, last_event_id=None,
+        )
+        frames = [frame async for frame in response.body_iterator]
+        events = [
+            json.loads(line[len("data: "):])
+            for frame in frames for line in frame.splitlines() if line.startswith("data: ")
+        ]
+        return service, events[-1]
+
+    service, done = asyncio.run(run())
+    # Same done payload as /generate/stream: the id regenerates section by section
+    assert done["type"] == "done"
+    stored = service.designs.get(done["generation_id"])
+    assert stored.system_design == DESIGN and stored.component_tree == TREE
+    assert stored.spec["project_name"] == "Shopify Lite"
+    assert [t for t, _ in stored.sections][1:3] == ["High-level architecture", "Key components and responsibilities"]
@@ -0,0 +1,242 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.services.llm.cancellation import CancellationTracker, get_cancellation_tracker
+from app.services.llm.orchestrator import LLMOrchestrator
+from app.routes.chat import chat
+from app.schemas.architecture_spec import ArchitectureSpec
+from app.services.generation_service import GenerationService
+from app.services.llm.single_flight import SingleFlight
+from app.services.speculation import SpeculativeGeneration
+from app.services.tree_pipeline import TreePipeline
+from app.streams.backends import InMemoryReplayBackend
+from app.streams.disconnect import until_disconnected
+from app.streams.resumable import ResumableStreams
+
+
+class FakeRequest:
+    def __init__(self):
+        self.gone = False
+
+    async def is_disconnected(self):
+        return self.gone
+
+
+def slow_frames(log, count=3, delay=0.05):
+    async def produce():
+        try:
+            for i in range(count):
+                yield f"data: {i}\n\n"
+                await asyncio.sleep(delay)  # waiting on the model
+            log.append("finished")
+        except asyncio.CancelledError:
+            log.append("cancelled")
+            raise
+    return produce()
+
+
+def test_disconnect_cancels_the_generation_while_nothing_is_written():
+    async def run():
+        log, request = [], FakeRequest()
+        before = dict(get_cancellation_tracker().requests)
+        received = []
+        async for frame in until_disconnected(request, slow_frames(log, delay=10), "cancel", poll=0.01):
+            received.append(frame)
+            request.gone = True
+        await asyncio.sleep(0.01)
+        return log, received, before, get_cancellation_tracker().requests
+
+    log, received, before, after = asyncio.run(run())
+
+    assert received == ["data: 0\n\n"]
+    assert log == ["cancelled"]
+    assert after["cancelled"] == before["cancelled"] + 1
+
+
+def test_finish_policy_lets_the_generation_complete_in_the_background():
+    async def run():
+        log, request = [], FakeRequest()
+        async for _ in until_disconnected(request, slow_frames(log, delay=0.02), "finish", poll=0.005):
+            request.gone = True
+        assert log == []
+        await asyncio.sleep(0.2)
+        return log
+
+    assert asyncio.run(run()) == ["finished"]
+
+
+def test_shared_call_is_cancelled_when_its_last_caller_leaves():
+    async def run(finish_abandoned):
+        flights = SingleFlight(finish_abandoned=finish_abandoned)
+        log = []
+
+        async def upstream():
+            try:
+                await asyncio.sleep(0.05)
+                log.append("done")
+            except asyncio.CancelledError:
+                log.append("cancelled")
+                raise
+
+        callers = [asyncio.create_task(flights.do("k", upstream)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        callers[0].cancel()
+        await asyncio.sleep(0)
+        assert log == []  # the other caller still waits
+        callers[1].cancel()
+        await asyncio.sleep(0.1)
+        return log, flights.stats()
+
+    log, stats = asyncio.run(run(False))
+    assert log == ["cancelled"] and stats["calls_abandoned"] == 1
+
+    log, stats = asyncio.run(run(True))
+    assert log == ["done"] and stats["abandoned_finished"] == 1
+
+
+def test_unfollowed_resumable_stream_is_cancelled_after_the_reconnect_window():
+    async def run(policy):
+        log = []
+        streams = ResumableStreams(
+            InMemoryReplayBackend(ttl=60, max_events=100, max_bytes=2**20),
+            policy=policy, reconnect_seconds=0.05, poll=0.01,
+        )
+        stream_id = await streams.start(slow_frames(log, count=10, delay=0.02))
+        producer = streams.producers[stream_id]
+        await asyncio.sleep(0.4)
+        frames, finished = await streams.backend.read(stream_id, 0, timeout=0)
+        assert producer.cancelled() == (policy == "cancel")
+        return log, frames, finished, streams.stats()
+
+    log, frames, finished, stats = asyncio.run(run("cancel"))
+    assert log == ["cancelled"] and finished
+    assert "Stream cancelled" in frames[-1][1]
+    assert stats["cancelled_unfollowed"] == 1
+
+    log, frames, finished, stats = asyncio.run(run("finish"))
+    assert log == ["finished"] and len(frames) == 10
+    assert stats["finished_unfollowed"] == 1
+
+
+def test_aborted_upstream_stream_counts_received_and_saved_tokens():
+    async def provider_stream(_):
+        for _ in range(100):
+            yield "x" * 40
+            await asyncio.sleep(0.001)
+
+    async def executor_stream(method, candidates, open_stream, on_success=None):
+        async for token in open_stream(SimpleNamespace(name="gemini")):
+            yield token
+
+    registry = SimpleNamespace(
+        cache=SimpleNamespace(), flights=SingleFlight(), hedger=SimpleNamespace(
+            stream=lambda method, p, secondary, primary, _, **kw: primary()
+        ),
+        executor=SimpleNamespace(stream=executor_stream),
+        limiter=SimpleNamespace(admit=lambda *a: asyncio.sleep(0)),
+        cancellations=CancellationTracker(),
+    )
+    llm = LLMOrchestrator(registry)
+
+    async def run():
+        stream = llm._stream_upstream(
+            "system_design", "key", SimpleNamespace(name="gemini"), "prompt", provider_stream
+        )
+        await stream.__anext__()  # one 40-character token, then the client leaves
+        await stream.aclose()
+
+    llm._secondary = lambda p: None
+    llm._candidates = lambda p: [p.name]
+    asyncio.run(run())
+
+    counters = registry.cancellations.stats()["upstream"]["system_design"]
+    assert counters == {"cancelled": 1, "tokens_received": 10, "tokens_saved": 1990}
+
+
+def test_disconnect_during_the_tree_phase_cancels_the_early_tree_call():
+    log = []
+
+    class SlowTreeLLM:
+        async def stream_component_tree(self, system_design):
+            try:
+                yield '{"folders": ["app/",'
+                await asyncio.sleep(10)  # the rest never comes in time
+                yield ' "app/main.py"]}'
+            except asyncio.CancelledError:
+                log.append("cancelled")
+                raise
+
+    async def run():
+        service = GenerationService(SlowTreeLLM())
+        pipeline = TreePipeline(service, min_chars=0)
+        design = "## Components\n- API\n\n## Data flow\n"
+        pipeline.feed(design)
+        assert pipeline.started
+
+        async def frames():
+            async for kind, value in service.component_tree_events(design, pipeline):
+                yield f"data: {value}\n\n"
+
+        request = FakeRequest()
+        async for _ in until_disconnected(request, frames(), "cancel", poll=0.01):
+            request.gone = True  # leaves after the first node
+        await asyncio.sleep(0.05)
+        assert log == ["cancelled"] and pipeline.task.cancelled()
+
+    asyncio.run(run())
+
+
+def test_chat_disconnect_cancels_a_taken_over_speculation():
+    async def run(frames_before_leaving, expand_seconds):
+        log = []
+
+        class SlowLLM:
+            async def expand_prompt_to_spec(self, prompt):
+                try:
+                    await asyncio.sleep(expand_seconds)
+                except asyncio.CancelledError:
+                    log.append("expansion cancelled")
+                    raise
+                return ArchitectureSpec(
+                    project_name="Todo", description=prompt, use_case="tasks",
+                    requirements=[], tech_stack=[],
+                )
+
+            async def stream_system_design(self, description):
+                try:
+                    yield "## 1. High-level architecture\n"
+                    await asyncio.sleep(10)
+                    yield "never sent"
+                except asyncio.CancelledError:
+                    log.append("cancelled")
+                    raise
+
+        generator = GenerationService(SlowLLM(), embeddings=None)
+        speculation = SpeculativeGeneration(generator, "a todo app")
+
+        async def take_over(message, **_):
+            return {"mode": "generate", "analysis_mode": "speculative",
+                    "payload": {"prompt": message}, "speculation": speculation}
+
+        chat_service = SimpleNamespace(
+            generator=SimpleNamespace(tree_pipeline=lambda: None),
+            chat=take_over,
+            record_first_design_token=lambda *a: None,
+        )
+        request = FakeRequest()
+        response = await chat(
+            {"message": "a todo app"}, request, chat_service=chat_service,
+            streams=None, last_event_id=None,
+        )
+        received = 0
+        async for _ in response.body_iterator:
+            received += 1
+            if received == frames_before_leaving:
+                request.gone = True
+        await asyncio.sleep(0.05)
+        assert speculation.task.cancelled()
+        return log
+
+    # Gone while the route awaits spec(), then while it streams the design
+    assert asyncio.run(run(1, expand_seconds=10)) == ["expansion cancelled"]
+    assert asyncio.run(run(2, expand_seconds=0)) == ["cancelled"]
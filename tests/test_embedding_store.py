@@ -0,0 +1,140 @@
+import asyncio
+
+import numpy as np
+
+from app.embedding.backends import NumpyVectorBackend
+from app.embedding.batcher import EmbeddingBatcher
+from app.embedding.embedder import HashingEmbedder
+from app.embedding.embedding_service import EmbeddingStore, store_generation_embedding
+from app.schemas.architecture_spec import ArchitectureSpec
+from app.services.generation_service import GenerationService
+
+
+class SemanticEmbedder(HashingEmbedder):
+    # Stands in for a semantic model: same vectors, trusted for reuse
+    name = "semantic"
+    lexical = False
+
+
+def make_store(embedder=None, **kwargs):
+    return EmbeddingStore(
+        embedder=embedder or HashingEmbedder(dim=256),
+        backend=NumpyVectorBackend(dim=256, max_entries=100),
+        **kwargs,
+    )
+
+
+def spec(database):
+    return ArchitectureSpec(
+        project_name="Shop", description="Online store for shoes", use_case="ecommerce",
+        requirements=["payments", "search"], tech_stack=["React", "FastAPI", database],
+    )
+
+
+def test_identical_prompt_is_reused_and_unrelated_prompt_misses():
+    store = make_store(SemanticEmbedder(dim=256), reuse_threshold=0.97, seed_threshold=0.6)
+    prompt = "Project Name: Shop\nDescription: ecommerce store with react and node"
+    record = {"system_design": "# Shop", "fingerprint": {"tech_stack": ["node", "react"]}}
+
+    async def run():
+        assert await store_generation_embedding(prompt, record, store=store)
+        await store.batcher.flush()
+        hit = await store.lookup(prompt, {"tech_stack": ["node", "react"]})
+        miss = await store.lookup("Project Name: Pulse\nDescription: heart rate wearable")
+        return hit, miss
+
+    hit, miss = asyncio.run(run())
+    assert hit.mode == "reuse"
+    assert hit.record == record
+    assert miss is None
+
+    stats = store.stats()
+    assert stats["lookups"] == 2
+    assert stats["reused"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_close_match_only_seeds_unless_stack_matches_and_embedder_is_semantic():
+    postgres, mongo = spec("PostgreSQL"), spec("MongoDB")
+
+    def recall(embedder, stored, wanted):
+        service = GenerationService(llm=object(), embeddings=make_store(
+            embedder, reuse_threshold=0.9, seed_threshold=0.5
+        ))
+
+        async def run():
+            await service.remember(service.describe(stored), "# design", None, stored)
+            await service.embeddings.batcher.flush()
+            return await service.recall(service.describe(wanted), wanted)
+        return asyncio.run(run())
+
+    # Different database: similar enough to seed, never served as-is
+    different = recall(SemanticEmbedder(dim=256), postgres, mongo)
+    assert different.mode == "seed" and different.similarity >= 0.9
+    assert recall(SemanticEmbedder(dim=256), postgres, postgres).mode == "reuse"
+    # The lexical embedder never reuses, even an identical spec
+    assert recall(HashingEmbedder(dim=256), postgres, postgres).mode == "seed"
+
+
+def test_similar_prompt_seeds_generation():
+    store = make_store(reuse_threshold=0.99, seed_threshold=0.5)
+
+    async def run():
+        await store.index("ecommerce store for shoes with react node and postgres")
+        return await store.lookup("ecommerce store for hats with react node and postgres")
+
+    recall = asyncio.run(run())
+    assert recall.mode == "seed"
+    assert 0.5 <= recall.similarity < 0.99
+
+
+def test_memory_backend_evicts_oldest_and_keeps_spaces_apart():
+    backend = NumpyVectorBackend(dim=4, max_entries=2)
+    vectors = np.eye(4, dtype=np.float32)
+
+    async def run():
+        await backend.add(["a", "b"], vectors[:2], ["a", "b"], [{}, {}], "hashing")
+        await backend.add(["c"], vectors[2:3], ["c"], [{}], "gemini")
+        return (
+            await backend.count(),
+            await backend.search(vectors[0], 5, "hashing"),
+            await backend.search(vectors[2], 5, "gemini"),
+        )
+
+    count, hashing, gemini = asyncio.run(run())
+    assert count == 2
+    assert [m.id for m in hashing] == ["b"]
+    assert [m.id for m in gemini] == ["c"]
+
+
+class CountingEmbedder(HashingEmbedder):
+    def __init__(self):
+        super().__init__(dim=64)
+        self.calls = 0
+
+    async def embed(self, texts):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return await super().embed(texts)
+
+
+def test_batcher_embeds_many_requests_in_few_calls_and_sheds_overflow():
+    embedder = CountingEmbedder()
+    store = EmbeddingStore(embedder=embedder, backend=NumpyVectorBackend(dim=64))
+    store.batcher = EmbeddingBatcher(store, max_batch=16, window_ms=20, max_queue=40)
+
+    async def run():
+        accepted = [
+            await store_generation_embedding(f"generation {i}", store=store)
+            for i in range(50)
+        ]
+        await store.close()
+        return accepted
+
+    accepted = asyncio.run(run())
+    assert accepted.count(False) == 10
+
+    stats = store.batcher.stats()
+    assert stats["embedded"] == 40
+    assert stats["dropped"] == 10
+    assert embedder.calls == stats["batches"] == 3
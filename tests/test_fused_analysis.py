@@ -0,0 +1,105 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.schemas.architecture_spec import ArchitectureSpec
+from app.services.chat_service import ChatService
+from app.services.intent_service import Intent
+from app.services.llm.cache import LLMResponseCache
+from app.services.llm.orchestrator import LLMOrchestrator
+from app.services.llm.single_flight import SingleFlight
+
+SPEC = ArchitectureSpec(
+    project_name="Shop",
+    description="An online store for shoes",
+    use_case="ecommerce",
+    requirements=["payments"],
+    tech_stack=["react", "fastapi"],
+)
+CLEAR = {"is_clear": True, "questions": [], "spec": SPEC}
+UNCLEAR = {"is_clear": False, "questions": ["Who are the users?"], "spec": None}
+
+
+def orchestrator(answer):
+    provider = SimpleNamespace(name="groq", model_name="llama", temperature=0.1)
+    calls = []
+
+    async def analyze_and_expand(prompt):
+        calls.append(prompt)
+        return answer
+
+    provider.analyze_and_expand = analyze_and_expand
+
+    async def run(method, candidates, attempt, on_success=None):
+        result = await attempt(provider)
+        on_success(provider)
+        return result
+
+    registry = SimpleNamespace(
+        cache=LLMResponseCache(), flights=SingleFlight(), hedger=None,
+        executor=SimpleNamespace(run=run),
+        limiter=SimpleNamespace(admit=lambda *a: asyncio.sleep(0)),
+        cancellations=None,
+        groq=lambda temperature: provider,
+        gemini=lambda temperature: provider,
+    )
+    llm = LLMOrchestrator(registry)
+    llm._candidates = lambda p: [p.name]
+    return llm, calls
+
+
+def test_fused_result_round_trips_through_the_cache():
+    for answer in (CLEAR, UNCLEAR):
+        llm, calls = orchestrator(answer)
+
+        async def twice():
+            results = [await llm.analyze_and_expand("a shoe store") for _ in range(2)]
+            key = llm._cache_key(
+                "analyze_and_expand", llm._get_groq(), "analyze_and_expand.txt", "a shoe store"
+            )
+            return results, await llm.cache.get(key)
+
+        (first, hit), stored = asyncio.run(twice())
+        assert len(calls) == 1
+        # Stored as plain JSON, handed back with the spec rebuilt (or None)
+        assert stored["spec"] == (SPEC.dict() if answer["spec"] else None)
+        for result in (first, hit):
+            assert result["is_clear"] == answer["is_clear"]
+            assert result["questions"] == answer["questions"]
+            if answer["spec"] is None:
+                assert result["spec"] is None
+            else:
+                assert isinstance(result["spec"], ArchitectureSpec) and result["spec"] == SPEC
+        if answer["spec"] is not None:
+            assert first["spec"] is not hit["spec"]
+
+
+def test_chat_takes_clarify_or_proceed_from_one_fused_call():
+    class FakeLLM:
+        def __init__(self, answer):
+            self.answer = answer
+            self.calls = 0
+
+        async def analyze_and_expand(self, message):
+            self.calls += 1
+            return {**self.answer, "spec": self.answer["spec"].model_copy() if self.answer["spec"] else None}
+
+        async def analyze_prompt_completeness(self, message):
+            raise AssertionError("fused mode makes a single call")
+
+    async def chat(answer):
+        llm = FakeLLM(answer)
+        service = ChatService(SimpleNamespace(llm=llm))
+        service.intents = SimpleNamespace(resolve=lambda m: asyncio.sleep(0, Intent.GENERATE_ARCHITECTURE))
+        return llm, await service.chat("a shoe store", fused=True, speculative=False)
+
+    llm, result = asyncio.run(chat(UNCLEAR))
+    assert llm.calls == 1
+    assert result == {
+        "mode": "clarify", "questions": ["Who are the users?"], "original_prompt": "a shoe store"
+    }
+
+    llm, result = asyncio.run(chat(CLEAR))
+    assert llm.calls == 1
+    assert result["mode"] == "generate" and result["analysis_mode"] == "fused"
+    # The expanded spec is reused by the route: no second normalization
+    assert result["spec"].description == SPEC.description and result["spec"].inferred
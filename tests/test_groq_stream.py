@@ -0,0 +1,54 @@
+import asyncio
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from app.core.config import settings
+from app.services.llm.groq_provider import GroqLLMProvider
+from app.services.llm.resilience import CircuitBreaker, RetryExecutor
+
+DESIGN = "## 1. High-level architecture\n\nA FastAPI monolith in front of Postgres."
+
+
+class BrokenChatModel(GenericFakeChatModel):
+    async def _astream(self, *args, **kwargs):
+        raise ConnectionError("groq stream reset")
+        yield  # an async generator that fails before its first chunk
+
+
+def groq(monkeypatch, model):
+    monkeypatch.setattr(settings, "GROQ_API_KEY", "test-key")
+    provider = GroqLLMProvider(temperature=0.1)
+    provider.model = model  # the prompt is piped into whatever chat model is set
+    return provider
+
+
+def test_native_stream_forwards_chunks_in_order(monkeypatch):
+    provider = groq(monkeypatch, GenericFakeChatModel(messages=iter([AIMessage(content=DESIGN)])))
+
+    async def collect():
+        return [token async for token in provider.stream_system_design("Project Name: Blog")]
+
+    tokens = asyncio.run(collect())
+    assert len(tokens) > 1  # streamed, not one final message
+    assert "".join(tokens) == DESIGN
+
+
+def test_stream_error_reaches_the_failover_executor(monkeypatch):
+    providers = {
+        "groq": groq(monkeypatch, BrokenChatModel(messages=iter([]))),
+        "gemini": groq(monkeypatch, GenericFakeChatModel(messages=iter([AIMessage(content=DESIGN)]))),
+    }
+    breakers = {name: CircuitBreaker(name, failure_threshold=1) for name in providers}
+    executor = RetryExecutor(lambda name, t: providers[name], breakers, base_delay=0, max_delay=0)
+
+    async def collect():
+        stream = executor.stream(
+            "system_design", ["groq", "gemini"],
+            lambda provider: provider.stream_system_design("Project Name: Blog"),
+        )
+        return [token async for token in stream]
+
+    assert "".join(asyncio.run(collect())) == DESIGN
+    assert executor.breakers["groq"].stats()["failures"] == 1
+    assert executor.stats()["methods"]["system_design"]["retries"] == 1
@@ -0,0 +1,56 @@
+import asyncio
+
+from app.services.llm.hedging import Hedger, HedgePolicy
+
+
+class FakeProvider:
+    def __init__(self, name, delay):
+        self.name = name
+        self.delay = delay
+        self.cancelled = False
+
+    async def call(self):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return self.name
+
+    async def stream(self):
+        await asyncio.sleep(self.delay)
+        for token in ("a", "b"):
+            yield f"{self.name}:{token}"
+
+
+def _hedger():
+    return Hedger({"system_design": HedgePolicy(default_delay_ms=20, min_delay_ms=1)})
+
+
+def test_slow_primary_is_hedged_and_cancelled():
+    hedger = _hedger()
+    slow, fast = FakeProvider("gemini", 1.0), FakeProvider("groq", 0.01)
+
+    async def run():
+        result = await hedger.call("system_design", slow, fast, slow.call, fast.call)
+        await asyncio.sleep(0)  # let the cancellation land
+        return result
+
+    assert asyncio.run(run()) == "groq"
+    assert slow.cancelled
+    assert hedger.stats()["methods"]["system_design"]["hedge_wins"] == 1
+
+
+def test_fast_primary_stream_never_hedges():
+    hedger = _hedger()
+    fast, other = FakeProvider("gemini", 0.0), FakeProvider("groq", 0.0)
+
+    async def run():
+        return [
+            t async for t in hedger.stream(
+                "system_design", fast, other, fast.stream, other.stream
+            )
+        ]
+
+    assert asyncio.run(run()) == ["gemini:a", "gemini:b"]
+    assert hedger.stats()["methods"]["system_design"]["hedges_fired"] == 0
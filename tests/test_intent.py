@@ -0,0 +1,38 @@
+import asyncio
+
+from app.services.intent_service import Intent, IntentService
+
+
+class FakeLLM:
+    def __init__(self, answer):
+        self.answer = answer
+        self.calls = 0
+
+    async def classify_intent(self, message):
+        self.calls += 1
+        return self.answer
+
+
+def test_classifier_routes_beyond_the_old_keyword_list():
+    # The keyword scan sent both of these to the generate flow
+    assert IntentService.detect("what app do you use?") == Intent.CHAT
+    assert IntentService.detect("how do I build muscle fast?") == Intent.CHAT
+    # …and sent this one to chat
+    assert IntentService.detect(
+        "I need a marketplace for selling used cars with react and node"
+    ) == Intent.GENERATE_ARCHITECTURE
+
+
+def test_llm_is_only_asked_below_the_confidence_threshold():
+    llm = FakeLLM("chat")
+
+    confident = IntentService(llm, threshold=0.5)
+    assert asyncio.run(confident.resolve("build me an ecommerce website")) == (
+        Intent.GENERATE_ARCHITECTURE
+    )
+    assert llm.calls == 0
+
+    unsure = IntentService(llm, threshold=1.01)
+    assert asyncio.run(unsure.resolve("build me an ecommerce website")) == Intent.CHAT
+    assert llm.calls == 1
+    assert unsure.stats()["llm_fallback"] == 1
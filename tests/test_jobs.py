@@ -0,0 +1,184 @@
+import asyncio
+
+import pytest
+
+from app.jobs.backends import InMemoryJobBackend
+from app.jobs.manager import JobCancelled, JobManager, JobQueueFull
+from app.schemas.generate import GenerateRequest
+
+
+class FakeService:
+    def __init__(self, delay=0.0, error=None):
+        self.delay = delay
+        self.error = error
+        self.started = asyncio.Event()
+        self.interrupted = None
+
+    async def generate_architecture(self, payload, progress=None):
+        for stage in ("normalize", "system_design", "component_tree", "package"):
+            try:
+                await progress(stage)
+            except BaseException as e:
+                # What nested shield / single-flight code would see
+                self.interrupted = (e, asyncio.current_task().cancelling())
+                raise
+            self.started.set()
+            await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return {"id": "gen-1", "result": {"input_spec": {"project_name": payload.project_name}}}
+
+
+async def collect(manager, job_id, after=0):
+    events = []
+    while True:
+        batch = await manager.backend.events(job_id, after, timeout=5)
+        assert batch, "job stalled before a final event"
+        for n, event in batch:
+            events.append((n, event))
+            after = n
+            if event["type"] in ("done", "error", "cancelled"):
+                return events
+
+
+def test_job_runs_in_the_background_with_progress_and_result():
+    async def run():
+        manager = JobManager(FakeService(), InMemoryJobBackend(max_queue=10, ttl=60), workers=2)
+        await manager.start()
+        job = await manager.submit(GenerateRequest(project_name="shop"))
+        assert job["status"] == "queued"
+
+        events = await collect(manager, job["id"])
+        resumed = await collect(manager, job["id"], after=3)
+        state = await manager.get(job["id"])
+        await manager.stop()
+        return manager, events, resumed, state
+
+    manager, events, resumed, state = asyncio.run(run())
+
+    assert [e["type"] for _, e in events] == ["status"] + ["progress"] * 4 + ["done"]
+    assert [e["stage"] for _, e in events if e["type"] == "progress"] == [
+        "normalize", "system_design", "component_tree", "package"
+    ]
+    assert [n for n, _ in resumed] == [4, 5, 6]
+    assert state["status"] == "succeeded" and state["progress"] == 1.0
+    assert state["result"]["result"]["input_spec"]["project_name"] == "shop"
+    assert manager.counters["succeeded"] == 1
+
+
+def test_failures_are_reported_instead_of_raised():
+    async def run():
+        manager = JobManager(FakeService(error=ValueError("bad tree")), InMemoryJobBackend(10, 60), workers=1)
+        await manager.start()
+        job = await manager.submit(GenerateRequest(project_name="shop"))
+        events = await collect(manager, job["id"])
+        await manager.stop()
+        return events, await manager.get(job["id"])
+
+    events, state = asyncio.run(run())
+
+    assert events[-1][1]["type"] == "error"
+    assert state["status"] == "failed"
+    assert state["error"] == {"exception": "ValueError", "detail": "bad tree", "status_code": 500}
+
+
+def test_full_queue_rejects_and_queued_or_running_jobs_can_be_cancelled():
+    async def run():
+        service = FakeService(delay=10)
+        manager = JobManager(service, InMemoryJobBackend(max_queue=1, ttl=60), workers=1)
+        await manager.start()
+        running = await manager.submit(GenerateRequest(project_name="a"))
+        await service.started.wait()
+        queued = await manager.submit(GenerateRequest(project_name="b"))
+        with pytest.raises(JobQueueFull):
+            await manager.submit(GenerateRequest(project_name="c"))
+
+        await manager.cancel(queued["id"])
+        await manager.cancel(running["id"])
+        events = await collect(manager, running["id"])
+        states = [await manager.get(running["id"]), await manager.get(queued["id"])]
+        await manager.stop()
+        return manager, events, states
+
+    manager, events, states = asyncio.run(run())
+
+    assert events[-1][1] == {"type": "cancelled"}
+    assert [s["status"] for s in states] == ["cancelled", "cancelled"]
+    assert manager.counters["rejected"] == 1
+    assert manager.counters["cancelled"] == 2
+    assert manager.counters["started"] == 1
+
+
+def test_job_cancelled_from_another_process_stops_at_its_next_stage():
+    async def run():
+        service = FakeService(delay=0.05)
+        backend = InMemoryJobBackend(max_queue=10, ttl=60)
+        worker = JobManager(service, backend, workers=1)
+        api = JobManager(service, backend, workers=1)  # same backend, runs nothing here
+        await worker.start()
+        job = await worker.submit(GenerateRequest(project_name="shop"))
+        await service.started.wait()
+        task = worker.running[job["id"]]
+
+        await api.cancel(job["id"])
+        events = await collect(worker, job["id"])
+        await task
+        state = await worker.get(job["id"])
+        await worker.stop()
+        return service, worker, task, events, state
+
+    service, worker, task, events, state = asyncio.run(run())
+
+    # Stopped by the flag at a stage boundary, not by cancelling the task
+    error, cancelling = service.interrupted
+    assert isinstance(error, JobCancelled) and cancelling == 0
+    assert not task.cancelled()
+    assert events[-1][1] == {"type": "cancelled"}
+    assert len([e for _, e in events if e["type"] == "progress"]) < 4
+    assert state["status"] == "cancelled" and state["error"] is None
+    assert worker.counters["cancelled"] == 1 and worker.counters["succeeded"] == 0
+
+
+class DequeueHookBackend(InMemoryJobBackend):
+    """Lets the test act right after a job is dequeued or marked running."""
+
+    def __init__(self, pause_running=False):
+        super().__init__(max_queue=10, ttl=60)
+        self.pause_running = pause_running
+        self.dequeued = asyncio.Event()
+        self.marking_running = asyncio.Event()
+
+    async def dequeue(self, timeout):
+        item = await super().dequeue(timeout)
+        if item is not None:
+            self.dequeued.set()
+        return item
+
+    async def update(self, job_id, **fields):
+        if self.pause_running and fields.get("status") == "running":
+            self.marking_running.set()
+            await asyncio.sleep(10)
+        await super().update(job_id, **fields)
+
+
+def test_cancel_right_after_dequeue_still_ends_the_job():
+    async def run(pause_running):
+        backend = DequeueHookBackend(pause_running)
+        manager = JobManager(FakeService(), backend, workers=1)
+        await manager.start()
+        job = await manager.submit(GenerateRequest(project_name="shop"))
+        # Before the job task's first step, or while it marks itself running
+        await (backend.marking_running if pause_running else backend.dequeued).wait()
+        assert job["id"] in manager.running
+
+        await manager.cancel(job["id"])
+        events = await collect(manager, job["id"])
+        state = await manager.get(job["id"])
+        await manager.stop()
+        return manager, events, state
+
+    for pause_running in (False, True):
+        manager, events, state = asyncio.run(run(pause_running))
+        assert events[-1][1] == {"type": "cancelled"}
+        assert state["status"] == "cancelled"
+        assert manager.counters["cancelled"] == 1 and manager.counters["succeeded"] == 0
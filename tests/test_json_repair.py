@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+from app.schemas.architecture_spec import ArchitectureSpec
+from app.utils.json_repair import RepairStats, parse_llm_json, repair_json
+from app.utils.spec_coercion import coerce_architecture_spec
+
+
+@pytest.mark.parametrize("raw, expected", [
+    # Prose + fences + trailing commas
+    ('Sure!\n```json\n{"a": 1, "b": [1, 2,],}\n```\nAnything else?', {"a": 1, "b": [1, 2]}),
+    # Single quotes, Python literals, unquoted keys
+    ("{'is_clear': True, blocking_missing: None}", {"is_clear": True, "blocking_missing": None}),
+    # Comments and raw newlines inside strings
+    ('{"a": "line1\nline2", // note\n "b": 2 /* x */}', {"a": "line1\nline2", "b": 2}),
+    # Truncated mid-string (the partial value is dropped) and mid-key
+    ('{"folders": ["app/", "app/ro', {"folders": ["app/"]}),
+    ('{"folders": ["app/ro', {"folders": []}),
+    ('{"a": 1, "b": "cut o', {"a": 1}),
+    ('{"a": {"b": 1}, "c": [1, 2], "d"', {"a": {"b": 1}, "c": [1, 2]}),
+    ('{"a": 1, "lo', {"a": 1}),
+    # Missing comma, mismatched closer, nested fence inside a value
+    ('{"q": ["x" "y"}', {"q": ["x", "y"]}),
+    ('{"d": "graph ```mermaid A-->B```"}', {"d": "graph ```mermaid A-->B```"}),
+])
+def test_repair_json_fixes_common_llm_defects(raw, expected):
+    assert json.loads(repair_json(raw)) == expected
+
+
+def test_parse_llm_json_counts_clean_repaired_and_regenerated(monkeypatch):
+    stats = RepairStats()
+    monkeypatch.setattr("app.utils.json_repair.repair_stats", stats)
+
+    assert parse_llm_json('{"ok": true}', "spec") == {"ok": True}
+    assert parse_llm_json('{"ok": true,', "spec") == {"ok": True}
+    with pytest.raises(ValueError):
+        parse_llm_json("I cannot help with that.", "spec")
+
+    report = stats.stats()["spec"]
+    assert (report["clean"], report["repaired"], report["regenerated"]) == (1, 1, 1)
+    assert report["repair_rate"] == 0.5
+    assert report["round_trips_saved"] == 1
+
+
+def test_schema_guided_coercion_salvages_a_near_miss_spec():
+    data = {
+        "Project Name": "Shop",
+        "description": ["An", "online store"],
+        "useCase": "B2C retail",
+        "requirements": "- cart\n- checkout\n3) payments",
+        "techStack": {"frontend": "React", "backend": "FastAPI, Postgres"},
+    }
+    spec = ArchitectureSpec(**coerce_architecture_spec(data))
+    assert spec.project_name == "Shop"
+    assert spec.description == "An online store"
+    assert spec.requirements == ["cart", "checkout", "payments"]
+    assert spec.tech_stack == ["React", "FastAPI", "Postgres"]
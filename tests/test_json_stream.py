@@ -0,0 +1,103 @@
+import asyncio
+import json
+import random
+
+from app.services.generation_service import GenerationService
+from app.utils.json_stream import IncrementalJSONParser, iter_tree_nodes
+
+TREE = {"folders": ["app/", "app/main.py", "app/routes/", "app/services/auth.py"]}
+
+
+def chunks(text, seed):
+    rng = random.Random(seed)
+    i = 0
+    while i < len(text):
+        j = i + rng.randint(1, 9)
+        yield text[i:j]
+        i = j
+
+
+def test_nodes_are_emitted_as_soon_as_they_close_across_any_chunking():
+    raw = "Here you go:\n```json\n" + json.dumps(TREE, indent=2) + "\n```"
+
+    for seed in range(50):
+        parser = IncrementalJSONParser()
+        parts = list(chunks(raw, seed))
+        seen, emitted_at = [], []
+        for i, chunk in enumerate(parts):
+            for node in iter_tree_nodes(parser.feed(chunk)):
+                seen.append(node)
+                emitted_at.append(i)
+        assert seen == TREE["folders"]
+        # Nodes arrive while the reply is still streaming
+        assert emitted_at[0] < len(parts) - 1
+        assert parser.close() == TREE
+
+
+def test_parser_handles_escapes_nesting_and_trailing_commas():
+    parser = IncrementalJSONParser()
+    for ch in '{"a": "q\\"\\u00e9\\n", "b": [1, -2.5e1, true, null, {"c": []},], }':
+        parser.feed(ch)
+    assert parser.close() == {"a": 'q"é\n', "b": [1, -25.0, True, None, {"c": []}]}
+
+
+class FakeLLM:
+    def __init__(self, parts):
+        self.parts = parts
+        self.fallbacks = 0
+
+    async def stream_component_tree(self, system_design):
+        for part in self.parts:
+            yield part
+
+    async def generate_component_tree(self, system_design):
+        self.fallbacks += 1
+        return TREE
+
+
+def test_generation_service_streams_nodes_and_repairs_truncation():
+    async def collect(llm):
+        service = GenerationService(llm)
+        return [event async for event in service.stream_component_tree("design")]
+
+    llm = FakeLLM(list(chunks(json.dumps(TREE), 0)))
+    events = asyncio.run(collect(llm))
+    assert events == [("node", n) for n in TREE["folders"]] + [("tree", TREE)]
+    assert llm.fallbacks == 0
+
+    truncated = FakeLLM(['```json\n{"folders": ["app/", "app/ma'])
+    events = asyncio.run(collect(truncated))
+    # The cut-off "app/ma" is not a path: dropped, not closed
+    assert events == [("node", "app/"), ("tree", {"folders": ["app/"]})]
+    assert truncated.fallbacks == 0
+
+
+def test_generation_service_falls_back_when_the_stream_breaks():
+    class BrokenLLM(FakeLLM):
+        async def stream_component_tree(self, system_design):
+            yield '{"folders": ["app/",'
+            raise ConnectionError("stream reset")
+
+    async def collect(llm):
+        service = GenerationService(llm)
+        return [event async for event in service.stream_component_tree("design")]
+
+    llm = BrokenLLM([])
+    assert asyncio.run(collect(llm)) == [("node", "app/"), ("tree", TREE)]
+    assert llm.fallbacks == 1
+
+
+def test_streamed_node_paths_match_the_normalized_tree():
+    raw = {"folders": ["./app//main.py", "app/routes", "app/routes/users.py", "/etc/passwd"]}
+
+    async def collect():
+        service = GenerationService(FakeLLM([json.dumps(raw)]))
+        events = [event async for event in service.component_tree_events("design")]
+        return service, events
+
+    service, events = asyncio.run(collect())
+    nodes = [value for kind, value in events if kind == "node"]
+    # Parents appear first; a file later seen with children reappears as a directory
+    assert nodes == ["app/", "app/main.py", "app/routes", "app/routes/", "app/routes/users.py"]
+    final = service.normalize_tree(events[-1][1])["folders"]
+    assert set(final) <= set(nodes)
@@ -0,0 +1,135 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.services.llm.base import StructuredOutputError
+from app.services.llm.cache import LLMResponseCache
+from app.services.llm.hedging import Hedger, HedgePolicy
+from app.services.llm.orchestrator import LLMOrchestrator
+from app.services.llm.registry import DEFAULT_TEMPERATURES
+from app.services.llm.resilience import CircuitBreaker, RetryExecutor
+from app.services.llm.single_flight import SingleFlight
+
+
+def _key(cache, payload):
+    return cache.make_key(
+        method="system_design",
+        provider="gemini",
+        model="gemini-2.5-flash",
+        temperature=0.2,
+        template="system_design.txt",
+        payload=payload,
+    )
+
+
+def test_key_ignores_whitespace_differences():
+    cache = LLMResponseCache()
+
+    assert _key(cache, "Project Name: Blog\n   Tech: FastAPI") == _key(
+        cache, "  Project Name: Blog Tech: FastAPI  "
+    )
+    assert _key(cache, "Project Name: Blog") != _key(cache, "Project Name: Shop")
+
+
+def test_lru_eviction_and_counters():
+    cache = LLMResponseCache(max_entries=2)
+
+    async def run():
+        await cache.set("a", "1")
+        await cache.set("b", "2")
+        assert await cache.get("a") == "1"  # a becomes most recent
+        await cache.set("c", "3")           # evicts b
+        assert await cache.get("b") is None
+        assert await cache.get("c") == "3"
+
+    asyncio.run(run())
+
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+
+
+def test_ttl_and_disk_tier(tmp_path):
+    cache = LLMResponseCache(ttl_seconds=60, disk_dir=str(tmp_path))
+
+    async def run():
+        await cache.set("k", {"folders": ["app/"]})
+        cache.clear()
+        # Memory is empty, disk tier answers and re-warms memory
+        assert await cache.get("k") == {"folders": ["app/"]}
+
+        expired = LLMResponseCache(ttl_seconds=0)
+        await expired.set("k", "v")
+        assert await expired.get("k") is None
+
+    asyncio.run(run())
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_changing_a_returned_tree_does_not_change_the_cached_one():
+    cache = LLMResponseCache()
+    llm = LLMOrchestrator(SimpleNamespace(
+        cache=cache, flights=SingleFlight(), hedger=None, executor=None,
+        limiter=None, cancellations=None,
+    ))
+    provider = SimpleNamespace(name="groq", model_name="llama", temperature=0.1)
+    calls = []
+
+    async def call(on_success):
+        calls.append(1)
+        on_success(provider)
+        return {"folders": ["app/", "app/main.py"]}
+
+    async def run():
+        first = await llm._cached("component_tree", provider, "component_tree.txt", "design", call)
+        first["folders"].append("mutated/")
+        return await llm._cached("component_tree", provider, "component_tree.txt", "design", call)
+
+    assert asyncio.run(run()) == {"folders": ["app/", "app/main.py"]}
+    assert len(calls) == 1
+
+
+def test_answers_from_another_provider_or_temperature_are_not_cached_under_the_primary():
+    def provider(name, temperature=None):
+        temperature = DEFAULT_TEMPERATURES[name] if temperature is None else temperature
+        return SimpleNamespace(name=name, model_name=f"{name}-model", temperature=temperature)
+
+    executor = RetryExecutor(
+        provider, {name: CircuitBreaker(name) for name in DEFAULT_TEMPERATURES},
+        base_delay=0, max_delay=0,
+    )
+    llm = LLMOrchestrator(SimpleNamespace(
+        cache=LLMResponseCache(), flights=SingleFlight(),
+        hedger=Hedger({"component_tree": HedgePolicy(default_delay_ms=5, min_delay_ms=1)}),
+        executor=executor, limiter=SimpleNamespace(admit=lambda *a: asyncio.sleep(0)),
+        cancellations=None,
+    ))
+    llm._candidates = lambda p: [p.name]
+    llm._secondary = lambda p: provider("groq")
+    gemini = provider("gemini")
+
+    def tree(scenario):
+        calls = []
+
+        async def call(p):
+            calls.append((p.name, p.temperature))
+            if scenario == "parse" and p.temperature == 0.2:
+                raise StructuredOutputError("bad json")
+            if scenario == "hedge" and p.name == "gemini":
+                await asyncio.sleep(1)  # the hedge on groq answers first
+            return {"folders": [f"{p.name}/"]}
+
+        async def run():
+            for _ in range(2):
+                await llm._cached(
+                    "component_tree", gemini, "component_tree.txt", scenario,
+                    llm._resilient("component_tree", gemini, scenario, call),
+                )
+        asyncio.run(run())
+        return calls
+
+    # Answered by gemini at its own temperature: the second call is a hit
+    assert tree("ok") == [("gemini", 0.2)]
+    # Cooler retry, or the hedge won: never stored under gemini@0.2
+    assert tree("parse") == [("gemini", 0.2), ("gemini", 0.1)] * 2
+    assert [c for c in tree("hedge") if c[0] == "groq"] == [("groq", 0.1)] * 2
@@ -0,0 +1,88 @@
+import asyncio
+
+import numpy as np
+
+from app.embedding.backends import MmapVectorBackend
+from app.embedding.mmap_index import MmapVectorIndex
+
+
+def random_unit(n, dim, seed=0):
+    v = np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+
+def test_append_persists_and_reopens_without_loading(tmp_path):
+    vectors = random_unit(5000, 32)
+    index = MmapVectorIndex(tmp_path, 32)
+    index.append(vectors[:3000], [{"n": i} for i in range(3000)])
+    index.append(vectors[3000:], [{"n": i} for i in range(3000, 5000)])
+    index.flush()
+
+    reopened = MmapVectorIndex(tmp_path, 32)
+    assert reopened.count == 5000
+    assert isinstance(reopened.vectors, np.memmap)
+
+    scores, rows = reopened.search(vectors[[7, 4321]], k=3)
+    assert rows[:, 0].tolist() == [7, 4321]
+    assert np.allclose(scores[:, 0], 1.0, atol=1e-5)
+    assert reopened.payload(4321) == {"n": 4321}
+
+    # Exact top-k matches a brute-force scan
+    query = random_unit(1, 32, seed=1)
+    expected = np.argsort(-(vectors @ query[0]))[:10]
+    assert reopened.search(query, k=10)[1][0].tolist() == expected.tolist()
+
+
+def test_ivf_search_finds_near_duplicates_and_new_rows(tmp_path):
+    vectors = random_unit(4000, 16)
+    index = MmapVectorIndex(tmp_path, 16)
+    index.append(vectors, [{} for _ in range(4000)])
+    index.train_ivf(nlist=32)
+
+    extra = random_unit(10, 16, seed=2)
+    index.append(extra, [{} for _ in range(10)])
+    assert index.untrained_rows == 10
+
+    queries = np.vstack([vectors[:50], extra[:5]]) + 0.01
+    _, rows = index.search(queries, k=1, nprobe=4)
+    expected = list(range(50)) + list(range(4000, 4005))
+    recall = np.mean(rows[:, 0] == np.array(expected))
+    assert recall >= 0.9
+
+
+def test_backend_keeps_embedder_spaces_in_separate_indexes(tmp_path):
+    backend = MmapVectorBackend(path=str(tmp_path), dim=8, ivf_lists=0)
+    vectors = np.eye(8, dtype=np.float32)
+
+    async def run():
+        await backend.add(["a"], vectors[:1], ["alpha"], [{"design": "A"}], "hashing")
+        await backend.add(["b"], vectors[:1], ["beta"], [{}], "gemini")
+        return await backend.search(vectors[0], 5, "hashing")
+
+    matches = asyncio.run(run())
+    assert [(m.id, m.text, m.record) for m in matches] == [("a", "alpha", {"design": "A"})]
+    assert (tmp_path / "hashing" / "vectors.f32").exists()
+
+
+def test_retraining_switches_lists_atomically_and_keeps_old_mappings_valid(tmp_path):
+    vectors = random_unit(2000, 16)
+    index = MmapVectorIndex(tmp_path, 16)
+    index.append(vectors, [{} for _ in range(2000)])
+    index.train_ivf(nlist=16)
+    first = index.ivf
+
+    index.append(random_unit(500, 16, seed=3), [{} for _ in range(500)])
+    index.train_ivf(nlist=16, seed=1)
+
+    # A search holding the previous lists still reads intact, consistent data
+    assert first.trained_count == 2000 and len(first.order) == 2000
+    assert sorted(np.asarray(first.order).tolist()) == list(range(2000))
+    assert index.ivf.trained_count == 2500 and index.untrained_rows == 0
+    assert sorted(p.name for p in tmp_path.glob("ivf_*")) == [
+        "ivf_bounds.2.npy", "ivf_centroids.2.npy", "ivf_order.2.npy"
+    ]
+
+    reopened = MmapVectorIndex(tmp_path, 16)
+    assert reopened.ivf_generation == 2 and reopened.trained_count == 2500
+    _, rows = reopened.search(vectors[:20] + 0.01, k=1, nprobe=4)
+    assert np.mean(rows[:, 0] == np.arange(20)) >= 0.9
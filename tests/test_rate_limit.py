@@ -0,0 +1,43 @@
+import asyncio
+
+import pytest
+
+from app.services.llm.rate_limit import (
+    AdmissionController,
+    InMemoryBucketBackend,
+    RateLimitExceeded,
+)
+
+
+def test_calls_over_budget_wait_then_are_admitted():
+    # 600 tokens per minute → refills 10 tokens per second
+    limiter = AdmissionController(
+        InMemoryBucketBackend(), {"groq": {"tpm": 600}}, max_wait=1.0
+    )
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        await limiter.admit("groq", 600)  # drains the bucket
+        start = loop.time()
+        await limiter.admit("groq", 2)    # needs ~0.2s of refill
+        return loop.time() - start
+
+    assert 0.1 < asyncio.run(run()) < 1.0
+    stats = limiter.stats()["groq"]
+    assert stats["admitted"] == 2
+    assert stats["waited"] == 1
+    assert stats["queue_depth"] == 0
+
+
+def test_full_queue_and_deadline_reject():
+    limiter = AdmissionController(
+        InMemoryBucketBackend(), {"groq": {"rpm": 1}}, max_queue=1, max_wait=0.05
+    )
+
+    async def run():
+        await limiter.admit("groq", 10)  # spends the only token
+        with pytest.raises(RateLimitExceeded):
+            await limiter.admit("groq", 10)  # next token in 60s > deadline
+
+    asyncio.run(run())
+    assert limiter.stats()["groq"]["rejected"] == 1
@@ -0,0 +1,64 @@
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.dependencies.llm import get_chat_service, get_generation_service, get_provider_registry
+from app.routes.stats import router as stats_router
+from app.services.chat_service import ChatService
+from app.services.generation_service import GenerationService
+from app.services.llm.orchestrator import LLMOrchestrator
+from app.services.llm.registry import ProviderRegistry
+
+
+def build_app():
+    # Same wiring as app.main's lifespan, without the database and job workers
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        registry = ProviderRegistry()
+        generation_service = GenerationService(LLMOrchestrator(registry), embeddings=None)
+        app.state.llm_registry = registry
+        app.state.generation_service = generation_service
+        app.state.chat_service = ChatService(generation_service)
+        yield
+        await generation_service.shutdown()
+
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(stats_router)
+
+    @app.get("/probe/generate")
+    def generate_probe(service: GenerationService = Depends(get_generation_service)):
+        return {"registry": id(service.llm.registry)}
+
+    @app.get("/probe/chat")
+    def chat_probe(chat_service: ChatService = Depends(get_chat_service)):
+        return {"registry": id(chat_service.llm.registry)}
+
+    @app.get("/probe/registry")
+    def registry_probe(registry: ProviderRegistry = Depends(get_provider_registry)):
+        registry.groq()  # opens the shared Groq keep-alive pools
+        return {"registry": id(registry)}
+
+    return app
+
+
+def test_routes_share_one_registry_and_shutdown_closes_its_pools(monkeypatch):
+    monkeypatch.setattr(settings, "GROQ_API_KEY", "test-key")
+    app = build_app()
+
+    with TestClient(app) as client:
+        ids = {
+            client.get(f"/probe/{name}").json()["registry"]
+            for name in ("generate", "chat", "registry", "generate")
+        }
+        registry = app.state.llm_registry
+        assert ids == {id(registry)}
+
+        pool = registry._groq_async_http
+        assert not pool.is_closed
+        assert client.get("/stats/llm").json()["providers"] == [{"name": "groq", "temperature": 0.1}]
+
+    # Lifespan exit → GenerationService → orchestrator → registry.shutdown()
+    assert pool.is_closed
+    assert registry._groq_async_http is None and registry._providers == {}
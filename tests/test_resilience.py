@@ -0,0 +1,84 @@
+import asyncio
+
+from app.services.llm.base import StructuredOutputError
+from app.services.llm.hedging import Hedger, HedgePolicy
+from app.services.llm.registry import DEFAULT_TEMPERATURES
+from app.services.llm.resilience import CircuitBreaker, RetryExecutor
+
+
+class FakeProvider:
+    def __init__(self, name, temperature):
+        self.name = name
+        # Like the registry: no override means the provider's default
+        self.temperature = DEFAULT_TEMPERATURES[name] if temperature is None else temperature
+
+
+def _executor(threshold=5):
+    breakers = {
+        name: CircuitBreaker(name, failure_threshold=threshold, recovery_seconds=60)
+        for name in ("gemini", "groq")
+    }
+    return RetryExecutor(
+        lambda name, t: FakeProvider(name, t), breakers, base_delay=0, max_delay=0
+    )
+
+
+def test_parse_failures_step_down_temperature():
+    for candidates, expected in ((["gemini", "groq"], [0.2, 0.1, 0.0]), (["groq", "gemini"], [0.1, 0.0, 0.0])):
+        executor = _executor()
+        seen = []
+
+        async def attempt(provider):
+            seen.append(provider.temperature)
+            if len(seen) < 3:
+                raise StructuredOutputError("bad json")
+            return "ok"
+
+        assert asyncio.run(executor.run("expand", candidates, attempt)) == "ok"
+        # Every retry is cooler than the provider's own default until the floor
+        assert seen == expected
+        assert executor.stats()["methods"]["expand"]["parse_retries"] == 2
+
+
+def test_hedge_win_is_credited_to_the_provider_that_answered():
+    executor = _executor()
+    hedger = Hedger({"expand": HedgePolicy(default_delay_ms=10, min_delay_ms=1)})
+    secondary = FakeProvider("groq", None)
+
+    async def answer(provider, delay):
+        await asyncio.sleep(delay)
+        return provider.name
+
+    async def attempt(provider):
+        # Same wiring as LLMOrchestrator._resilient
+        return await hedger.call(
+            "expand", provider, secondary,
+            lambda: answer(provider, 1.0), lambda: answer(secondary, 0.01),
+            on_hedge_win=lambda winner: executor.answered_by(winner.name),
+        )
+
+    assert asyncio.run(executor.run("expand", ["gemini", "groq"], attempt)) == "groq"
+    assert executor.breakers["groq"].stats()["successes"] == 1
+    assert executor.breakers["gemini"].stats()["successes"] == 0
+    assert executor._answered == {}
+
+
+def test_provider_error_fails_over_and_trips_breaker():
+    executor = _executor(threshold=1)
+    seen = []
+
+    async def attempt(provider):
+        seen.append(provider.name)
+        if provider.name == "gemini":
+            raise ConnectionError("gemini down")
+        return provider.name
+
+    async def run():
+        first = await executor.run("design", ["gemini", "groq"], attempt)
+        second = await executor.run("design", ["gemini", "groq"], attempt)
+        return first, second
+
+    assert asyncio.run(run()) == ("groq", "groq")
+    # Second call skips gemini entirely: its breaker is open
+    assert seen == ["gemini", "groq", "groq"]
+    assert executor.breakers["gemini"].stats()["state"] == "open"
@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+
+from app.streams.backends import InMemoryReplayBackend, StreamGone
+from app.streams.resumable import ResumableStreams, parse_event_id
+from app.utils.sse import SSEEncoder
+
+
+def frames(count, gate=None):
+    async def produce():
+        sse = SSEEncoder(event_ids=False)
+        for i in range(count):
+            if gate is not None and i == count // 2:
+                await gate.wait()
+            yield sse.event({"type": "system_design", "chunk": str(i)})
+    return produce()
+
+
+async def take(follower, n):
+    out = []
+    async for frame in follower:
+        if frame.startswith("id:"):
+            out.append(frame)
+        if len(out) == n:
+            break
+    return out
+
+
+def test_reconnect_replays_only_missed_frames_while_the_producer_keeps_going():
+    async def run():
+        streams = ResumableStreams(InMemoryReplayBackend(ttl=60, max_events=100, max_bytes=2**20))
+        gate = asyncio.Event()
+        stream_id = await streams.start(frames(10, gate))
+
+        follower = streams.follow(stream_id)
+        first = await take(follower, 3)
+        await follower.aclose()  # the client drops
+
+        gate.set()
+        await asyncio.wait_for(asyncio.gather(*streams.producers.values()), 5)
+
+        _, after = parse_event_id(first[-1].split("\n", 1)[0][len("id: "):])
+        rest = [frame async for frame in await streams.resume(stream_id, after)]
+        return stream_id, first, rest, streams.stats()
+
+    stream_id, first, rest, stats = asyncio.run(run())
+
+    assert first[0] == f'id: {stream_id}:1\ndata: {{"type": "system_design", "chunk": "0"}}\n\n'
+    assert [f.split("\n", 1)[0] for f in rest] == [f"id: {stream_id}:{n}" for n in range(4, 11)]
+    assert stats["completed"] == 1 and stats["resumed"] == 1 and stats["replayed_frames"] == 7
+
+
+def test_evicted_frames_and_expired_streams_cannot_be_resumed():
+    async def run():
+        backend = InMemoryReplayBackend(ttl=60, max_events=4, max_bytes=2**20)
+        streams = ResumableStreams(backend)
+        stream_id = await streams.start(frames(10))
+        await asyncio.gather(*streams.producers.values())
+
+        with pytest.raises(StreamGone):
+            await streams.resume(stream_id, 2)  # 3-6 were dropped
+        tail = [frame async for frame in await streams.resume(stream_id, 6)]
+
+        backend.ttl = 0
+        await backend.create("other")  # prunes finished streams past their TTL
+        with pytest.raises(StreamGone):
+            await streams.resume(stream_id, 6)
+        return tail, streams.stats()
+
+    tail, stats = asyncio.run(run())
+
+    assert len(tail) == 4
+    assert stats["dropped_frames"] == 6 and stats["expired"] == 1 and stats["gone"] == 2
+
+
+def test_total_size_evicts_least_recently_written_finished_streams_first():
+    async def run():
+        backend = InMemoryReplayBackend(ttl=60, max_events=100, max_bytes=120)
+        await backend.create("old")
+        await backend.append("old", "x" * 50)
+        await backend.finish("old")
+        await backend.create("live")
+        await backend.append("live", "y" * 50)
+        await backend.create("new")
+        await backend.append("new", "z" * 50)
+        return backend
+
+    backend = asyncio.run(run())
+
+    assert list(backend.buffers) == ["live", "new"]
+    assert backend.total_bytes == 100
+
+
+def test_parse_event_id():
+    assert parse_event_id("abc123:42") == ("abc123", 42)
+    assert parse_event_id("42") is None
+    assert parse_event_id("abc:x") is None
+    assert parse_event_id(None) is None
+
+
+def redis_backend(max_events):
+    fakeredis = pytest.importorskip("fakeredis")
+    from app.streams.backends import RedisReplayBackend
+
+    backend = RedisReplayBackend("redis://localhost:6379/0", ttl=60, max_events=max_events)
+    backend.client = fakeredis.FakeAsyncRedis()
+    return backend
+
+
+@pytest.mark.parametrize("kind", ["memory", "redis"])
+def test_replay_from_the_start_of_a_trimmed_stream_is_gone(kind):
+    async def run():
+        if kind == "memory":
+            backend = InMemoryReplayBackend(ttl=60, max_events=4, max_bytes=2**20)
+        else:
+            backend = redis_backend(max_events=4)
+        await backend.create("s")
+        for i in range(10):
+            await backend.append("s", f"frame {i}")
+        await backend.finish("s")
+        if kind == "redis":
+            # Approximate MAXLEN only trims whole nodes; trim as the server would
+            await backend.client.xtrim(backend._frames("s"), maxlen=4, approximate=False)
+
+        # From 0 (a new follower), not only from a later event id
+        with pytest.raises(StreamGone):
+            await backend.read("s", 0, timeout=0)
+        tail, finished = await backend.read("s", 6, timeout=0)
+        return [n for n, _ in tail], finished
+
+    assert asyncio.run(run()) == ([7, 8, 9, 10], True)
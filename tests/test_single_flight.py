@@ -0,0 +1,77 @@
+import asyncio
+
+from app.services.llm.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_upstream_call():
+    flights = SingleFlight()
+    calls = 0
+
+    async def upstream():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "design"
+
+    async def run():
+        return await asyncio.gather(*(flights.do("k", upstream) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["design"] * 5
+    assert calls == 1
+    assert flights.stats()["calls_coalesced"] == 4
+
+
+def test_late_stream_subscriber_receives_backlog():
+    flights = SingleFlight()
+    gate = None
+
+    async def upstream():
+        yield "a"
+        yield "b"
+        await gate.wait()
+        yield "c"
+
+    async def collect():
+        return [t async for t in flights.stream("k", upstream)]
+
+    async def run():
+        nonlocal gate
+        gate = asyncio.Event()
+        first = asyncio.create_task(collect())
+        await asyncio.sleep(0.01)  # "a" and "b" already produced
+        second = asyncio.create_task(collect())
+        await asyncio.sleep(0.01)
+        gate.set()
+        return await first, await second
+
+    first, second = asyncio.run(run())
+    assert first == second == ["a", "b", "c"]
+    assert flights.stats()["streams_started"] == 1
+
+
+def test_upstream_stream_cancelled_when_last_subscriber_leaves():
+    flights = SingleFlight()
+    cancelled = False
+
+    async def upstream():
+        nonlocal cancelled
+        try:
+            for i in range(100):
+                await asyncio.sleep(0.001)
+                yield str(i)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+
+    async def run():
+        stream = flights.stream("k", upstream)
+        assert await stream.__anext__() == "0"
+        pump = flights._streams["k"].task
+        await stream.aclose()
+        await asyncio.sleep(0.01)
+        return pump
+
+    pump = asyncio.run(run())
+    assert cancelled
+    assert pump.cancelled()  # not mistaken for a normal end of stream
+    assert flights.stats()["streams_abandoned"] == 1
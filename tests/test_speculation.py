@@ -0,0 +1,84 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.schemas.architecture_spec import ArchitectureSpec
+from app.services.speculation import SpeculativeGeneration
+
+SPEC = ArchitectureSpec(
+    project_name="Todo", description="A todo app", use_case="tasks",
+    requirements=["sharing"], tech_stack=["React", "FastAPI"],
+)
+
+
+def generator(design_stream, expand_error=None):
+    async def expand_prompt_to_spec(prompt):
+        if expand_error is not None:
+            raise expand_error
+        return SPEC.model_copy()
+
+    async def recall(payload_text, spec):
+        return SimpleNamespace(mode="seed", similarity=0.9, spec=spec)
+
+    return SimpleNamespace(
+        llm=SimpleNamespace(expand_prompt_to_spec=expand_prompt_to_spec),
+        describe=lambda spec: f"Project Name: {spec.project_name}",
+        recall=recall,
+        design_stream=design_stream,
+    )
+
+
+def test_speculation_streams_through_the_generation_service():
+    seen = []
+
+    async def design_stream(prompt_text, recall):
+        seen.append((prompt_text, recall))
+        yield "## 1. High-level architecture\n"
+
+    async def run():
+        speculation = SpeculativeGeneration(generator(design_stream), "a todo app")
+        spec = await speculation.spec()
+        return speculation, spec, [token async for token in speculation.stream()]
+
+    speculation, spec, tokens = asyncio.run(run())
+    assert spec.inferred and tokens == ["## 1. High-level architecture\n"]
+    # Same recall (reuse / seed) and design stream (fan-out) as the normal path
+    assert speculation.recall.mode == "seed" and speculation.recall.spec is spec
+    assert seen == [("A todo app", speculation.recall)]
+
+
+def test_discarding_keeps_a_cancellation_aimed_at_the_caller():
+    async def design_stream(prompt_text, recall):
+        try:
+            yield "## 1."
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            await asyncio.sleep(0.05)  # slow cleanup: the caller waits on it
+            raise
+
+    async def run():
+        speculation = SpeculativeGeneration(generator(design_stream), "a todo app")
+        await asyncio.sleep(0.01)
+        discarding = asyncio.create_task(speculation.cancel())
+        await asyncio.sleep(0.01)
+        discarding.cancel()  # e.g. the client disconnects meanwhile
+        await asyncio.gather(discarding, return_exceptions=True)
+        return speculation, discarding
+
+    speculation, discarding = asyncio.run(run())
+    assert speculation.task.cancelled()
+    assert discarding.cancelled()
+
+
+def test_discarding_a_failed_speculation_does_not_raise():
+    async def design_stream(prompt_text, recall):
+        yield "never"
+
+    async def run():
+        speculation = SpeculativeGeneration(
+            generator(design_stream, expand_error=ValueError("bad json")), "a todo app"
+        )
+        await asyncio.sleep(0.01)
+        await speculation.cancel()
+        return speculation
+
+    assert asyncio.run(run()).buffer.error is not None
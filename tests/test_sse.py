@@ -0,0 +1,41 @@
+import asyncio
+import json
+
+from app.utils.sse import SSEEncoder
+
+
+def _data(frame: str) -> dict:
+    line = next(l for l in frame.splitlines() if l.startswith("data: "))
+    return json.loads(line[len("data: "):])
+
+
+def test_token_frame_matches_json_dumps_envelope():
+    sse = SSEEncoder(window_ms=0, event_ids=False)
+    frame = sse.token("system_design", 'say "hi" → ünïcode\n')
+
+    assert frame == "data: " + json.dumps(
+        {"type": "system_design", "chunk": 'say "hi" → ünïcode\n'}
+    ) + "\n\n"
+
+
+def test_tokens_are_coalesced_and_numbered():
+    sse = SSEEncoder(window_ms=50, max_bytes=4096, event_ids=True)
+
+    async def source():
+        for i in range(100):
+            yield f"t{i} "
+
+    async def run():
+        frames = [f async for f in sse.tokens("system_design", source())]
+        frames.append(sse.event({"type": "done"}))
+        return frames
+
+    frames = asyncio.run(run())
+
+    assert len(frames) < 100
+    assert "".join(_data(f).get("chunk", "") for f in frames[:-1]) == "".join(
+        f"t{i} " for i in range(100)
+    )
+    ids = [int(f.split("\n", 1)[0][len("id: "):]) for f in frames]
+    assert ids == list(range(1, len(frames) + 1))
+    assert _data(frames[-1]) == {"type": "done"}
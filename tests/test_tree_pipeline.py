@@ -0,0 +1,70 @@
+import asyncio
+import json
+
+from app.services.generation_service import GenerationService
+from app.services.tree_pipeline import TreePipeline
+
+TREE = {"folders": ["app/", "app/main.py", "app/services/orders.py"]}
+
+DESIGN_HEAD = (
+    "## 1. High-level architecture\n"
+    "A FastAPI monolith in front of Postgres.\n\n"
+    "## 2. Key components and responsibilities\n"
+    "- Orders service: checkout and payment state.\n\n"
+)
+DESIGN_TAIL = (
+    "## 3. Data flow\n"
+    "Clients call the API, which writes to Postgres.\n\n"
+    "## 4. Deployment strategy\n"
+    "Ship a Docker image to Kubernetes.\n"
+)
+
+
+class FakeLLM:
+    def __init__(self):
+        self.tree_inputs = []
+
+    async def stream_component_tree(self, system_design):
+        self.tree_inputs.append(system_design)
+        for chunk in (json.dumps(TREE)[:20], json.dumps(TREE)[20:]):
+            await asyncio.sleep(0)
+            yield chunk
+
+    async def generate_component_tree(self, system_design):
+        return TREE
+
+
+async def run_pipeline(design_tokens, min_chars=0):
+    service = GenerationService(FakeLLM())
+    pipeline = TreePipeline(service, min_chars=min_chars)
+    for token in design_tokens:
+        pipeline.feed(token)
+        await asyncio.sleep(0)
+    events = [e async for e in pipeline.events("".join(design_tokens))]
+    return service, pipeline, events
+
+
+def test_tree_starts_on_the_first_section_after_the_components():
+    tokens = [line + "\n" for line in (DESIGN_HEAD + DESIGN_TAIL).split("\n")]
+    service, pipeline, events = asyncio.run(run_pipeline(tokens))
+
+    assert pipeline.head == DESIGN_HEAD
+    assert service.llm.tree_inputs == [DESIGN_HEAD]
+
+    # The tail's deployment artifacts are reconciled into the early tree
+    kind, tree = events[-1]
+    assert kind == "tree"
+    assert tree["folders"] == TREE["folders"] + ["Dockerfile", "k8s/"]
+    assert [v for k, v in events if k == "node"] == tree["folders"]
+    assert service.stats()["tree_started_early"] == 1
+    assert service.stats()["tree_patched"] == 1
+
+
+def test_pipeline_degrades_to_the_sequential_path_without_a_trigger():
+    tokens = [DESIGN_HEAD, DESIGN_TAIL]
+    service, pipeline, events = asyncio.run(run_pipeline(tokens, min_chars=10_000))
+
+    assert not pipeline.started
+    assert service.llm.tree_inputs == [DESIGN_HEAD + DESIGN_TAIL]
+    assert events[-1] == ("tree", TREE)
+    assert service.stats()["tree_sequential"] == 1
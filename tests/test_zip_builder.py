@@ -0,0 +1,41 @@
+import io
+import os
+import tempfile
+import zipfile
+
+from app.services.zip_builder import iter_scaffold_zip, iter_zip
+
+RESULT = {
+    "input_spec": {"project_name": "My Shop!", "description": "Sells things"},
+    "system_design": "## Architecture\nFastAPI + Postgres\n",
+    "component_tree": {"folders": ["app/", "app/main.py", "docs/", "docs/api.md", "web/src/App.tsx"]},
+}
+
+
+def test_scaffold_zip_contains_docs_diagram_and_the_tree_as_files():
+    before = set(os.listdir(tempfile.gettempdir()))
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(iter_scaffold_zip(RESULT))))
+
+    assert archive.testzip() is None
+    names = archive.namelist()
+    assert len(names) == len(set(names))
+    assert {"my-shop/docs/system_design.md", "my-shop/docs/diagrams/components.mmd",
+            "my-shop/app/", "my-shop/web/src/App.tsx", "my-shop/docs/api.md"} <= set(names)
+    assert archive.read("my-shop/app/main.py") == b"# app/main.py\n"
+    assert b'n2 --> n3["src/"]' in archive.read("my-shop/docs/diagrams/components.mmd")
+    # Nothing is staged on disk
+    assert set(os.listdir(tempfile.gettempdir())) == before
+
+
+def test_large_entries_are_streamed_in_bounded_chunks():
+    def big_file():
+        for i in range(64):
+            yield os.urandom(64 * 1024)  # incompressible, 4 MiB in total
+
+    chunks = list(iter_zip([("big.bin", big_file()), ("small.txt", "hi")], chunk_size=64 * 1024))
+    assert len(chunks) > 32
+    assert max(map(len, chunks)) < 4 * 64 * 1024
+
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    assert archive.getinfo("big.bin").file_size == 64 * 64 * 1024
+    assert archive.read("small.txt") == b"hi"